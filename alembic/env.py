@@ -44,9 +44,11 @@ def load_env_from_local_settings_if_needed():
 load_env_from_local_settings_if_needed()
 
 # Now that the environment is patched, we can safely import application modules.
-from tvbingefriend_show_sync.config import SQLALCHEMY_CONNECTION_STRING
+from tvbingefriend_show_sync.config import get_sqlalchemy_connection_string
 from tvbingefriend_tvmaze_models.models.base import Base
 
+from tvbingefriend_show_sync.repositories import dimensions
+
 # For autogenerate to work, you must import your model classes here.
 # This allows them to be registered with the Base.metadata object.
 # Assuming your models are in a package named 'tvbingefriend-tvmaze-models'
@@ -60,7 +62,7 @@ config = context.config
 
 # Set the database URL from your application's configuration.
 # This overrides the sqlalchemy.url in alembic.ini.
-config.set_main_option("sqlalchemy.url", SQLALCHEMY_CONNECTION_STRING)
+config.set_main_option("sqlalchemy.url", get_sqlalchemy_connection_string())
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -71,7 +73,23 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-target_metadata = Base.metadata
+# The networks and webchannels tables aren't mapped by the models package, so their metadata is added here
+target_metadata = [Base.metadata, dimensions.metadata]
+
+# Reference columns that migrations add to the models' tables, with their indexes and foreign keys
+UNMAPPED_REFERENCES = {
+    name
+    for table_name, columns in dimensions.REFERENCE_COLUMNS.items()
+    for column in columns
+    for name in (column, f"ix_{table_name}_{column}", f"fk_{table_name}_{column}")
+}
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Keep autogenerate from dropping the dimension reference columns the models don't map"""
+    if reflected and compare_to is None and name in UNMAPPED_REFERENCES:
+        return type_ not in ("column", "index", "foreign_key_constraint")
+    return True
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -95,6 +113,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -114,7 +133,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,85 @@
+"""network and webchannel dimensions
+
+Revision ID: 5c1e9d2b7f40
+Revises: a3afb58af752
+Create Date: 2026-10-19 10:12:31.408215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9d2b7f40'
+down_revision: Union[str, Sequence[str], None] = 'a3afb58af752'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DIMENSIONS = (('networks', 'network'), ('webchannels', 'webchannel'))  # (table, JSON column of shows and seasons)
+REFERENCING_TABLES = ('shows', 'seasons')
+BACKFILL_BATCH_SIZE = 10000  # rows per UPDATE, so the backfill doesn't hold locks on a whole table
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, _ in DIMENSIONS:
+        op.create_table(table,
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('country', mysql.JSON(), nullable=True),
+        sa.Column('officialSite', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    for referencing in REFERENCING_TABLES:
+        for table, column in DIMENSIONS:
+            op.add_column(referencing, sa.Column(f'{column}_id', sa.Integer(), nullable=True))
+            op.create_index(f'ix_{referencing}_{column}_id', referencing, [f'{column}_id'], unique=False)
+            op.create_foreign_key(
+                f'fk_{referencing}_{column}_id', referencing, table, [f'{column}_id'], ['id']
+            )
+
+    connection = op.get_bind()
+    for referencing in REFERENCING_TABLES:
+        for table, column in DIMENSIONS:
+            has_id = f"JSON_TYPE(t.`{column}`->'$.id') = 'INTEGER'"
+            connection.execute(sa.text(
+                f"INSERT INTO `{table}` (`id`, `name`, `country`, `officialSite`) "
+                f"SELECT * FROM ("
+                f"SELECT CAST(t.`{column}`->>'$.id' AS UNSIGNED) AS `id`, "
+                f"NULLIF(t.`{column}`->>'$.name', 'null') AS `name`, "
+                f"IF(JSON_TYPE(t.`{column}`->'$.country') = 'OBJECT', t.`{column}`->'$.country', NULL) AS `country`, "
+                f"NULLIF(t.`{column}`->>'$.officialSite', 'null') AS `officialSite` "
+                f"FROM `{referencing}` AS t WHERE {has_id}"
+                f") AS d "
+                f"ON DUPLICATE KEY UPDATE `name` = d.`name`, `country` = d.`country`, `officialSite` = d.`officialSite`"
+            ))
+
+        max_id = connection.execute(sa.text(f"SELECT MAX(`id`) FROM `{referencing}`")).scalar() or 0
+        for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+            connection.execute(
+                sa.text(
+                    f"UPDATE `{referencing}` AS t SET "
+                    + ", ".join(
+                        f"t.`{column}_id` = IF(JSON_TYPE(t.`{column}`->'$.id') = 'INTEGER', "
+                        f"CAST(t.`{column}`->>'$.id' AS UNSIGNED), NULL)"
+                        for _, column in DIMENSIONS
+                    )
+                    + " WHERE t.`id` >= :start AND t.`id` < :end"
+                ),
+                {"start": start, "end": start + BACKFILL_BATCH_SIZE}
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for referencing in REFERENCING_TABLES:
+        for _, column in DIMENSIONS:
+            op.drop_constraint(f'fk_{referencing}_{column}_id', referencing, type_='foreignkey')
+            op.drop_index(f'ix_{referencing}_{column}_id', table_name=referencing)
+            op.drop_column(referencing, f'{column}_id')
+
+    for table, _ in DIMENSIONS:
+        op.drop_table(table)
@@ -0,0 +1 @@
+"""Local benchmarks for tvbingefriend_show_sync"""
@@ -0,0 +1,97 @@
+"""Benchmark the LOAD DATA bulk load path at catalog scale
+
+Writes a synthetic catalog's shows, seasons, and episodes as load files (as the backfill workers do with
+--bulk-load) and reports rows/second and bytes per table. With --load, also loads and merges them into the
+database in SQLALCHEMY_CONNECTION_STRING and reports the load and merge times; use a scratch database, as the
+synthetic rows are merged into its shows, seasons, and episodes tables. Run from the repository root:
+
+    python -m benchmarks.bench_bulk_load --shows 70000 --directory /tmp/tvmaze-load
+    SQLALCHEMY_CONNECTION_STRING=mysql+pymysql://... python -m benchmarks.bench_bulk_load --shows 70000 --load
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("AzureWebJobsStorage", "UseDevelopmentStorage=true")
+os.environ.setdefault("UPDATE_SHOWS_NCRON", "0 0 * * * *")
+os.environ.setdefault("UPDATE_SEASONS_EPISODES_NCRON", "0 30 * * * *")
+
+from benchmarks.catalog import SyntheticCatalog  # noqa: E402
+from tvbingefriend_show_sync.repositories.bulk_load import (  # noqa: E402
+    LOAD_ORDER,
+    bulk_load_directory,
+    get_load_file_paths,
+    write_load_file
+)
+from tvbingefriend_show_sync.services.group_commit_writer import EPISODE, SEASON, SHOW  # noqa: E402
+
+SHOWS_PER_FILE = 250  # one show index page, or one seasons/episodes batch of the backfill at --batch-size 250
+
+
+def write_catalog(catalog: SyntheticCatalog, directory: Path) -> dict[str, tuple[int, float]]:
+    """Write the catalog as load files, SHOWS_PER_FILE shows per file
+
+    Returns:
+        dict[str, tuple[int, float]]: Rows and seconds spent writing, per kind
+    """
+    totals: dict[str, list[float]] = {kind: [0, 0.0] for kind in LOAD_ORDER}
+    show_ids = list(catalog)
+    for index in range(0, len(show_ids), SHOWS_PER_FILE):
+        batch = show_ids[index:index + SHOWS_PER_FILE]
+        shows = [catalog.build_show(show_id) for show_id in batch]
+        seasons: list[dict] = []
+        episodes: list[dict] = []
+        for show_id in batch:
+            embedded = catalog.build_embedded(show_id)
+            seasons += [{"show_id": show_id, "season": season} for season in embedded["seasons"]]
+            episodes += [{"show_id": show_id, "episode": episode} for episode in embedded["episodes"]]
+
+        for kind, payloads in ((SHOW, shows), (SEASON, seasons), (EPISODE, episodes)):
+            start = time.perf_counter()
+            totals[kind][0] += write_load_file(kind, payloads, directory / f"{kind}-{batch[0]:08d}.tsv")
+            totals[kind][1] += time.perf_counter() - start
+    return {kind: (int(rows), seconds) for kind, (rows, seconds) in totals.items()}
+
+
+def main() -> None:
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shows", type=int, default=2000, help="Catalog size; 70000 for a full-size catalog")
+    parser.add_argument("--directory", default=None, help="Where to write load files; a temporary directory if unset")
+    parser.add_argument("--load", action="store_true", help="Also load and merge the files into the database")
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(args.shows)
+    print(f"catalog: {catalog.show_count} shows, {catalog.season_total} seasons, {catalog.episode_total} episodes")
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        directory = Path(args.directory or temporary_directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        print(f"\n{'table':<10} {'rows':>10} {'MB':>8} {'write s':>9} {'rows/s':>10}")
+        for kind, (rows, seconds) in write_catalog(catalog, directory).items():
+            size_mb = sum(path.stat().st_size for path in get_load_file_paths(directory, kind)) / 1_000_000
+            print(f"{kind:<10} {rows:>10} {size_mb:>8.1f} {seconds:>9.2f} {rows / seconds:>10.0f}")
+
+        if not args.load:
+            return
+
+        from tvbingefriend_show_sync.repositories.database import create_bulk_load_engine
+
+        engine = create_bulk_load_engine()
+        try:
+            results = bulk_load_directory(directory, engine)
+        finally:
+            engine.dispose()
+
+        print(f"\n{'table':<10} {'rows':>10} {'load s':>9} {'merge s':>9} {'rows/s':>10}")
+        for kind, result in results.items():
+            seconds = result.load_seconds + result.merge_seconds
+            print(f"{kind:<10} {result.rows:>10} {result.load_seconds:>9.2f} {result.merge_seconds:>9.2f} "
+                  f"{result.rows / seconds:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Replay a synthetic TV Maze catalog through the sync services end to end
+
+Drives ShowService, SeasonsEpisodesService, and UpdateService against the in-memory storage and a synthetic
+catalog, in the order the function app runs them: crawl the show index and stage each show, fetch and stage
+every show's seasons and episodes, then stage and fetch a day of updates. Staged upsert blobs are counted but
+not kept. Each stage reports rows/second (excluding time spent building the synthetic responses), peak traced
+memory, and storage operations. Run from the repository root:
+
+    python -m benchmarks.bench_catalog_replay --shows 2000
+    python -m benchmarks.bench_catalog_replay --shows 70000 --json full.json
+    python -m benchmarks.bench_catalog_replay --baseline full.json --max-regression 0.2
+
+With --baseline, the run fails if any stage's rows/second falls more than --max-regression below the baseline.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable
+
+os.environ.setdefault("AzureWebJobsStorage", "UseDevelopmentStorage=true")
+os.environ.setdefault("UPDATE_SHOWS_NCRON", "0 0 * * * *")
+os.environ.setdefault("UPDATE_SEASONS_EPISODES_NCRON", "0 30 * * * *")
+
+from benchmarks.catalog import CatalogTVMazeAPI, SyntheticCatalog  # noqa: E402
+from benchmarks.fakes import FakeStorageService  # noqa: E402
+from tvbingefriend_show_sync.config import (  # noqa: E402
+    EPISODE_UPSERT_CONTAINER,
+    SEASON_UPSERT_CONTAINER,
+    SHOW_STAGE_CONTAINER,
+    SHOW_UPSERT_CONTAINER,
+    TVMAZE_SEASONS_EPISODES_CONTAINER,
+    TVMAZE_SEASONS_EPISODES_QUEUE,
+    TVMAZE_SHOWS_UPDATE_QUEUE
+)
+from tvbingefriend_show_sync.services.progress_ledger import ProgressLedger  # noqa: E402
+from tvbingefriend_show_sync.services.seasons_episodes_service import SeasonsEpisodesService  # noqa: E402
+from tvbingefriend_show_sync.services.show_service import ShowService  # noqa: E402
+from tvbingefriend_show_sync.services.update_service import UpdateService  # noqa: E402
+
+UPSERT_CONTAINERS = frozenset({SHOW_UPSERT_CONTAINER, SEASON_UPSERT_CONTAINER, EPISODE_UPSERT_CONTAINER})
+REPLAY_CHUNK = 50  # queue messages fetched before their blobs are staged, bounding the blobs held in memory
+
+
+class StageStats:
+    """Time, rows, peak memory, and storage operations accumulated by one stage"""
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.rows = 0
+        self.seconds = 0.0
+        self.api_seconds = 0.0
+        self.peak_bytes = 0
+        self.op_counts: Counter[str] = Counter()
+
+    @property
+    def rows_per_second(self) -> float:
+        """Rows per second of service time, excluding time building synthetic responses"""
+        service_seconds = self.seconds - self.api_seconds
+        return self.rows / service_seconds if service_seconds > 0 else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get the stats as JSON-serializable values"""
+        return {
+            "rows": self.rows,
+            "seconds": round(self.seconds, 3),
+            "api_seconds": round(self.api_seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "peak_mb": round(self.peak_bytes / 1_000_000, 1),
+            "op_counts": dict(self.op_counts)
+        }
+
+
+class Replay:
+    """Runs measured stages against one fake storage service and catalog API"""
+    def __init__(self, storage: FakeStorageService, api: CatalogTVMazeAPI, trace_memory: bool) -> None:
+        self.storage = storage
+        self.api = api
+        self.trace_memory = trace_memory
+        self.stages: dict[str, StageStats] = {}
+
+    def measure(self, name: str, run: Callable[[], int]) -> None:
+        """Run part of a stage and add its time, rows, peak memory, and storage operations to the stage
+
+        Args:
+            name (str): Stage name
+            run (Callable[[], int]): Work to measure, returning the rows it processed
+        """
+        stats = self.stages.setdefault(name, StageStats(name))
+        ops_before = Counter(self.storage.op_counts)
+        api_before = self.api.api_seconds
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        stats.rows += run()
+        stats.seconds += time.perf_counter() - start
+
+        stats.api_seconds += self.api.api_seconds - api_before
+        stats.op_counts.update(self.storage.op_counts - ops_before)
+        if self.trace_memory:
+            stats.peak_bytes = max(stats.peak_bytes, tracemalloc.get_traced_memory()[1])
+
+
+def crawl_shows(replay: Replay, show_service: ShowService) -> None:
+    """Fetch every page of the show index, then stage each page's shows for upsert"""
+    def fetch_pages() -> int:
+        page = 0
+        while show_service.fetch_show_page(page):
+            page += 1
+        return replay.api.catalog.show_count
+
+    def stage_pages() -> int:
+        rows = 0
+        for _, shows in replay.storage.pop_blobs(SHOW_STAGE_CONTAINER):  # what the page blob trigger receives
+            show_service.stage_shows_for_upsert(shows)
+            rows += len(shows)
+        return rows
+
+    replay.measure("shows.fetch_pages", fetch_pages)
+    replay.measure("shows.stage_upserts", stage_pages)
+
+
+def replay_seasons_episodes(replay: Replay, service: SeasonsEpisodesService, show_ids: list[int]) -> None:
+    """Queue every show for season/episode retrieval, then fetch and stage them a chunk of messages at a time"""
+    def queue() -> int:
+        service.stage_show_ids_for_retrieval(show_ids)
+        return len(show_ids)
+
+    replay.measure("seasons_episodes.queue", queue)
+    messages = replay.storage.drain_queue(TVMAZE_SEASONS_EPISODES_QUEUE)
+
+    def fetch(chunk: list[dict[str, Any]]) -> int:
+        return sum(len(service.get_seasons_episodes_batch(message)) for message in chunk)
+
+    def stage() -> int:
+        rows = 0
+        for _, show_data in replay.storage.pop_blobs(TVMAZE_SEASONS_EPISODES_CONTAINER):
+            service.stage_show_seasons_episodes(show_data)
+            embedded = show_data.get("_embedded", {})
+            rows += len(embedded.get("seasons", [])) + len(embedded.get("episodes", []))
+        return rows
+
+    for index in range(0, len(messages), REPLAY_CHUNK):
+        chunk = messages[index:index + REPLAY_CHUNK]
+        replay.measure("seasons_episodes.fetch", lambda: fetch(chunk))
+        replay.measure("seasons_episodes.stage", stage)
+
+
+def replay_updates(replay: Replay, update_service: UpdateService) -> None:
+    """Stage a period of show updates, fetch each updated show, then queue their seasons/episodes"""
+    updates = replay.api.get_show_updates()
+
+    def stage() -> int:
+        update_service.stage_updates_for_upsert(updates)
+        return len(updates)
+
+    def fetch_details() -> int:
+        messages = replay.storage.drain_queue(TVMAZE_SHOWS_UPDATE_QUEUE)
+        return sum(len(update_service.get_show_update_details_batch(message)) for message in messages)
+
+    def queue_seasons_episodes() -> int:
+        update_service.update_seasons_episodes()
+        return len(updates)
+
+    replay.measure("updates.stage", stage)
+    replay.measure("updates.fetch_details", fetch_details)
+    replay.measure("updates.queue_seasons_episodes", queue_seasons_episodes)
+
+
+def check_regressions(results: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> list[str]:
+    """Compare rows/second per stage with a baseline run
+
+    Returns:
+        list[str]: Description of each stage slower than the baseline by more than max_regression
+    """
+    failures: list[str] = []
+    for name, stats in results["stages"].items():
+        expected = baseline.get("stages", {}).get(name, {}).get("rows_per_second")
+        if expected and stats["rows_per_second"] < expected * (1 - max_regression):
+            failures.append(f"{name}: {stats['rows_per_second']:.1f} rows/s vs. baseline {expected:.1f}")
+    return failures
+
+
+def main() -> None:
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shows", type=int, default=2000, help="Catalog size; 70000 for a full-size catalog")
+    parser.add_argument("--seasons", type=int, default=None, help="Target seasons; scales with --shows by default")
+    parser.add_argument("--episodes", type=int, default=None, help="Target episodes; scales with --shows by default")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--update-fraction", type=float, default=0.05, help="Share of shows in the update period")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip peak memory, which slows every stage")
+    parser.add_argument("--json", default=None, help="Write the results to this file")
+    parser.add_argument("--baseline", default=None, help="Results file of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed rows/second drop per stage")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)  # as host.json, so log formatting costs what it does deployed
+
+    catalog = SyntheticCatalog(args.shows, args.seasons, args.episodes, seed=args.seed, updated=1_700_000_000)
+    print(f"catalog: {catalog.show_count} shows, {catalog.season_total} seasons, {catalog.episode_total} episodes")
+
+    storage = FakeStorageService(discard_containers=UPSERT_CONTAINERS)
+    api = CatalogTVMazeAPI(catalog, update_fraction=args.update_fraction)
+    ledger = ProgressLedger(storage)  # noqa: the fake stands in for StorageService
+    show_service = ShowService(storage_service=storage, tvmaze_api=api, progress_ledger=ledger)  # noqa
+    seasons_episodes_service = SeasonsEpisodesService(  # noqa
+        show_service=show_service, storage_service=storage, tvmaze_api=api, progress_ledger=ledger
+    )
+    update_service = UpdateService(storage_service=storage, tvmaze_api=api)  # noqa
+
+    replay = Replay(storage, api, trace_memory=not args.no_tracemalloc)
+    if replay.trace_memory:
+        tracemalloc.start()
+    crawl_shows(replay, show_service)
+    replay_seasons_episodes(replay, seasons_episodes_service, list(catalog))
+    replay_updates(replay, update_service)
+    if replay.trace_memory:
+        tracemalloc.stop()
+
+    print(f"\n{'stage':<32} {'rows':>10} {'seconds':>9} {'api s':>8} {'rows/s':>10} {'peak MB':>8}  storage ops")
+    for stats in replay.stages.values():
+        ops = ", ".join(f"{op}={count}" for op, count in sorted(stats.op_counts.items()))
+        print(
+            f"{stats.name:<32} {stats.rows:>10} {stats.seconds:>9.2f} {stats.api_seconds:>8.2f} "
+            f"{stats.rows_per_second:>10.1f} {stats.peak_bytes / 1_000_000:>8.1f}  {ops}"
+        )
+    print(f"\nbytes written to blobs: {storage.bytes_written}")
+
+    results = {
+        "catalog": {"shows": catalog.show_count, "seasons": catalog.season_total, "episodes": catalog.episode_total},
+        "stages": {name: stats.to_dict() for name, stats in replay.stages.items()}
+    }
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            failures = check_regressions(results, json.load(file), args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark cold-start import cost of the function app
+
+Runs ``python -X importtime -c "import function_app"`` in a fresh interpreter and reports the cumulative
+import time, the slowest top-level imports, and whether modules that should be deferred were loaded.
+Run from the repository root:
+
+    python -m benchmarks.bench_import_time --runs 5 --budget-ms 400
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+DEFERRED_MODULES = ("sqlalchemy", "pymysql", "tvbingefriend_tvmaze_client", "tvbingefriend_tvmaze_models")
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def run_importtime(target: str) -> list[tuple[int, int, str]]:
+    """Import target in a fresh interpreter with -X importtime
+
+    Args:
+        target (str): Module to import
+
+    Returns:
+        list[tuple[int, int, str]]: (cumulative_us, depth, module) for each imported module
+    """
+    env = dict(os.environ)
+    env.setdefault("UPDATE_SHOWS_NCRON", "0 0 * * * *")
+    env.setdefault("UPDATE_SEASONS_EPISODES_NCRON", "0 30 * * * *")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    rows: list[tuple[int, int, str]] = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            rows.append((int(match.group(2)), len(match.group(3)) // 2, match.group(4)))
+    return rows
+
+
+def main() -> None:
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="function_app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if the median exceeds this budget")
+    args = parser.parse_args()
+
+    totals_ms: list[float] = []
+    rows: list[tuple[int, int, str]] = []
+    for _ in range(args.runs):
+        rows = run_importtime(args.target)
+        target_row = next(row for row in rows if row[2] == args.target)
+        totals_ms.append(target_row[0] / 1000)
+
+    median_ms = statistics.median(totals_ms)
+    print(f"import {args.target}: median {median_ms:.1f} ms over {args.runs} runs (min {min(totals_ms):.1f} ms)")
+
+    print("\nSlowest top-level imports (last run):")
+    top_level = sorted((row for row in rows if row[1] <= 1), reverse=True)[:args.top]
+    for cumulative_us, _, module in top_level:
+        print(f"  {cumulative_us / 1000:>8.1f} ms  {module}")
+
+    loaded = sorted({row[2].split(".")[0] for row in rows} & set(DEFERRED_MODULES))
+    print(f"\nDeferred modules loaded at import: {', '.join(loaded) if loaded else 'none'}")
+
+    if loaded or (args.budget_ms is not None and median_ms > args.budget_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Benchmark the CPU spent on logging while staging a show with many episodes
+
+Stages one show's episodes through EpisodeService and StorageService with blob uploads discarded, so the
+measured time is the staging loop and its logging. The baseline replays the previous loop, which built
+four f-string messages per episode in the service and two per upload in StorageService whether or not the
+level let them through. Run from the repository root:
+
+    python -m benchmarks.bench_logging --episodes 10000 --level ERROR
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Any
+
+os.environ.setdefault("AzureWebJobsStorage", "UseDevelopmentStorage=true")
+os.environ.setdefault("UPDATE_SHOWS_NCRON", "0 0 * * * *")
+os.environ.setdefault("UPDATE_SEASONS_EPISODES_NCRON", "0 30 * * * *")
+
+from tvbingefriend_show_sync.config import EPISODE_UPSERT_CONTAINER  # noqa: E402
+from tvbingefriend_show_sync.log_levels import configure_log_levels  # noqa: E402
+from tvbingefriend_show_sync.services.episode_service import EpisodeService  # noqa: E402
+from tvbingefriend_show_sync.services.storage_service import StorageService  # noqa: E402
+
+
+class _DiscardingBlobClient:
+    """Blob client that drops uploads"""
+    def upload_blob(self, data: Any, overwrite: bool = True, metadata: dict[str, str] | None = None) -> None:
+        """Discard the upload"""
+
+
+class _DiscardingContainerClient:
+    """Container client handing out discarding blob clients"""
+    def get_blob_client(self, blob: str) -> _DiscardingBlobClient:
+        """Get a blob client"""
+        return _DiscardingBlobClient()
+
+
+def make_storage_service() -> StorageService:
+    """Create a StorageService whose episode container drops uploads"""
+    storage_service = StorageService("UseDevelopmentStorage=true")
+    storage_service._container_clients[EPISODE_UPSERT_CONTAINER] = _DiscardingContainerClient()  # noqa
+    return storage_service
+
+
+def legacy_stage_episodes(storage_service: StorageService, episode_data: dict[str, Any]) -> None:
+    """The staging loop as it logged before: eager f-strings per episode and per upload"""
+    show_id = episode_data.get('show_id')
+    episodes: list[dict[str, Any]] = episode_data.get('episodes', [])
+    container_client = storage_service._container_clients[EPISODE_UPSERT_CONTAINER]  # noqa
+    for episode in episodes:
+        blob_data: dict[str, Any] = {'show_id': show_id, 'episode': episode}
+        episode_id = episode.get('id')
+        logging.debug(msg=f"EpisodeService.stage_episodes: episode_id: {episode_id}")
+        blob_name = f"tv_show_{show_id}_episode_{episode_id}.json"
+        logging.debug(msg=f"EpisodeService.stage_episodes: blob_name: {blob_name}")
+        logging.debug(msg=f"EpisodeService.stage_episodes: container_name: {EPISODE_UPSERT_CONTAINER}")
+
+        logging.debug(  # StorageService.upload_blob_data
+            msg=f"StorageService.upload_blob_data: Attempting to upload blob to {EPISODE_UPSERT_CONTAINER}/{blob_name} "
+                f"(overwrite={True})"
+        )
+        container_client.get_blob_client(blob=blob_name).upload_blob(data=json.dumps(blob_data), overwrite=True)
+        logging.info(
+            msg=f"StorageService.upload_blob_data: Successfully uploaded blob: {EPISODE_UPSERT_CONTAINER}/{blob_name}"
+        )
+
+        logging.info(msg=f"EpisodeService.stage_episodes: Staged episode {episode_id} for show id {show_id}")
+
+
+def make_show(episode_count: int) -> dict[str, Any]:
+    """Build a show payload with episode_count episodes shaped like TV Maze's"""
+    return {
+        "show_id": 1,
+        "episodes": [
+            {
+                "id": episode_id,
+                "url": f"https://www.tvmaze.com/episodes/{episode_id}",
+                "name": f"Episode {episode_id}",
+                "season": episode_id // 20 + 1,
+                "number": episode_id % 20 + 1,
+                "airdate": "2020-01-01",
+                "runtime": 30,
+                "summary": "<p>An episode.</p>"
+            }
+            for episode_id in range(1, episode_count + 1)
+        ]
+    }
+
+
+def measure(run: Any, repeats: int) -> float:
+    """Get the best CPU time of repeated runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.process_time()
+        run()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--level", default="ERROR", help="Level of the root and package loggers, as in host.json")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.level.upper(), handlers=[logging.NullHandler()])
+    configure_log_levels(f"tvbingefriend_show_sync={args.level.upper()}")
+
+    show = make_show(args.episodes)
+    storage_service = make_storage_service()
+    episode_service = EpisodeService(episode_repository=object(), storage_service=storage_service)  # noqa
+
+    legacy = measure(lambda: legacy_stage_episodes(storage_service, show), args.repeats)
+    current = measure(lambda: episode_service.stage_episodes(show), args.repeats)
+
+    print(f"{args.episodes} episodes at level {args.level.upper()} (best of {args.repeats}, CPU seconds)")
+    print(f"{'eager f-string logging':<28} {legacy:>8.3f}")
+    print(f"{'lazy, level-gated logging':<28} {current:>8.3f}")
+    print(f"{'saved':<28} {legacy - current:>8.3f} ({(1 - current / legacy) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
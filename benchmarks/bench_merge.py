@@ -0,0 +1,111 @@
+"""Benchmark the staging-table merge against the multi-row upsert
+
+Upserts a synthetic catalog's episodes, in batches, into the database in SQLALCHEMY_CONNECTION_STRING three times
+with each path: into an empty table, unchanged, and with a fraction of the rows changed. Reports seconds and
+rows/second per pass, and the merge's per-phase timings. Use a scratch database, as the synthetic rows are written
+to (and deleted from) its shows and episodes tables. Run from the repository root:
+
+    SQLALCHEMY_CONNECTION_STRING=mysql+pymysql://... python -m benchmarks.bench_merge --shows 500 --batch-size 5000
+"""
+import argparse
+import os
+import random
+import time
+from typing import Any, Callable
+
+os.environ.setdefault("AzureWebJobsStorage", "UseDevelopmentStorage=true")
+os.environ.setdefault("UPDATE_SHOWS_NCRON", "0 0 * * * *")
+os.environ.setdefault("UPDATE_SEASONS_EPISODES_NCRON", "0 30 * * * *")
+
+from sqlalchemy import delete  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from tvbingefriend_tvmaze_models.models.episode import Episode  # noqa: E402
+from tvbingefriend_tvmaze_models.models.show import Show  # noqa: E402
+
+from benchmarks.catalog import SyntheticCatalog  # noqa: E402
+from tvbingefriend_show_sync.repositories.bulk_upsert import bulk_upsert  # noqa: E402
+from tvbingefriend_show_sync.repositories.records import EpisodeRecord  # noqa: E402
+from tvbingefriend_show_sync.repositories.show_repo import ShowRepository  # noqa: E402
+from tvbingefriend_show_sync.repositories.staging_merge import PHASES, merge_rows  # noqa: E402
+from tvbingefriend_show_sync.utils import db_session_manager  # noqa: E402
+
+PASSES = ("insert", "unchanged", "changed")
+
+
+def build_payloads(catalog: SyntheticCatalog) -> list[dict[str, Any]]:
+    """Get the catalog's episodes as upsert payloads"""
+    return [
+        {"show_id": show_id, "episode": episode}
+        for show_id in catalog
+        for episode in catalog.build_embedded(show_id)["episodes"]
+    ]
+
+
+def build_records(payloads: list[dict[str, Any]], changed: float = 0.0, seed: int = 1) -> list[EpisodeRecord]:
+    """Get upsert records of payloads, with a fraction of their names changed"""
+    rng = random.Random(seed)
+    records: list[EpisodeRecord] = []
+    for payload in payloads:
+        if changed and rng.random() < changed:
+            episode = payload["episode"]
+            payload = {**payload, "episode": {**episode, "name": f"{episode['name']} (revised)"}}
+        records.append(EpisodeRecord.from_payload(payload))
+    return records
+
+
+def run_pass(
+    write: Callable[[list[EpisodeRecord], Session], Any],
+    rows: list[EpisodeRecord],
+    batch_size: int
+) -> float:
+    """Write rows in batches, one transaction per batch, and return the seconds taken"""
+    start = time.perf_counter()
+    for index in range(0, len(rows), batch_size):
+        batch = rows[index:index + batch_size]
+        with db_session_manager() as db:
+            write(batch, db)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shows", type=int, default=500, help="Catalog size")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Episodes per transaction")
+    parser.add_argument("--changed", type=float, default=0.05, help="Fraction of episodes changed in the last pass")
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(args.shows)
+    payloads = build_payloads(catalog)
+    rows = build_records(payloads)
+    passes = {"insert": rows, "unchanged": rows, "changed": build_records(payloads, args.changed)}
+    print(f"catalog: {catalog.show_count} shows, {len(rows)} episodes, {args.batch_size} per batch")
+
+    with db_session_manager() as db:
+        ShowRepository().insert_show_stubs(set(catalog), db)
+
+    phase_seconds = dict.fromkeys(PHASES, 0.0)
+
+    def merge(batch: list[EpisodeRecord], db: Session) -> None:
+        result = merge_rows(Episode, batch, db)
+        for phase, seconds in result.seconds.items():
+            phase_seconds[phase] += seconds
+
+    print(f"\n{'path':<10} {'pass':<10} {'seconds':>9} {'rows/s':>10}")
+    try:
+        for path, write in (("upsert", lambda batch, db: bulk_upsert(Episode, batch, db)), ("merge", merge)):
+            with db_session_manager() as db:
+                db.execute(delete(Episode).where(Episode.show_id.in_(list(catalog))))
+            for name in PASSES:
+                seconds = run_pass(write, passes[name], args.batch_size)
+                print(f"{path:<10} {name:<10} {seconds:>9.2f} {len(rows) / seconds:>10.0f}")
+    finally:
+        with db_session_manager() as db:
+            db.execute(delete(Episode).where(Episode.show_id.in_(list(catalog))))
+            db.execute(delete(Show).where(Show.id.in_(list(catalog))))
+
+    print("\nmerge phases: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in phase_seconds.items()))
+
+
+if __name__ == "__main__":
+    main()
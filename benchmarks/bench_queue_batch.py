@@ -0,0 +1,87 @@
+"""Benchmark queue consumer throughput at several message batch sizes
+
+Stages a synthetic catalog's updates with UpdateService, so the update queue is filled in messages of
+QUEUE_MESSAGE_BATCH_SIZE shows, then feeds every message to the get_show_update_details queue function as the
+host would: as a QueueMessage, through its metrics, tracing, and profiling decorators, the shared service
+container, process_batch, and a blob upload per show. Storage is in memory and the TV Maze client serves the
+catalog; time spent building its responses is excluded. The host's own cost per message (queue polling,
+invocation setup) isn't part of this process, so it can only be modelled with --dispatch-ms, and TV Maze
+latency with --api-ms; both default to 0, so the figures measure this repository's code alone. Run from the
+repository root:
+
+    python -m benchmarks.bench_queue_batch --shows 10000 --sizes 1 5 10 25 50
+    python -m benchmarks.bench_queue_batch --dispatch-ms 20 --api-ms 5
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("AzureWebJobsStorage", "UseDevelopmentStorage=true")
+os.environ.setdefault("UPDATE_SHOWS_NCRON", "0 0 * * * *")
+os.environ.setdefault("UPDATE_SEASONS_EPISODES_NCRON", "0 30 * * * *")
+
+import azure.functions as func  # noqa: E402
+
+from benchmarks.catalog import CatalogTVMazeAPI, SyntheticCatalog  # noqa: E402
+from benchmarks.fakes import FakeStorageService  # noqa: E402
+from tvbingefriend_show_sync.blueprints import bp_update  # noqa: E402
+from tvbingefriend_show_sync.config import SHOW_UPSERT_CONTAINER, TVMAZE_SHOWS_UPDATE_QUEUE  # noqa: E402
+from tvbingefriend_show_sync.services import update_service as update_service_module  # noqa: E402
+from tvbingefriend_show_sync.services.service_container import get_services  # noqa: E402
+
+
+def run(catalog: SyntheticCatalog, batch_size: int, dispatch_seconds: float, api_seconds: float) -> tuple[int, float]:
+    """Stage an update of every show in the catalog and consume the update queue
+
+    Args:
+        catalog (SyntheticCatalog): Shows to update
+        batch_size (int): QUEUE_MESSAGE_BATCH_SIZE to stage with
+        dispatch_seconds (float): Simulated host cost per message
+        api_seconds (float): Simulated TV Maze latency per call
+
+    Returns:
+        tuple[int, float]: Messages consumed and elapsed seconds, excluding time spent building API responses
+    """
+    update_service_module.QUEUE_MESSAGE_BATCH_SIZE = batch_size
+    storage = FakeStorageService(discard_containers=frozenset({SHOW_UPSERT_CONTAINER}))
+    tvmaze_api = CatalogTVMazeAPI(catalog, latency_seconds=api_seconds)
+
+    services = get_services()  # the function resolves its service from the shared container
+    services.reset()
+    services._instances.update(storage_service=storage, tvmaze_api=tvmaze_api)  # noqa: seeded with the fakes
+
+    services.update_service.stage_updates_for_upsert({str(show_id): catalog.updated for show_id in catalog})
+    bodies: list[str] = storage.queues.pop(TVMAZE_SHOWS_UPDATE_QUEUE, [])
+    consume = bp_update.get_show_update_details._function.get_user_function()  # noqa: the decorated function
+
+    start = time.perf_counter()
+    for message_id, body in enumerate(bodies):
+        if dispatch_seconds:
+            time.sleep(dispatch_seconds)
+        consume(func.QueueMessage(id=str(message_id), body=body.encode("utf-8")))
+    elapsed = time.perf_counter() - start - tvmaze_api.api_seconds
+
+    requeued = storage.queues.get(TVMAZE_SHOWS_UPDATE_QUEUE)
+    if requeued:
+        raise RuntimeError(f"{len(requeued)} shows were requeued; the run didn't process every show")
+    return len(bodies), elapsed
+
+
+def main() -> None:
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shows", type=int, default=10000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--dispatch-ms", type=float, default=0.0, help="Simulated host cost per message")
+    parser.add_argument("--api-ms", type=float, default=0.0, help="Simulated TV Maze latency per call")
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(args.shows)
+    print(f"{'batch size':>10} {'messages':>10} {'seconds':>10} {'shows/s':>10}")
+    for size in args.sizes:
+        messages, elapsed = run(catalog, size, args.dispatch_ms / 1000, args.api_ms / 1000)
+        print(f"{size:>10} {messages:>10} {elapsed:>10.2f} {len(catalog) / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
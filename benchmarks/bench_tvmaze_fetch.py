@@ -0,0 +1,92 @@
+"""Load-test the TV Maze fetch paths against the local fake server
+
+Starts the fake TV Maze server in-process and points the shared TV Maze client at it through
+TVMAZE_API_BASE_URL. Then fetches show index pages, show details with embedded seasons and episodes, and
+updates from concurrent workers, retrying transient errors as the services do. Reports calls/second, 429s and
+404s served, and transient retries, so throughput and backoff under rate limiting are reproducible. Run from the
+repository root:
+
+    python -m benchmarks.bench_tvmaze_fetch --shows 500 --workers 8 --rate-limit 20 --rate-window 10
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from benchmarks.catalog import SyntheticCatalog
+from benchmarks.fake_tvmaze_server import RateLimiter, start_server
+
+
+def fetch_all(label: str, calls: list[Callable[[], Any]], workers: int) -> tuple[float, int]:
+    """Run calls on a thread pool, retrying transient errors, and print the calls/second
+
+    Returns:
+        tuple[float, int]: Elapsed seconds and calls that failed after retries
+    """
+    from tvbingefriend_show_sync.errors import retry_transient  # after TVMAZE_API_BASE_URL is set
+
+    def call(index: int) -> bool:
+        try:
+            retry_transient(calls[index], label=f"bench_tvmaze_fetch.{label}({index})")
+            return True
+        except Exception:  # permanent errors (404s) and exhausted retries
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        failed = sum(not ok for ok in executor.map(call, range(len(calls))))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {len(calls):>8} {elapsed:>9.2f} {len(calls) / elapsed:>9.1f} {failed:>8}")
+    return elapsed, failed
+
+
+def main() -> None:
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shows", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--missing-fraction", type=float, default=0.01)
+    parser.add_argument("--rate-limit", type=int, default=20, help="Calls per window; 0 disables throttling")
+    parser.add_argument("--rate-window", type=float, default=10.0)
+    parser.add_argument("--retry-after", type=int, default=None, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(args.shows)
+    server = start_server(
+        catalog,
+        latency_seconds=args.latency_ms / 1000,
+        missing_fraction=args.missing_fraction,
+        rate_limiter=RateLimiter(args.rate_limit, args.rate_window),
+        retry_after=args.retry_after
+    )
+    os.environ["TVMAZE_API_BASE_URL"] = server.base_url
+    os.environ.setdefault("AzureWebJobsStorage", "UseDevelopmentStorage=true")
+    os.environ.setdefault("UPDATE_SHOWS_NCRON", "0 0 * * * *")
+    os.environ.setdefault("UPDATE_SEASONS_EPISODES_NCRON", "0 30 * * * *")
+
+    from tvbingefriend_show_sync.metrics import get_registry
+    from tvbingefriend_show_sync.services.service_container import ServiceContainer
+
+    tvmaze_api = ServiceContainer().tvmaze_api
+    pages = range(len(catalog) // 250 + 2)  # through the terminal 404 page
+    print(f"fake TV Maze at {server.base_url}: {len(catalog)} shows, {args.rate_limit} calls/{args.rate_window:g}s")
+    print(f"\n{'path':<20} {'calls':>8} {'seconds':>9} {'calls/s':>9} {'failed':>8}")
+    fetch_all("get_shows", [lambda page=page: tvmaze_api.get_shows(page) for page in pages], args.workers)
+    fetch_all(
+        "get_show_details",
+        [lambda show_id=show_id: tvmaze_api.get_show_details(show_id=show_id, embed=["seasons", "episodes"])
+         for show_id in catalog],
+        args.workers
+    )
+    fetch_all("get_show_updates", [lambda: tvmaze_api.get_show_updates(period="day")], args.workers)
+
+    counters = get_registry().snapshot()["counters"]
+    print(f"\nserver: {dict(server.stats)}")
+    print(f"transient retries: {counters.get('transient_retries', 0)}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Synthetic TV Maze catalog of configurable scale for the replay benchmarks
+
+Shows, seasons, and episodes are shaped like TV Maze API responses and generated on demand from a seed, so a
+full-size catalog (about 70,000 shows, 250,000 seasons, and 2,000,000 episodes) costs only its per-season
+episode counts in memory. Season counts per show follow a Pareto distribution and episode counts per season a
+log-normal one, giving the long tail of soaps and daily shows with thousands of episodes that a real crawl has.
+"""
+import math
+import random
+import time
+from array import array
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+from benchmarks.fakes import FakeTVMazeAPI
+
+FULL_SHOWS = 70_000
+FULL_SEASONS = 250_000
+FULL_EPISODES = 2_000_000
+
+MAX_SEASONS_PER_SHOW = 100
+MAX_EPISODES_PER_SEASON = 1_000
+EPISODE_SIGMA = 1.0  # log-normal spread of episodes per season
+
+GENRES = ("Drama", "Comedy", "Crime", "Action", "Science-Fiction", "Thriller", "Romance", "Family", "Anime")
+NETWORKS = (
+    (1, "NBC", "US", "America/New_York"),
+    (2, "CBS", "US", "America/New_York"),
+    (3, "ABC", "US", "America/New_York"),
+    (12, "BBC One", "GB", "Europe/London"),
+    (47, "NHK", "JP", "Asia/Tokyo")
+)
+WEB_CHANNELS = ((1, "Netflix"), (2, "Hulu"), (3, "Prime Video"))
+SUMMARY = "<p>A synthetic show generated for benchmarking. " + "It has a plot. " * 20 + "</p>"
+
+
+class SyntheticCatalog(Mapping[int, dict[str, Any]]):
+    """Seeded catalog of shows keyed by show ID, with seasons and episodes embedded on request"""
+    def __init__(
+        self,
+        shows: int,
+        seasons: int | None = None,
+        episodes: int | None = None,
+        seed: int = 42,
+        updated: int | None = None
+    ) -> None:
+        """Plan a catalog whose totals approximate the targets
+
+        Args:
+            shows (int): Number of shows, with IDs 1 to shows
+            seasons (int | None): Target total seasons. Defaults to the full catalog's ratio.
+            episodes (int | None): Target total episodes. Defaults to the full catalog's ratio.
+            seed (int): Random seed; the same arguments always give the same catalog
+            updated (int | None): Latest 'updated' epoch. Defaults to now.
+        """
+        self.show_count = shows
+        self.seed = seed
+        self.updated = updated or int(time.time())
+        seasons = seasons or round(shows * FULL_SEASONS / FULL_SHOWS)
+        episodes = episodes or round(shows * FULL_EPISODES / FULL_SHOWS)
+
+        seasons_mean = max(seasons / shows, 1.01)
+        alpha = seasons_mean / (seasons_mean - 1)  # Pareto(alpha) with minimum 1 has this mean
+        mu = math.log(max(episodes / seasons, 1.0)) - EPISODE_SIGMA ** 2 / 2  # log-normal with this mean
+
+        rng = random.Random(seed)  # draws are scaled to the targets, which the caps and rounding would miss
+        season_draws = [min(rng.paretovariate(alpha), MAX_SEASONS_PER_SHOW) for _ in range(shows)]
+        scale = seasons / sum(season_draws)
+        show_seasons = [min(max(round(draw * scale), 1), MAX_SEASONS_PER_SHOW) for draw in season_draws]
+        episode_draws = [
+            min(rng.lognormvariate(mu, EPISODE_SIGMA), MAX_EPISODES_PER_SEASON) for _ in range(sum(show_seasons))
+        ]
+        scale = episodes / sum(episode_draws)
+
+        self._episode_counts = array(  # episodes of each season, in show order
+            "I", (min(max(round(draw * scale), 1), MAX_EPISODES_PER_SEASON) for draw in episode_draws)
+        )
+        self._season_offsets = array("q", [0])  # index into _episode_counts of each show's first season
+        self._episode_offsets = array("q", [0])  # ID offset of each show's first episode
+        for count in show_seasons:
+            first = self._season_offsets[-1]
+            self._season_offsets.append(first + count)
+            self._episode_offsets.append(self._episode_offsets[-1] + sum(self._episode_counts[first:first + count]))
+
+    @property
+    def season_total(self) -> int:
+        """Total seasons in the catalog"""
+        return self._season_offsets[-1]
+
+    @property
+    def episode_total(self) -> int:
+        """Total episodes in the catalog"""
+        return self._episode_offsets[-1]
+
+    def season_count(self, show_id: int) -> int:
+        """Get the number of seasons of a show"""
+        return self._season_offsets[show_id] - self._season_offsets[show_id - 1]
+
+    def episode_count(self, show_id: int) -> int:
+        """Get the number of episodes of a show"""
+        return self._episode_offsets[show_id] - self._episode_offsets[show_id - 1]
+
+    def __getitem__(self, show_id: int) -> dict[str, Any]:
+        """Get a show without embedded seasons and episodes"""
+        if not 1 <= show_id <= self.show_count:
+            raise KeyError(show_id)
+        return self.build_show(show_id)
+
+    def __contains__(self, show_id: object) -> bool:
+        return isinstance(show_id, int) and 1 <= show_id <= self.show_count
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(1, self.show_count + 1))
+
+    def __len__(self) -> int:
+        return self.show_count
+
+    def build_show(self, show_id: int) -> dict[str, Any]:
+        """Build a show as returned by /shows/:id"""
+        rng = random.Random(self.seed * 1_000_003 + show_id)
+        network_id, network_name, country, timezone = rng.choice(NETWORKS)
+        streaming = rng.random() < 0.3
+        channel_id, channel_name = rng.choice(WEB_CHANNELS)
+        premiered = f"{rng.randint(1950, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        return {
+            "id": show_id,
+            "url": f"https://www.tvmaze.com/shows/{show_id}/synthetic-show-{show_id}",
+            "name": f"Synthetic Show {show_id}",
+            "type": rng.choice(("Scripted", "Reality", "Animation", "Documentary", "Talk Show")),
+            "language": rng.choice(("English", "Japanese", "Spanish", "German")),
+            "genres": rng.sample(GENRES, rng.randint(0, 3)),
+            "status": rng.choice(("Running", "Ended", "To Be Determined")),
+            "runtime": rng.choice((30, 60, None)),
+            "averageRuntime": rng.choice((22, 30, 44, 60)),
+            "premiered": premiered,
+            "ended": None,
+            "officialSite": f"https://example.com/shows/{show_id}",
+            "schedule": {"time": "21:00", "days": [rng.choice(("Monday", "Tuesday", "Sunday"))]},
+            "rating": {"average": round(rng.uniform(4, 9.5), 1) if rng.random() < 0.6 else None},
+            "weight": rng.randint(0, 100),
+            "network": None if streaming else {
+                "id": network_id,
+                "name": network_name,
+                "country": {"name": country, "code": country, "timezone": timezone},
+                "officialSite": None
+            },
+            "webChannel": {"id": channel_id, "name": channel_name, "country": None, "officialSite": None}
+            if streaming else None,
+            "dvdCountry": None,
+            "externals": {"tvrage": None, "thetvdb": show_id + 70_000, "imdb": f"tt{show_id:07d}"},
+            "image": {
+                "medium": f"https://static.tvmaze.com/uploads/images/medium_portrait/{show_id}.jpg",
+                "original": f"https://static.tvmaze.com/uploads/images/original_untouched/{show_id}.jpg"
+            },
+            "summary": SUMMARY,
+            "updated": self.updated - rng.randint(0, 10 * 365 * 86400),
+            "_links": {"self": {"href": f"https://api.tvmaze.com/shows/{show_id}"}}
+        }
+
+    def build_embedded(self, show_id: int) -> dict[str, list[dict[str, Any]]]:
+        """Build the seasons and episodes embedded by /shows/:id?embed[]=seasons&embed[]=episodes"""
+        first_season = self._season_offsets[show_id - 1]
+        episode_id = self._episode_offsets[show_id - 1]
+        seasons: list[dict[str, Any]] = []
+        episodes: list[dict[str, Any]] = []
+        for number in range(1, self.season_count(show_id) + 1):
+            season_id = first_season + number
+            year = 1990 + season_id % 35
+            seasons.append({
+                "id": season_id,
+                "url": f"https://www.tvmaze.com/seasons/{season_id}/synthetic-show-{show_id}-season-{number}",
+                "number": number,
+                "name": "",
+                "episodeOrder": self._episode_counts[season_id - 1],
+                "premiereDate": f"{year}-09-01",
+                "endDate": f"{year + 1}-05-31",
+                "network": None,
+                "webChannel": None,
+                "image": None,
+                "summary": None,
+                "_links": {"self": {"href": f"https://api.tvmaze.com/seasons/{season_id}"}}
+            })
+            for episode_number in range(1, self._episode_counts[season_id - 1] + 1):
+                episode_id += 1
+                episodes.append({
+                    "id": episode_id,
+                    "url": f"https://www.tvmaze.com/episodes/{episode_id}/synthetic-show-{show_id}-{number}x"
+                           f"{episode_number}",
+                    "name": f"Episode {episode_number}",
+                    "season": number,
+                    "number": episode_number,
+                    "type": "regular",
+                    "airdate": f"{year}-{episode_number % 12 + 1:02d}-{episode_number % 28 + 1:02d}",
+                    "airtime": "21:00",
+                    "airstamp": f"{year}-{episode_number % 12 + 1:02d}-{episode_number % 28 + 1:02d}T01:00:00+00:00",
+                    "runtime": 30,
+                    "rating": {"average": None},
+                    "image": None,
+                    "summary": "<p>Something happens.</p>",
+                    "_links": {"self": {"href": f"https://api.tvmaze.com/episodes/{episode_id}"}}
+                })
+        return {"seasons": seasons, "episodes": episodes}
+
+    def updates(self, fraction: float) -> dict[str, int]:
+        """Get a seeded sample of shows as returned by /updates/shows
+
+        Args:
+            fraction (float): Share of the catalog updated in the period
+
+        Returns:
+            dict[str, int]: Updated epoch keyed by show ID string
+        """
+        rng = random.Random(self.seed + 1)
+        sample = sorted(rng.sample(range(1, self.show_count + 1), round(self.show_count * fraction)))
+        return {str(show_id): self.updated - rng.randint(0, 86400) for show_id in sample}
+
+
+class CatalogTVMazeAPI(FakeTVMazeAPI):
+    """Serves a synthetic catalog, building embedded seasons and episodes only when requested
+
+    Time spent building responses is summed in api_seconds so replays can report it apart from the services.
+    """
+    def __init__(self, catalog: SyntheticCatalog, update_fraction: float = 0.05, latency_seconds: float = 0.0):
+        super().__init__(catalog, latency_seconds)  # noqa: the catalog is a read-only mapping of shows
+        self.catalog = catalog
+        self.update_fraction = update_fraction
+        self.api_seconds = 0.0
+
+    def get_show_details(self, show_id: int, embed: list[str] | None = None) -> dict[str, Any] | None:
+        """Get one show, with embedded seasons/episodes when requested"""
+        self._wait("get_show_details")
+        start = time.perf_counter()
+        show = self.catalog.get(int(show_id))
+        if show is not None and embed:
+            show["_embedded"] = self.catalog.build_embedded(int(show_id))
+        self.api_seconds += time.perf_counter() - start
+        return show
+
+    def get_shows(self, page: int) -> list[dict[str, Any]] | None:
+        """Get one page of 250 shows by ID range"""
+        self._wait("get_shows")
+        start = time.perf_counter()
+        page_shows = [self.catalog.build_show(show_id) for show_id in range(page * 250, (page + 1) * 250)
+                      if 1 <= show_id <= self.catalog.show_count]
+        self.api_seconds += time.perf_counter() - start
+        return page_shows or None
+
+    def get_show_updates(self, period: str = "day") -> dict[str, int]:
+        """Get the shows updated in the period"""
+        self._wait("get_show_updates")
+        return self.catalog.updates(self.update_fraction)
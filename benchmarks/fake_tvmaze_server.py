@@ -0,0 +1,233 @@
+"""Local fake TV Maze API serving a synthetic catalog, with latency, 404s, and rate limiting
+
+Serves the endpoints the sync uses, shaped like TV Maze's:
+
+    GET /shows?page=N                         250 shows per page by ID range; 404 past the last page
+    GET /shows/:id[?embed[]=seasons&embed[]=episodes]
+    GET /shows/:id/seasons, /shows/:id/episodes
+    GET /updates/shows[?since=day|week|month]
+    GET /_stats                               request, 404, and 429 counts of this server
+
+Like TV Maze, each client address may make --rate-limit calls per --rate-window seconds and gets a 429 after
+that. A share of show IDs (--missing-fraction) answers 404, as deleted shows do. Point the function app or a
+benchmark at it with TVMAZE_API_BASE_URL. Run from the repository root:
+
+    python -m benchmarks.fake_tvmaze_server --shows 2000 --port 8765 --latency-ms 50 --rate-limit 20
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.catalog import SyntheticCatalog
+
+SHOWS_PER_PAGE = 250
+UPDATE_FRACTIONS = {"day": 0.01, "week": 0.05, "month": 0.2}  # share of the catalog updated per period
+
+
+class RateLimiter:
+    """Sliding-window call limit per client address"""
+    def __init__(self, limit: int, window_seconds: float) -> None:
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._calls: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, client: str) -> bool:
+        """Count a call, returning False if the client is over its limit"""
+        if self.limit <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            calls = self._calls.setdefault(client, deque())
+            while calls and calls[0] <= now - self.window_seconds:
+                calls.popleft()
+            if len(calls) >= self.limit:
+                return False
+            calls.append(now)
+            return True
+
+
+class FakeTVMazeServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the catalog and the behavior settings"""
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        catalog: SyntheticCatalog,
+        latency_seconds: float = 0.0,
+        jitter_seconds: float = 0.0,
+        missing_fraction: float = 0.0,
+        rate_limiter: RateLimiter | None = None,
+        retry_after: int | None = None
+    ) -> None:
+        super().__init__(address, FakeTVMazeHandler)
+        self.catalog = catalog
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.rate_limiter = rate_limiter or RateLimiter(0, 0)
+        self.retry_after = retry_after
+        self.missing: frozenset[int] = frozenset(
+            random.Random(catalog.seed + 2).sample(range(1, len(catalog) + 1), round(len(catalog) * missing_fraction))
+        )
+        self.stats: Counter[str] = Counter()
+        self._stats_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """URL to set as TVMAZE_API_BASE_URL"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str) -> None:
+        """Add one to a server statistic"""
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def get_show(self, show_id: int, embed: list[str]) -> dict[str, Any] | None:
+        """Get a show as TV Maze serves it, or None if it doesn't exist"""
+        if show_id in self.missing or show_id not in self.catalog:
+            return None
+        show = self.catalog.build_show(show_id)
+        if embed:
+            embedded = self.catalog.build_embedded(show_id)
+            show["_embedded"] = {key: value for key, value in embedded.items() if key in embed}
+        return show
+
+
+class FakeTVMazeHandler(BaseHTTPRequestHandler):
+    """Routes TV Maze API requests to the server's catalog"""
+    server: FakeTVMazeServer
+
+    def do_GET(self) -> None:  # noqa: N802 (BaseHTTPRequestHandler naming)
+        """Serve a GET request"""
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ["_stats"]:
+            self.send_json(200, dict(self.server.stats))
+            return
+
+        self.server.count("requests")
+        if not self.server.rate_limiter.allow(self.client_address[0]):
+            self.server.count("throttled")
+            headers = {"Retry-After": str(self.server.retry_after)} if self.server.retry_after else {}
+            self.send_json(429, {"name": "Too Many Requests", "status": 429}, headers)
+            return
+
+        delay = self.server.latency_seconds + random.uniform(0, self.server.jitter_seconds)
+        if delay:
+            time.sleep(delay)
+
+        body = self.route(parts, query)
+        if body is None:
+            self.server.count("not_found")
+            self.send_json(404, {"name": "Not Found", "message": "", "code": 0, "status": 404})
+        else:
+            self.send_json(200, body)
+
+    def route(self, parts: list[str], query: dict[str, list[str]]) -> Any:
+        """Get the response body for a path, or None for a 404"""
+        catalog = self.server.catalog
+        try:
+            if parts == ["shows"]:
+                page = int(query.get("page", ["0"])[0])
+                shows = [
+                    catalog.build_show(show_id)
+                    for show_id in range(page * SHOWS_PER_PAGE, (page + 1) * SHOWS_PER_PAGE)
+                    if show_id in catalog and show_id not in self.server.missing
+                ]
+                return shows or None
+            if len(parts) == 2 and parts[0] == "shows":
+                return self.server.get_show(int(parts[1]), query.get("embed[]", []) + query.get("embed", []))
+            if len(parts) == 3 and parts[0] == "shows" and parts[2] in ("seasons", "episodes"):
+                show = self.server.get_show(int(parts[1]), [parts[2]])
+                return show["_embedded"][parts[2]] if show else None
+            if parts == ["updates", "shows"]:
+                fraction = UPDATE_FRACTIONS.get(query.get("since", [""])[0], 1.0)
+                return catalog.updates(fraction)
+        except ValueError:  # non-numeric page or show ID
+            return None
+        return None
+
+    def send_json(self, status: int, body: Any, headers: dict[str, str] | None = None) -> None:
+        """Send a JSON response"""
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 (BaseHTTPRequestHandler signature)
+        """Keep request logs off stderr; /_stats has the counts"""
+
+
+def start_server(
+    catalog: SyntheticCatalog,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    **settings: Any
+) -> FakeTVMazeServer:
+    """Start a fake TV Maze server on a background thread
+
+    Args:
+        catalog (SyntheticCatalog): Catalog to serve
+        host (str): Address to bind
+        port (int): Port to bind; 0 picks a free port
+        **settings (Any): FakeTVMazeServer settings (latency_seconds, missing_fraction, rate_limiter, ...)
+
+    Returns:
+        FakeTVMazeServer: Running server; call shutdown() to stop it
+    """
+    server = FakeTVMazeServer((host, port), catalog, **settings)
+    threading.Thread(target=server.serve_forever, name="fake-tvmaze", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    """Run the server until interrupted"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shows", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra delay, up to this much")
+    parser.add_argument("--missing-fraction", type=float, default=0.0, help="Share of show IDs that answer 404")
+    parser.add_argument("--rate-limit", type=int, default=20, help="Calls per window per client; 0 disables")
+    parser.add_argument("--rate-window", type=float, default=10.0, help="Rate limit window in seconds")
+    parser.add_argument("--retry-after", type=int, default=None, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(args.shows, seed=args.seed)
+    server = FakeTVMazeServer(
+        (args.host, args.port),
+        catalog,
+        latency_seconds=args.latency_ms / 1000,
+        jitter_seconds=args.jitter_ms / 1000,
+        missing_fraction=args.missing_fraction,
+        rate_limiter=RateLimiter(args.rate_limit, args.rate_window),
+        retry_after=args.retry_after
+    )
+    print(f"Serving {len(catalog)} shows at {server.base_url} (TVMAZE_API_BASE_URL={server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"stats: {dict(server.stats)}")
+
+
+if __name__ == "__main__":
+    main()
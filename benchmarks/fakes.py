@@ -0,0 +1,140 @@
+"""In-memory stand-ins for Azure Storage and the TV Maze API used by the benchmarks"""
+import json
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+
+class FakeStorageService:
+    """Records storage operations in memory instead of calling Azure Storage
+
+    Blobs uploaded to a container in discard_containers are counted and measured but not kept, so catalog-scale
+    replays don't hold millions of staged payloads. Their content counts as applied at once; a kept blob's content
+    counts as applied once it is popped, as a blob trigger records it in the applied-blobs ledger.
+    """
+    def __init__(self, discard_containers: frozenset[str] = frozenset()) -> None:
+        self.connection_string = "fake"
+        self.discard_containers = discard_containers
+        self.blobs: dict[tuple[str, str], bytes] = {}
+        self.applied_hashes: dict[tuple[str, str], str] = {}  # content hash applied per blob, as in the ledger
+        self.pending_hashes: dict[tuple[str, str], str] = {}  # content hash of each kept blob, until it is popped
+        self.queues: dict[str, list[str]] = {}
+        self.tables: dict[str, dict[tuple[str, str], dict[str, Any]]] = {}
+        self.op_counts: Counter[str] = Counter()
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def upload_blob_data(
+        self,
+        container_name: str,
+        blob_name: str,
+        data: str | bytes | dict | list,
+        overwrite: bool = True,
+        skip_unchanged: bool = False,
+        metadata: dict[str, str] | None = None
+    ) -> bool:
+        """Store a blob, or skip it if skip_unchanged and the same content was already applied"""
+        from tvbingefriend_show_sync.services.storage_service import content_hash  # needs the app's settings
+
+        payload = json.dumps(data) if isinstance(data, (dict, list)) else data
+        payload = payload.encode() if isinstance(payload, str) else payload
+        digest = content_hash(payload)
+        with self._lock:
+            if skip_unchanged and self.applied_hashes.get((container_name, blob_name)) == digest:
+                self.op_counts["blob.upload_skipped"] += 1
+                return False
+            self.op_counts["blob.upload"] += 1
+            self.bytes_written += len(payload)
+            if container_name in self.discard_containers:
+                self.applied_hashes[(container_name, blob_name)] = digest
+            else:
+                self.blobs[(container_name, blob_name)] = payload
+                self.pending_hashes[(container_name, blob_name)] = digest
+        return True
+
+    def pop_blobs(self, container_name: str) -> list[tuple[str, Any]]:
+        """Remove and decode every blob in a container, as the blob trigger would read them"""
+        with self._lock:
+            keys = [key for key in self.blobs if key[0] == container_name]
+            payloads = [(key[1], self.blobs.pop(key)) for key in keys]
+            for key in keys:
+                self.applied_hashes[key] = self.pending_hashes.pop(key)
+        return [(blob_name, json.loads(payload)) for blob_name, payload in payloads]
+
+    def upload_queue_message(self, queue_name: str, message: str | bytes | dict[str, Any]) -> None:
+        """Append a message to a queue"""
+        with self._lock:
+            self.op_counts["queue.send"] += 1
+            self.queues.setdefault(queue_name, []).append(
+                json.dumps(message) if isinstance(message, dict) else message
+            )
+
+    def get_entity(self, table_name: str, partition_key: str, row_key: str) -> dict[str, Any] | None:
+        """Get one table entity"""
+        with self._lock:
+            self.op_counts["table.get"] += 1
+            return self.tables.get(table_name, {}).get((partition_key, row_key))
+
+    def get_entities(self, table_name: str, filter_query: str | None = None) -> list[dict[str, Any]]:
+        """List all entities of a table (filters are ignored)"""
+        with self._lock:
+            self.op_counts["table.query"] += 1
+            return list(self.tables.get(table_name, {}).values())
+
+    def upsert_entity(self, table_name: str, entity: dict[str, Any]) -> None:
+        """Insert or replace a table entity"""
+        with self._lock:
+            self.op_counts["table.upsert"] += 1
+            self.tables.setdefault(table_name, {})[(entity["PartitionKey"], entity["RowKey"])] = dict(entity)
+
+    def delete_entities_batch(self, table_name: str, entities: list[dict[str, Any]]) -> None:
+        """Delete table entities"""
+        with self._lock:
+            self.op_counts["table.delete_batch"] += 1
+            for entity in entities:
+                self.tables.get(table_name, {}).pop((entity["PartitionKey"], entity["RowKey"]), None)
+
+    def drain_queue(self, queue_name: str) -> list[dict[str, Any]]:
+        """Remove and decode every message in a queue"""
+        with self._lock:
+            messages = self.queues.pop(queue_name, [])
+        return [json.loads(message) for message in messages]
+
+
+class FakeTVMazeAPI:
+    """Serves canned TV Maze responses with a simulated round-trip latency"""
+    def __init__(self, shows: dict[int, dict[str, Any]] | None = None, latency_seconds: float = 0.0) -> None:
+        self.shows = shows or {}
+        self.latency_seconds = latency_seconds
+        self.calls: Counter[str] = Counter()
+
+    def _wait(self, call: str) -> None:
+        self.calls[call] += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def get_show_details(self, show_id: int, embed: list[str] | None = None) -> dict[str, Any] | None:
+        """Get one show, with embedded seasons/episodes when requested"""
+        self._wait("get_show_details")
+        show = self.shows.get(int(show_id))
+        if show is None:
+            return None
+        if embed:
+            return show
+        return {key: value for key, value in show.items() if key != "_embedded"}
+
+    def get_shows(self, page: int) -> list[dict[str, Any]] | None:
+        """Get one page of 250 shows by ID range"""
+        self._wait("get_shows")
+        page_shows = []
+        for show_id in range(page * 250, (page + 1) * 250):
+            show = self.shows.get(show_id)
+            if show is not None:
+                page_shows.append({key: value for key, value in show.items() if key != "_embedded"})
+        return page_shows or None
+
+    def get_show_updates(self, period: str = "day") -> dict[str, int]:
+        """Get the updated epoch of every show"""
+        self._wait("get_show_updates")
+        return {str(show_id): show.get("updated", 0) for show_id, show in self.shows.items()}
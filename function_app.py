@@ -2,14 +2,21 @@
 import azure.functions as func
 
 from tvbingefriend_show_sync.blueprints.bp_episodes import bp as bp_episodes
+from tvbingefriend_show_sync.blueprints.bp_maintenance import bp as bp_maintenance
+from tvbingefriend_show_sync.blueprints.bp_metrics import bp as bp_metrics
 from tvbingefriend_show_sync.blueprints.bp_seasons import bp as bp_seasons
 from tvbingefriend_show_sync.blueprints.bp_seasons_episodes import bp as bp_seasons_episodes
 from tvbingefriend_show_sync.blueprints.bp_shows import bp as bp_shows
 from tvbingefriend_show_sync.blueprints.bp_update import bp as bp_update
+from tvbingefriend_show_sync.log_levels import configure_log_levels
+
+configure_log_levels()
 
 app = func.FunctionApp()
 
 app.register_blueprint(bp_episodes)
+app.register_blueprint(bp_maintenance)
+app.register_blueprint(bp_metrics)
 app.register_blueprint(bp_seasons)
 app.register_blueprint(bp_seasons_episodes)
 app.register_blueprint(bp_shows)
@@ -0,0 +1,352 @@
+"""Standalone multi-process backfill of shows, seasons, and episodes.
+
+Runs the initial ingest in-process instead of through the Functions host's queues and blobs, to seed or
+rebuild a database at full machine speed. Worker processes fetch from TV Maze, transform the payloads, and
+bulk-upsert them through their own database engines, one transaction per show page or batch of shows. Uses the
+function app's settings (SQLALCHEMY_CONNECTION_STRING, TVMAZE_API_BASE_URL, retry settings, ...) from the
+environment. Run from the repository root:
+
+    python -m tvbingefriend_show_sync.backfill --workers 8
+    python -m tvbingefriend_show_sync.backfill --stage seasons_episodes --missing-only
+    python -m tvbingefriend_show_sync.backfill --workers 8 --bulk-load /tmp/tvmaze-load
+    python -m tvbingefriend_show_sync.backfill --stage seasons_episodes --prune
+
+With --bulk-load DIR, workers write tab-separated load files to DIR instead of upserting, and once every stage
+has fetched, the files are loaded with LOAD DATA LOCAL INFILE and merged (see repositories/bulk_load.py). This is
+the fastest path into a cold database.
+
+With --prune, each batch holds every season and episode of its shows, so stored seasons and episodes TV Maze no
+longer lists for those shows are deleted (see repositories/staging_merge.py). It can't be combined with
+--bulk-load.
+
+TV Maze rate limits each client address, so more workers mostly means more 429s once the limit is reached;
+those are retried with backoff like any transient error.
+"""
+import argparse
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from pathlib import Path
+from typing import Any, TYPE_CHECKING
+
+from tvbingefriend_show_sync.log_levels import configure_log_levels
+from tvbingefriend_show_sync.services.group_commit_writer import EPISODE, SEASON, SHOW
+from tvbingefriend_show_sync.services.queue_batch import chunk
+from tvbingefriend_show_sync.utils import db_session_manager
+
+if TYPE_CHECKING:
+    from tvbingefriend_tvmaze_client.tvmaze_api import TVMazeAPI
+
+logger = logging.getLogger(__name__)
+
+SHOWS = "shows"
+SEASONS_EPISODES = "seasons_episodes"
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+_worker_state: dict[str, Any] = {}  # per worker process: TV Maze client, repositories, and options
+
+
+def init_worker(log_levels: str, load_directory: str | None = None, prune_missing: bool = False) -> None:
+    """Set up a worker process: logging, and the TV Maze client and repositories it reuses for every task
+
+    Args:
+        log_levels (str): LOG_LEVELS-style levels to apply in the worker
+        load_directory (str | None): Directory to write load files to instead of upserting
+        prune_missing (bool): Whether to delete a show's stored seasons and episodes missing from its batch
+    """
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    configure_log_levels(log_levels)
+
+    from tvbingefriend_show_sync.repositories.episode_repo import EpisodeRepository
+    from tvbingefriend_show_sync.repositories.season_repo import SeasonRepository
+    from tvbingefriend_show_sync.repositories.show_repo import ShowRepository
+    from tvbingefriend_show_sync.services.service_container import get_services
+
+    _worker_state.update(
+        tvmaze_api=get_services().tvmaze_api,  # honors TVMAZE_API_BASE_URL
+        show_repository=ShowRepository(),
+        season_repository=SeasonRepository(),
+        episode_repository=EpisodeRepository(),
+        load_directory=load_directory,
+        prune_missing=prune_missing
+    )
+
+
+def _get_tvmaze_api() -> "TVMazeAPI":
+    """Get the worker's TV Maze client"""
+    return _worker_state["tvmaze_api"]
+
+
+def backfill_show_page(page: int) -> tuple[int, list[int]]:
+    """Fetch one page of the show index and upsert its shows, or write them to a load file
+
+    Args:
+        page (int): Page number
+
+    Returns:
+        tuple[int, list[int]]: The page number, and the IDs of its shows (empty past the last page)
+    """
+    from tvbingefriend_show_sync.errors import get_http_status, retry_db_transaction, retry_transient
+
+    try:
+        shows: list[dict[str, Any]] | None = retry_transient(
+            lambda: _get_tvmaze_api().get_shows(page), label=f"backfill_show_page({page})"
+        )
+    except Exception as e:
+        if get_http_status(e) == 404:  # TV Maze returns 404 past the last page
+            return page, []
+        raise
+
+    if not shows:
+        return page, []
+
+    if _worker_state["load_directory"]:
+        from tvbingefriend_show_sync.repositories.bulk_load import write_load_file
+        write_load_file(SHOW, shows, Path(_worker_state["load_directory"]) / f"{SHOW}-{page:06d}.tsv")
+        return page, [show["id"] for show in shows if show.get("id")]
+
+    def write() -> None:
+        with db_session_manager() as db:
+            _worker_state["show_repository"].upsert_shows(shows, db)
+
+    retry_db_transaction(write, label=f"backfill_show_page({page})")
+    return page, [show["id"] for show in shows if show.get("id")]
+
+
+def backfill_seasons_episodes(show_ids: list[int]) -> dict[str, Any]:
+    """Fetch the seasons and episodes of a batch of shows and upsert them in one transaction, or write load files
+
+    Shows that fail permanently (e.g. a 404 for a deleted show) or exhaust their retries are reported rather
+    than failing the batch.
+
+    Args:
+        show_ids (list[int]): Show IDs
+
+    Returns:
+        dict[str, Any]: {'shows': int, 'seasons': int, 'episodes': int, 'failed': list[int]}
+    """
+    from tvbingefriend_show_sync.errors import retry_db_transaction, retry_transient
+
+    seasons: list[dict[str, Any]] = []
+    episodes: list[dict[str, Any]] = []
+    failed: list[int] = []
+    for show_id in show_ids:
+        try:
+            show_data: dict[str, Any] | None = retry_transient(
+                lambda: _get_tvmaze_api().get_show_details(show_id=show_id, embed=["seasons", "episodes"]),
+                label=f"backfill_seasons_episodes({show_id})"
+            )
+        except Exception as e:
+            logger.warning("backfill_seasons_episodes: Skipping show %s: %s", show_id, e)
+            failed.append(show_id)
+            continue
+
+        embedded: dict[str, Any] = (show_data or {}).get("_embedded", {})
+        seasons += [{"show_id": show_id, "season": season} for season in embedded.get("seasons", [])]
+        episodes += [{"show_id": show_id, "episode": episode} for episode in embedded.get("episodes", [])]
+
+    counts: dict[str, Any] = {
+        "shows": len(show_ids) - len(failed), "seasons": len(seasons), "episodes": len(episodes), "failed": failed
+    }
+    if _worker_state["load_directory"]:
+        from tvbingefriend_show_sync.repositories.bulk_load import write_load_file
+        directory = Path(_worker_state["load_directory"])
+        write_load_file(SEASON, seasons, directory / f"{SEASON}-{show_ids[0]:08d}.tsv")
+        write_load_file(EPISODE, episodes, directory / f"{EPISODE}-{show_ids[0]:08d}.tsv")
+        return counts
+
+    def write() -> None:
+        with db_session_manager() as db:
+            _worker_state["show_repository"].insert_show_stubs(set(show_ids) - set(failed), db)
+            if seasons:
+                _worker_state["season_repository"].upsert_seasons(seasons, db, _worker_state["prune_missing"])
+            if episodes:
+                _worker_state["episode_repository"].upsert_episodes(episodes, db, _worker_state["prune_missing"])
+
+    retry_db_transaction(write, label=f"backfill_seasons_episodes({show_ids[0]}..{show_ids[-1]})")
+    return counts
+
+
+class Progress:
+    """Prints running totals and rates for a stage at most every PROGRESS_INTERVAL_SECONDS"""
+    def __init__(self, stage: str, total: int | None = None) -> None:
+        self.stage = stage
+        self.total = total
+        self.counts: dict[str, int] = {}
+        self.start = time.monotonic()
+        self._last_print = 0.0
+
+    def add(self, **counts: int) -> None:
+        """Add to the stage's counts, printing a progress line if one is due"""
+        for name, count in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + count
+        if time.monotonic() - self._last_print >= PROGRESS_INTERVAL_SECONDS:
+            self.print()
+
+    def print(self, final: bool = False) -> None:
+        """Print the stage's counts, rates, and elapsed time"""
+        self._last_print = time.monotonic()
+        elapsed = max(self._last_print - self.start, 1e-9)
+        of_total = f" of {self.total}" if self.total else ""
+        rates = ", ".join(f"{name} {count}{of_total if name == 'shows' else ''} ({count / elapsed:.0f}/s)"
+                          for name, count in self.counts.items())
+        print(f"[{self.stage}]{' done:' if final else ''} {rates or 'nothing yet'} in {elapsed:.0f}s", flush=True)
+
+
+def run_shows(executor: ProcessPoolExecutor, start_page: int, window: int) -> tuple[list[int], list[int]]:
+    """Backfill the show index, keeping `window` pages in flight until the first page past the end
+
+    Returns:
+        tuple[list[int], list[int]]: IDs of the shows upserted, and pages that failed
+    """
+    progress = Progress(SHOWS)
+    show_ids: list[int] = []
+    failed_pages: list[int] = []
+    last_page: int | None = None  # first empty page seen
+    next_page = start_page
+    in_flight: dict[Future, int] = {}
+
+    while True:
+        while len(in_flight) < window and (last_page is None or next_page < last_page):
+            in_flight[executor.submit(backfill_show_page, next_page)] = next_page
+            next_page += 1
+        if not in_flight:
+            break
+
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            page = in_flight.pop(future)
+            try:
+                _, page_show_ids = future.result()
+            except Exception as e:
+                logger.error("run_shows: Page %s failed: %s", page, e)
+                failed_pages.append(page)
+                continue
+            if not page_show_ids:
+                last_page = page if last_page is None else min(last_page, page)
+                continue
+            show_ids += page_show_ids
+            progress.add(shows=len(page_show_ids), pages=1)
+
+    progress.print(final=True)
+    return sorted(show_ids), sorted(failed_pages)
+
+
+def run_seasons_episodes(executor: ProcessPoolExecutor, show_ids: list[int], batch_size: int) -> list[int]:
+    """Backfill the seasons and episodes of every show, batch_size shows per task
+
+    Returns:
+        list[int]: IDs of the shows that failed
+    """
+    progress = Progress(SEASONS_EPISODES, total=len(show_ids))
+    futures = {executor.submit(backfill_seasons_episodes, batch): batch for batch in chunk(show_ids, batch_size)}
+    failed: list[int] = []
+    for future in as_completed(futures):
+        try:
+            counts = future.result()
+        except Exception as e:
+            logger.error("run_seasons_episodes: Batch of %s shows failed: %s", len(futures[future]), e)
+            failed += futures[future]
+            continue
+        failed += counts.pop("failed")
+        progress.add(**counts)
+
+    progress.print(final=True)
+    return sorted(failed)
+
+
+def get_stored_show_ids(missing_only: bool) -> list[int]:
+    """Get the IDs of stored shows, or only those with no stored seasons or episodes"""
+    from tvbingefriend_show_sync.repositories.show_repo import ShowRepository
+
+    show_repository = ShowRepository()
+    with db_session_manager() as db:
+        if missing_only:
+            show_ids = show_repository.get_show_ids_missing_seasons_episodes(db)
+        else:
+            show_ids = show_repository.get_all_show_ids(db)
+    if show_ids is None:
+        raise RuntimeError("Could not read show IDs from the database")
+    return sorted(show_ids)
+
+
+def load_directory(directory: str) -> None:
+    """Load and merge every load file written by the workers, printing rows and timings per table"""
+    from tvbingefriend_show_sync.repositories.bulk_load import bulk_load_directory
+    from tvbingefriend_show_sync.repositories.database import create_bulk_load_engine
+
+    engine = create_bulk_load_engine()
+    try:
+        for kind, result in bulk_load_directory(directory, engine).items():
+            seconds = max(result.load_seconds + result.merge_seconds, 1e-9)
+            print(
+                f"[bulk_load] {kind}: {result.rows} rows, load {result.load_seconds:.1f}s, "
+                f"merge {result.merge_seconds:.1f}s ({result.rows / seconds:.0f}/s)",
+                flush=True
+            )
+    finally:
+        engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the backfill
+
+    Args:
+        argv (list[str] | None): Command-line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: Exit code, 1 if any page or show failed
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stage", choices=("all", SHOWS, SEASONS_EPISODES), default="all")
+    parser.add_argument("--workers", type=int, default=max(multiprocessing.cpu_count(), 2))
+    parser.add_argument("--start-page", type=int, default=0, help="First show index page")
+    parser.add_argument("--batch-size", type=int, default=25, help="Shows per seasons/episodes transaction")
+    parser.add_argument("--missing-only", action="store_true",
+                        help="With --stage seasons_episodes, only shows with no stored seasons or episodes")
+    parser.add_argument("--bulk-load", metavar="DIR", default=None,
+                        help="Write load files to DIR and load them with LOAD DATA LOCAL INFILE at the end")
+    parser.add_argument("--prune", action="store_true",
+                        help="Delete stored seasons and episodes TV Maze no longer lists for a fetched show; "
+                             "not with --bulk-load")
+    parser.add_argument("--log-levels", default="tvbingefriend_show_sync=WARNING", help="LOG_LEVELS for workers")
+    args = parser.parse_args(argv)
+    if args.prune and args.bulk_load:
+        parser.error("--prune can't be combined with --bulk-load, whose merge doesn't delete rows")
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
+    configure_log_levels(args.log_levels)
+
+    if args.bulk_load:
+        Path(args.bulk_load).mkdir(parents=True, exist_ok=True)
+
+    failed_pages: list[int] = []
+    failed_shows: list[int] = []
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"),  # no engine or HTTP session is inherited from the parent
+        initializer=init_worker,
+        initargs=(args.log_levels, args.bulk_load, args.prune)
+    )
+    with executor:
+        if args.stage in ("all", SHOWS):
+            show_ids, failed_pages = run_shows(executor, args.start_page, window=args.workers * 2)
+        if args.stage == SEASONS_EPISODES:
+            show_ids = get_stored_show_ids(args.missing_only)
+        if args.stage in ("all", SEASONS_EPISODES):
+            failed_shows = run_seasons_episodes(executor, show_ids, args.batch_size)
+
+    if args.bulk_load:
+        load_directory(args.bulk_load)
+
+    if failed_pages:
+        print(f"Failed pages: {failed_pages}")
+    if failed_shows:
+        print(f"Failed shows ({len(failed_shows)}): {failed_shows[:100]}{' ...' if len(failed_shows) > 100 else ''}")
+    return 1 if failed_pages or failed_shows else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 """Get show episodes from TV Maze"""
 import json
 import logging
-from typing import Any
+from typing import Any, TYPE_CHECKING
 
 import azure.functions as func
 
@@ -10,8 +10,17 @@ from tvbingefriend_show_sync.config import (
     STORAGE_CONNECTION_SETTING_NAME,
     TVMAZE_EPISODES_CONTAINER
 )
-from tvbingefriend_show_sync.services.episode_service import EpisodeService
-from tvbingefriend_show_sync.utils import db_session_manager
+from tvbingefriend_show_sync.metrics import instrument
+from tvbingefriend_show_sync.profiling import profiled
+from tvbingefriend_show_sync.services.group_commit_writer import EPISODE
+from tvbingefriend_show_sync.services.service_container import get_services
+from tvbingefriend_show_sync.staging_gc import consumes_blob
+from tvbingefriend_show_sync.tracing import traced
+
+if TYPE_CHECKING:
+    from tvbingefriend_show_sync.services.episode_service import EpisodeService
+
+logger = logging.getLogger(__name__)
 
 bp = func.Blueprint()
 
@@ -22,24 +31,30 @@ bp = func.Blueprint()
     path=TVMAZE_EPISODES_CONTAINER,
     connection=STORAGE_CONNECTION_SETTING_NAME
 )
+@instrument("function.stage_show_episodes_for_upsert")
+@traced("stage_show_episodes_for_upsert")
+@profiled("stage_show_episodes_for_upsert")
+@consumes_blob
 def stage_show_episodes_for_upsert(stageshowepisodes: func.InputStream) -> None:
     """Stage show episodes for upsert
 
     Args:
         stageshowepisodes (func.InputStream): Blob input stream
     """
-    logging.info(f"stage_show_episodes_for_upsert: Processing blob {stageshowepisodes.name}.")
+    logger.info("stage_show_episodes_for_upsert: Processing blob %s.", stageshowepisodes.name)
     try:
         episode_data: dict[str, Any] = json.loads(stageshowepisodes.read())  # get episode data from blob
         show_id = episode_data.get("show_id", "N/A")
-        logging.info(f"stage_show_episodes_for_upsert: Staging episodes for show_id: {show_id} from {stageshowepisodes.name}.")
-        episode_service: EpisodeService = EpisodeService()
+        logger.info(
+            "stage_show_episodes_for_upsert: Staging episodes for show_id: %s from %s.", show_id, stageshowepisodes.name
+        )
+        episode_service: EpisodeService = get_services().episode_service
         episode_service.stage_episodes(episode_data)  # stage episodes for upsert
-        logging.info(f"stage_show_episodes_for_upsert: Successfully staged episodes for show_id: {show_id}.")
+        logger.info("stage_show_episodes_for_upsert: Successfully staged episodes for show_id: %s.", show_id)
     except Exception as e:
-        logging.error(
-            f"stage_show_episodes_for_upsert: Unhandled exception for blob {stageshowepisodes.name}. Error: {e}",
-            exc_info=True
+        logger.error(
+            "stage_show_episodes_for_upsert: Unhandled exception for blob %s. Error: %s",
+            stageshowepisodes.name, e, exc_info=True
         )
         raise
 
@@ -50,22 +65,28 @@ def stage_show_episodes_for_upsert(stageshowepisodes: func.InputStream) -> None:
     path=EPISODE_UPSERT_CONTAINER,
     connection=STORAGE_CONNECTION_SETTING_NAME
 )
+@instrument("function.upsert_episode")
+@traced("upsert_episode", terminal=True)
+@profiled("upsert_episode")
+@consumes_blob
 def upsert_episode(upsertepisode: func.InputStream) -> None:
     """Upsert episode
 
     Args:
         upsertepisode (func.InputStream): Blob input stream
     """
-    logging.info(f"upsert_episode: Processing blob {upsertepisode.name}")
+    logger.info("upsert_episode: Processing blob %s", upsertepisode.name)
     try:
-        episode: dict[str, Any] = json.loads(upsertepisode.read())  # get episode from blob
-        episode_service: EpisodeService = EpisodeService()  # create episode service
-        with db_session_manager() as db:
-            episode_service.upsert_episode(episode, db)  # upsert episode
-        logging.info(f"upsert_episode: Successfully upserted episode from blob {upsertepisode.name}")
-    except Exception as e:  # catch errors and log them
-        logging.error(
-            f"upsert_episode: Unhandled exception for blob {upsertepisode.name}. Error: {e}",
-            exc_info=True
+        data: bytes = upsertepisode.read()  # get episode from blob
+        applied = get_services().idempotency_ledger.apply_once(  # skip content already upserted
+            upsertepisode.name,
+            data,
+            lambda: get_services().upsert_writer.submit(EPISODE, json.loads(data))  # upsert in the next group commit
         )
+        if not applied:
+            logger.info("upsert_episode: Skipped blob %s, its content was already upserted", upsertepisode.name)
+            return
+        logger.info("upsert_episode: Successfully upserted episode from blob %s", upsertepisode.name)
+    except Exception as e:  # catch errors and log them
+        logger.error("upsert_episode: Unhandled exception for blob %s. Error: %s", upsertepisode.name, e, exc_info=True)
         raise
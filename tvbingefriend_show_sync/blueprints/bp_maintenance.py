@@ -0,0 +1,55 @@
+"""Housekeeping of storage used by the ingest"""
+import logging
+
+import azure.functions as func
+
+from tvbingefriend_show_sync.config import STAGING_BLOB_SWEEP_NCRON
+from tvbingefriend_show_sync.metrics import instrument
+from tvbingefriend_show_sync.profiling import profiled
+from tvbingefriend_show_sync.services.service_container import get_services
+from tvbingefriend_show_sync.staging_gc import sweep_staging_blobs
+from tvbingefriend_show_sync.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+bp = func.Blueprint()
+
+
+# noinspection PyUnusedLocal
+@bp.function_name(name="sweep_staging_blobs_timer")
+@bp.timer_trigger(
+    arg_name="sweepstagingblobs",
+    schedule=STAGING_BLOB_SWEEP_NCRON,
+    run_on_startup=False
+)
+@instrument("function.sweep_staging_blobs_timer")
+@traced("sweep_staging_blobs_timer")
+@profiled("sweep_staging_blobs_timer")
+def sweep_staging_blobs_timer(sweepstagingblobs: func.TimerRequest) -> None:
+    """Delete staging blobs older than STAGING_BLOB_TTL_HOURS, left behind by failed or retried invocations"""
+    deleted = sweep_staging_blobs()
+    logger.info(
+        "sweep_staging_blobs_timer: Deleted %s expired staging blobs (%s)",
+        sum(deleted.values()), ", ".join(f"{name}: {count}" for name, count in deleted.items() if count) or "none"
+    )
+
+
+# noinspection PyUnusedLocal
+@bp.function_name(name="reset_applied_blobs")
+@bp.route(route="reset_applied_blobs", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument("function.reset_applied_blobs")
+@traced("reset_applied_blobs")
+@profiled("reset_applied_blobs")
+def reset_applied_blobs(req: func.HttpRequest) -> func.HttpResponse:
+    """Clear the applied-blobs ledger, so unchanged shows, seasons, and episodes are upserted again
+
+    Use after the database was restored or rebuilt; otherwise content the ledger records as applied is skipped.
+
+    Args:
+        req (func.HttpRequest): Request object
+
+    Returns:
+        func.HttpResponse: Response object
+    """
+    cleared = get_services().idempotency_ledger.reset()
+    return func.HttpResponse(f"Cleared {cleared} applied-blob ledger entries", status_code=200)
@@ -0,0 +1,34 @@
+"""Expose per-stage metrics"""
+import logging
+
+import azure.functions as func
+
+from tvbingefriend_show_sync.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+bp = func.Blueprint()
+
+
+@bp.function_name(name="get_metrics")
+@bp.route(route="metrics", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+def get_metrics(req: func.HttpRequest) -> func.HttpResponse:
+    """Get this worker's stage latency histograms, error counts, and event counters
+
+    Metrics are kept per worker, so a scaled-out app returns the metrics of whichever worker served the request.
+    A 'reset' query parameter of 'true' clears them after they are read.
+
+    Args:
+        req (func.HttpRequest): HTTP request
+
+    Returns:
+        func.HttpResponse: Metrics in the Prometheus text exposition format
+    """
+    registry = get_registry()
+    body: str = registry.render_prometheus()
+
+    if req.params.get("reset", "").lower() == "true":
+        registry.reset()
+        logger.info("get_metrics: Metrics reset")
+
+    return func.HttpResponse(body, status_code=200, mimetype="text/plain")
@@ -1,7 +1,7 @@
 """Get show seasons from TV Maze"""
 import json
 import logging
-from typing import Any
+from typing import Any, TYPE_CHECKING
 
 import azure.functions as func
 
@@ -10,8 +10,17 @@ from tvbingefriend_show_sync.config import (
     STORAGE_CONNECTION_SETTING_NAME,
     TVMAZE_SEASONS_CONTAINER
 )
-from tvbingefriend_show_sync.services.season_service import SeasonService
-from tvbingefriend_show_sync.utils import db_session_manager
+from tvbingefriend_show_sync.metrics import instrument
+from tvbingefriend_show_sync.profiling import profiled
+from tvbingefriend_show_sync.services.group_commit_writer import SEASON
+from tvbingefriend_show_sync.services.service_container import get_services
+from tvbingefriend_show_sync.staging_gc import consumes_blob
+from tvbingefriend_show_sync.tracing import traced
+
+if TYPE_CHECKING:
+    from tvbingefriend_show_sync.services.season_service import SeasonService
+
+logger = logging.getLogger(__name__)
 
 bp = func.Blueprint()
 
@@ -23,24 +32,30 @@ bp = func.Blueprint()
     path=TVMAZE_SEASONS_CONTAINER,
     connection=STORAGE_CONNECTION_SETTING_NAME
 )
+@instrument("function.stage_show_seasons_for_upsert")
+@traced("stage_show_seasons_for_upsert")
+@profiled("stage_show_seasons_for_upsert")
+@consumes_blob
 def stage_show_seasons_for_upsert(stageshowseasons: func.InputStream) -> None:
     """Stage show seasons for upsert
 
     Args:
         stageshowseasons (func.InputStream): Blob input stream
     """
-    logging.info(f"stage_show_seasons_for_upsert: Processing blob {stageshowseasons.name}.")
+    logger.info("stage_show_seasons_for_upsert: Processing blob %s.", stageshowseasons.name)
     try:
         season_data: dict[str, Any] = json.loads(stageshowseasons.read())  # get season data from blob
         show_id = season_data.get("show_id", "N/A")
-        logging.info(f"stage_show_seasons_for_upsert: Staging seasons for show_id: {show_id} from {stageshowseasons.name}.")
-        season_service: SeasonService = SeasonService()
+        logger.info(
+            "stage_show_seasons_for_upsert: Staging seasons for show_id: %s from %s.", show_id, stageshowseasons.name
+        )
+        season_service: SeasonService = get_services().season_service
         season_service.stage_seasons(season_data)  # stage seasons for upsert
-        logging.info(f"stage_show_seasons_for_upsert: Successfully staged seasons for show_id: {show_id}.")
+        logger.info("stage_show_seasons_for_upsert: Successfully staged seasons for show_id: %s.", show_id)
     except Exception as e:
-        logging.error(
-            f"stage_show_seasons_for_upsert: Unhandled exception for blob {stageshowseasons.name}. Error: {e}",
-            exc_info=True
+        logger.error(
+            "stage_show_seasons_for_upsert: Unhandled exception for blob %s. Error: %s",
+            stageshowseasons.name, e, exc_info=True
         )
         raise
 
@@ -51,23 +66,29 @@ def stage_show_seasons_for_upsert(stageshowseasons: func.InputStream) -> None:
     path=SEASON_UPSERT_CONTAINER,
     connection=STORAGE_CONNECTION_SETTING_NAME
 )
+@instrument("function.upsert_season")
+@traced("upsert_season", terminal=True)
+@profiled("upsert_season")
+@consumes_blob
 def upsert_season(upsertseason: func.InputStream) -> None:
     """Upsert season
 
     Args:
         upsertseason (func.InputStream): Blob input stream
     """
-    logging.info(f"upsert_season: Processing blob {upsertseason.name}")
+    logger.info("upsert_season: Processing blob %s", upsertseason.name)
 
     try:
-        season: dict[str, Any] = json.loads(upsertseason.read())  # get season from blob
-        season_service: SeasonService = SeasonService()  # create season service
-        with db_session_manager() as db:
-            season_service.upsert_season(season, db)  # upsert season
-        logging.info(f"upsert_season: Successfully upserted season from blob {upsertseason.name}")
-    except Exception as e:
-        logging.error(
-            f"upsert_season: Unhandled exception for blob {upsertseason.name}. Error: {e}",
-            exc_info=True
+        data: bytes = upsertseason.read()  # get season from blob
+        applied = get_services().idempotency_ledger.apply_once(  # skip content already upserted
+            upsertseason.name,
+            data,
+            lambda: get_services().upsert_writer.submit(SEASON, json.loads(data))  # upsert in the next group commit
         )
+        if not applied:
+            logger.info("upsert_season: Skipped blob %s, its content was already upserted", upsertseason.name)
+            return
+        logger.info("upsert_season: Successfully upserted season from blob %s", upsertseason.name)
+    except Exception as e:
+        logger.error("upsert_season: Unhandled exception for blob %s. Error: %s", upsertseason.name, e, exc_info=True)
         raise
@@ -1,7 +1,7 @@
 """Get seasons from TV Maze"""
 import json
 import logging
-from typing import Any, List
+from typing import Any, List, TYPE_CHECKING
 
 import azure.functions as func
 
@@ -11,20 +11,58 @@ from tvbingefriend_show_sync.config import (
     TVMAZE_SEASONS_EPISODES_QUEUE,
     TVMAZE_SHOW_IDS_CONTAINER
 )
-from tvbingefriend_show_sync.services.seasons_episodes_service import SeasonsEpisodesService
+from tvbingefriend_show_sync.metrics import instrument
+from tvbingefriend_show_sync.profiling import profiled
+from tvbingefriend_show_sync.services.service_container import get_services
+from tvbingefriend_show_sync.staging_gc import consumes_blob
+from tvbingefriend_show_sync.tracing import traced
 
+if TYPE_CHECKING:
+    from tvbingefriend_show_sync.services.seasons_episodes_service import SeasonsEpisodesService
+
+logger = logging.getLogger(__name__)
 
 bp = func.Blueprint()
 
 
-# noinspection PyUnusedLocal
 @bp.function_name(name="start_get_seasons_episodes")
 @bp.route(route="start_get_seasons", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument("function.start_get_seasons_episodes")
+@traced("start_get_seasons_episodes")
+@profiled("start_get_seasons_episodes")
 def start_get_seasons_episodes(req: func.HttpRequest) -> func.HttpResponse:
-    """HTTP-triggered function to start the season/episode retrieval workflow."""
-    logging.info("start_get_seasons_episodes: HTTP trigger function processed a request.")
-    seasons_episodes_service = SeasonsEpisodesService()
-    return seasons_episodes_service.start_get_seasons_episodes()
+    """HTTP-triggered function to start the season/episode retrieval workflow.
+
+    An optional 'mode' query parameter of 'missing' limits the run to shows with no stored seasons or episodes.
+    """
+    logger.info("start_get_seasons_episodes: HTTP trigger function processed a request.")
+    mode: str = req.params.get('mode', 'all')
+    if mode not in ('all', 'missing'):
+        logger.error("Invalid mode parameter provided: %s", mode)
+        return func.HttpResponse("Query parameter 'mode' must be 'all' or 'missing'.", status_code=400)
+
+    seasons_episodes_service: SeasonsEpisodesService = get_services().seasons_episodes_service
+    return seasons_episodes_service.start_get_seasons_episodes(missing_only=mode == 'missing')
+
+
+@bp.function_name(name="resume_get_seasons_episodes")
+@bp.route(route="resume_get_seasons", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument("function.resume_get_seasons_episodes")
+@traced("resume_get_seasons_episodes")
+@profiled("resume_get_seasons_episodes")
+def resume_get_seasons_episodes(req: func.HttpRequest) -> func.HttpResponse:
+    """HTTP-triggered function to queue only the shows not yet recorded in the progress ledger.
+
+    Accepts the same optional 'mode' query parameter as start_get_seasons_episodes.
+    """
+    logger.info("resume_get_seasons_episodes: HTTP trigger function processed a request.")
+    mode: str = req.params.get('mode', 'all')
+    if mode not in ('all', 'missing'):
+        logger.error("Invalid mode parameter provided: %s", mode)
+        return func.HttpResponse("Query parameter 'mode' must be 'all' or 'missing'.", status_code=400)
+
+    seasons_episodes_service: SeasonsEpisodesService = get_services().seasons_episodes_service
+    return seasons_episodes_service.resume_get_seasons_episodes(missing_only=mode == 'missing')
 
 
 @bp.function_name(name="stage_show_ids_for_retrieval")
@@ -33,21 +71,25 @@ def start_get_seasons_episodes(req: func.HttpRequest) -> func.HttpResponse:
     path=TVMAZE_SHOW_IDS_CONTAINER,
     connection=STORAGE_CONNECTION_SETTING_NAME
 )
+@instrument("function.stage_show_ids_for_retrieval")
+@traced("stage_show_ids_for_retrieval")
+@profiled("stage_show_ids_for_retrieval")
+@consumes_blob
 def stage_show_ids_for_retrieval(stageshowidsblob: func.InputStream) -> None:
     """Blob-triggered function to queue up individual show IDs for processing."""
-    logging.info(f"stage_show_ids_for_retrieval: Processing blob {stageshowidsblob.name}.")
+    logger.info("stage_show_ids_for_retrieval: Processing blob %s.", stageshowidsblob.name)
     try:
         show_ids: List[int] = json.loads(stageshowidsblob.read())
-        logging.info(
-            f"stage_show_ids_for_retrieval: Staging {len(show_ids)} show IDs from blob {stageshowidsblob.name}."
+        logger.info(
+            "stage_show_ids_for_retrieval: Staging %s show IDs from blob %s.", len(show_ids), stageshowidsblob.name
         )
-        seasons_episodes_service = SeasonsEpisodesService()
+        seasons_episodes_service: SeasonsEpisodesService = get_services().seasons_episodes_service
         seasons_episodes_service.stage_show_ids_for_retrieval(show_ids)
-        logging.info(f"stage_show_ids_for_retrieval: Successfully staged show IDs from blob {stageshowidsblob.name}.")
+        logger.info("stage_show_ids_for_retrieval: Successfully staged show IDs from blob %s.", stageshowidsblob.name)
     except Exception as e:
-        logging.error(
-            f"stage_show_ids_for_retrieval: Unhandled exception for blob {stageshowidsblob.name}. Error: {e}",
-            exc_info=True
+        logger.error(
+            "stage_show_ids_for_retrieval: Unhandled exception for blob %s. Error: %s",
+            stageshowidsblob.name, e, exc_info=True
         )
         raise
 
@@ -58,24 +100,34 @@ def stage_show_ids_for_retrieval(stageshowidsblob: func.InputStream) -> None:
     queue_name=TVMAZE_SEASONS_EPISODES_QUEUE,
     connection=STORAGE_CONNECTION_SETTING_NAME
 )
+@instrument("function.get_show_seasons_episodes")
+@traced("get_show_seasons_episodes")
+@profiled("get_show_seasons_episodes")
 def get_show_seasons_episodes(getshowseasonsepisodes: func.QueueMessage) -> None:
-    """Queue-triggered function to fetch seasons/episodes for a single show."""
-    logging.info(
-        f"get_show_seasons_episodes: Processing queue message ID: {getshowseasonsepisodes.id}, "
-        f"DequeueCount: {getshowseasonsepisodes.dequeue_count}"
+    """Queue-triggered function to fetch seasons/episodes for a single show or a batch of shows."""
+    logger.info(
+        "get_show_seasons_episodes: Processing queue message ID: %s, DequeueCount: %s",
+        getshowseasonsepisodes.id, getshowseasonsepisodes.dequeue_count
     )
     try:
         msg: dict[str, Any] = getshowseasonsepisodes.get_json()
-        show_id = msg.get("show_id", "N/A")
-        logging.info(f"get_show_seasons_episodes: Fetching seasons/episodes for show_id: {show_id}")
-        seasons_episodes_service = SeasonsEpisodesService()
-        seasons_episodes_service.get_show_seasons_episodes(msg)
-        logging.info(f"get_show_seasons_episodes: Successfully processed show_id: {show_id}")
+        show_ids = msg.get("show_ids") or msg.get("show_id", "N/A")
+        logger.info("get_show_seasons_episodes: Fetching seasons/episodes for show_id: %s", show_ids)
+        seasons_episodes_service: SeasonsEpisodesService = get_services().seasons_episodes_service
+        outcomes = seasons_episodes_service.get_seasons_episodes_batch(msg)
+        succeeded = sum(outcome.succeeded for outcome in outcomes)
+        logger.info(
+            "get_show_seasons_episodes: Successfully processed %s of %s shows from message ID %s",
+            succeeded, len(outcomes), getshowseasonsepisodes.id
+        )
     except Exception as e:
-        logging.error(
-            f"get_show_seasons_episodes: Unhandled exception for message ID {getshowseasonsepisodes.id}. Error: {e}",
-            exc_info=True
+        logger.error(
+            "get_show_seasons_episodes: Unhandled exception for message ID %s. Error: %s",
+            getshowseasonsepisodes.id, e, exc_info=True
         )
+        dead_letter_service = get_services().dead_letter_service
+        if dead_letter_service.record_if_permanent("get_show_seasons_episodes", getshowseasonsepisodes.id, e):
+            return  # malformed messages can't succeed on retry
         raise
 
 
@@ -85,22 +137,26 @@ def get_show_seasons_episodes(getshowseasonsepisodes: func.QueueMessage) -> None
     path=TVMAZE_SEASONS_EPISODES_CONTAINER,
     connection=STORAGE_CONNECTION_SETTING_NAME
 )
+@instrument("function.stage_show_seasons_episodes")
+@traced("stage_show_seasons_episodes")
+@profiled("stage_show_seasons_episodes")
+@consumes_blob
 def stage_show_seasons_episodes(stageshowseasonsepisodes: func.InputStream) -> None:
     """Blob-triggered function to process a show's raw data and stage its seasons and episodes."""
-    logging.info(f"stage_show_seasons_episodes: Processing blob {stageshowseasonsepisodes.name}.")
+    logger.info("stage_show_seasons_episodes: Processing blob %s.", stageshowseasonsepisodes.name)
     try:
         show_data: dict[str, Any] = json.loads(stageshowseasonsepisodes.read())
         show_id = show_data.get("id", "N/A")
-        logging.info(
-            f"stage_show_seasons_episodes: Staging seasons/episodes for show_id: {show_id} "
-            f"from blob {stageshowseasonsepisodes.name}."
+        logger.info(
+            "stage_show_seasons_episodes: Staging seasons/episodes for show_id: %s from blob %s.",
+            show_id, stageshowseasonsepisodes.name
         )
-        seasons_episodes_service: SeasonsEpisodesService = SeasonsEpisodesService()
+        seasons_episodes_service: SeasonsEpisodesService = get_services().seasons_episodes_service
         seasons_episodes_service.stage_show_seasons_episodes(show_data)
-        logging.info(f"stage_show_seasons_episodes: Successfully staged seasons/episodes for show_id: {show_id}.")
+        logger.info("stage_show_seasons_episodes: Successfully staged seasons/episodes for show_id: %s.", show_id)
     except Exception as e:
-        logging.error(
-            f"stage_show_seasons_episodes: Unhandled exception for blob {stageshowseasonsepisodes.name}. Error: {e}",
-            exc_info=True
+        logger.error(
+            "stage_show_seasons_episodes: Unhandled exception for blob %s. Error: %s",
+            stageshowseasonsepisodes.name, e, exc_info=True
         )
         raise
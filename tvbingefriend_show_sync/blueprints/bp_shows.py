@@ -1,7 +1,7 @@
 """Get shows from TV Maze"""
 import json
 import logging
-from typing import Any
+from typing import Any, TYPE_CHECKING
 
 import azure.functions as func
 
@@ -11,19 +11,42 @@ from tvbingefriend_show_sync.config import (
     STORAGE_CONNECTION_SETTING_NAME,
     TVMAZE_SHOWS_QUEUE
 )
-from tvbingefriend_show_sync.services.show_service import ShowService
-from tvbingefriend_show_sync.utils import db_session_manager
+from tvbingefriend_show_sync.metrics import instrument
+from tvbingefriend_show_sync.profiling import profiled
+from tvbingefriend_show_sync.services.group_commit_writer import SHOW
+from tvbingefriend_show_sync.services.service_container import get_services
+from tvbingefriend_show_sync.staging_gc import consumes_blob
+from tvbingefriend_show_sync.tracing import traced
+
+if TYPE_CHECKING:
+    from tvbingefriend_show_sync.services.show_service import ShowService
+
+logger = logging.getLogger(__name__)
 
 bp = func.Blueprint()
 
 
+def _parse_window(window_str: str | None) -> int | None:
+    """Parse the optional 'window' query parameter, returning None if it is missing or invalid"""
+    try:
+        window = int(window_str) if window_str else None
+    except ValueError:
+        return None
+    return window if window is not None and window > 0 else None
+
+
 # noinspection PyUnusedLocal
 @bp.function_name(name="start_get_shows")
 @bp.route(route="start_get_shows", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument("function.start_get_shows")
+@traced("start_get_shows")
+@profiled("start_get_shows")
 def start_get_shows(req: func.HttpRequest) -> func.HttpResponse:
     """Start get all shows from TV Maze
 
-    An optional 'page' query parameter can be provided to start from a specific page.
+    An optional 'page' query parameter can be provided to start from a specific page. An optional 'window'
+    query parameter sets how many pages are fetched in parallel; by default it is estimated from the shows
+    already stored.
 
     Args:
         req (func.HttpRequest): Request object
@@ -37,21 +60,67 @@ def start_get_shows(req: func.HttpRequest) -> func.HttpResponse:
         try:
             page = int(page_str)
             if page < 0:
-                logging.error(f"Invalid page number provided: {page}")
+                logger.error("Invalid page number provided: %s", page)
                 return func.HttpResponse(
                     "Query parameter 'page' must be a non-negative integer.",
                     status_code=400
                 )
         except ValueError:
-            logging.error(f"Invalid page parameter provided: {page_str}")
+            logger.error("Invalid page parameter provided: %s", page_str)
             return func.HttpResponse(
                 "Query parameter 'page' must be an integer.",
                 status_code=400
             )
-    show_service: ShowService = ShowService()  # create show service
-    show_service.start_get_shows(page=page)  # initiate retrieval of all shows
 
-    message = f"Getting all shows from TV Maze, starting from page {page}"
+    window_str: str | None = req.params.get('window')
+    window: int | None = _parse_window(window_str)
+    if window_str and window is None:
+        logger.error("Invalid window parameter provided: %s", window_str)
+        return func.HttpResponse(
+            "Query parameter 'window' must be a positive integer.",
+            status_code=400
+        )
+
+    show_service: ShowService = get_services().show_service  # get shared show service
+    window = show_service.start_get_shows(page=page, window=window)  # initiate retrieval of all shows
+
+    message = f"Getting all shows from TV Maze, starting from page {page} with {window} pages in parallel"
+    return func.HttpResponse(message, status_code=202)
+
+
+# noinspection PyUnusedLocal
+@bp.function_name(name="resume_get_shows")
+@bp.route(route="resume_get_shows", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument("function.resume_get_shows")
+@traced("resume_get_shows")
+@profiled("resume_get_shows")
+def resume_get_shows(req: func.HttpRequest) -> func.HttpResponse:
+    """Resume an interrupted show ingest
+
+    Queues only the pages the progress ledger has not recorded as complete. An optional 'window' query
+    parameter sets how many pages are fetched in parallel if the crawl has to continue.
+
+    Args:
+        req (func.HttpRequest): Request object
+
+    Returns:
+        func.HttpResponse: Response object
+    """
+    window_str: str | None = req.params.get('window')
+    window: int | None = _parse_window(window_str)
+    if window_str and window is None:
+        logger.error("Invalid window parameter provided: %s", window_str)
+        return func.HttpResponse(
+            "Query parameter 'window' must be a positive integer.",
+            status_code=400
+        )
+
+    show_service: ShowService = get_services().show_service  # get shared show service
+    summary = show_service.resume_get_shows(window=window)  # queue outstanding pages
+
+    message = f"Queued {len(summary['missing_pages'])} missing pages"
+    if summary["continued_from"] is not None:
+        message += f", continuing from page {summary['continued_from']}"
     return func.HttpResponse(message, status_code=202)
 
 
@@ -61,25 +130,26 @@ def start_get_shows(req: func.HttpRequest) -> func.HttpResponse:
     queue_name=TVMAZE_SHOWS_QUEUE,
     connection=STORAGE_CONNECTION_SETTING_NAME
 )
+@instrument("function.get_show_page")
+@traced("get_show_page")
+@profiled("get_show_page")
 def get_show_page(getshowsmsg: func.QueueMessage) -> None:
     """Get one page of shows from TV Maze
 
     Args:
         getshowsmsg (func.QueueMessage): Queue message
     """
-    logging.info(
-        f"get_show_page: Processing queue message ID: {getshowsmsg.id}, "
-        f"DequeueCount: {getshowsmsg.dequeue_count}"
+    logger.info(
+        "get_show_page: Processing queue message ID: %s, DequeueCount: %s", getshowsmsg.id, getshowsmsg.dequeue_count
     )
     try:
         message: dict[str, Any] = getshowsmsg.get_json()  # get message from queue
-        show_service: ShowService = ShowService()  # create show service
+        show_service: ShowService = get_services().show_service  # get shared show service
         show_service.get_show_page(message)   # get show page
-        logging.info(f"get_show_page: Successfully processed queue message ID: {getshowsmsg.id}")
+        logger.info("get_show_page: Successfully processed queue message ID: %s", getshowsmsg.id)
     except Exception as e:
-        logging.error(
-            f"get_show_page: Unhandled exception for message ID {getshowsmsg.id}. Error: {e}",
-            exc_info=True
+        logger.error(
+            "get_show_page: Unhandled exception for message ID %s. Error: %s", getshowsmsg.id, e, exc_info=True
         )
         raise
 
@@ -90,23 +160,26 @@ def get_show_page(getshowsmsg: func.QueueMessage) -> None:
     path=SHOW_STAGE_CONTAINER,
     connection=STORAGE_CONNECTION_SETTING_NAME,
 )
+@instrument("function.stage_shows_for_upsert")
+@traced("stage_shows_for_upsert")
+@profiled("stage_shows_for_upsert")
+@consumes_blob
 def stage_shows_for_upsert(stageblob: func.InputStream) -> None:
     """Stage one page of shows for upsert
 
     Args:
         stageblob (func.InputStream): Blob input stream
     """
-    logging.info(f"stage_shows_for_upsert: Processing blob {stageblob.name}.")
+    logger.info("stage_shows_for_upsert: Processing blob %s.", stageblob.name)
     try:
         shows: list[dict[str, Any]] = json.loads(stageblob.read())  # get shows from blob
-        logging.info(f"stage_shows_for_upsert: Staging {len(shows)} shows from blob {stageblob.name}.")
-        show_service: ShowService = ShowService()  # create show service
+        logger.info("stage_shows_for_upsert: Staging %s shows from blob %s.", len(shows), stageblob.name)
+        show_service: ShowService = get_services().show_service  # get shared show service
         show_service.stage_shows_for_upsert(shows)  # stage shows for upsert
-        logging.info(f"stage_shows_for_upsert: Successfully staged shows from blob {stageblob.name}.")
+        logger.info("stage_shows_for_upsert: Successfully staged shows from blob %s.", stageblob.name)
     except Exception as e:
-        logging.error(
-            f"stage_shows_for_upsert: Unhandled exception for blob {stageblob.name}. Error: {e}",
-            exc_info=True
+        logger.error(
+            "stage_shows_for_upsert: Unhandled exception for blob %s. Error: %s", stageblob.name, e, exc_info=True
         )
         raise
 
@@ -117,23 +190,29 @@ def stage_shows_for_upsert(stageblob: func.InputStream) -> None:
     path=SHOW_UPSERT_CONTAINER,
     connection=STORAGE_CONNECTION_SETTING_NAME,
 )
+@instrument("function.upsert_show")
+@traced("upsert_show", terminal=True)
+@profiled("upsert_show")
+@consumes_blob
 def upsert_show(upsertblob: func.InputStream) -> None:
     """Upsert shows
 
     Args:
         upsertblob (func.InputStream): Blob input stream
     """
-    logging.info(f"upsert_show: Processing blob {upsertblob.name}")
+    logger.info("upsert_show: Processing blob %s", upsertblob.name)
 
     try:
-        show: dict[str, Any] = json.loads(upsertblob.read())  # get show data from blob
-        show_service: ShowService = ShowService()  # create show service
-        with db_session_manager() as db:
-            show_service.upsert_show(show, db)  # upsert show
-        logging.info(f"upsert_show: Successfully upserted show from blob {upsertblob.name}")
-    except Exception as e:  # catch errors and log them
-        logging.error(
-            f"upsert_show: Unhandled exception for blob {upsertblob.name}. Error: {e}",
-            exc_info=True
+        data: bytes = upsertblob.read()  # get show from blob
+        applied = get_services().idempotency_ledger.apply_once(  # skip content already upserted
+            upsertblob.name,
+            data,
+            lambda: get_services().upsert_writer.submit(SHOW, json.loads(data))  # upsert in the next group commit
         )
+        if not applied:
+            logger.info("upsert_show: Skipped blob %s, its content was already upserted", upsertblob.name)
+            return
+        logger.info("upsert_show: Successfully upserted show from blob %s", upsertblob.name)
+    except Exception as e:  # catch errors and log them
+        logger.error("upsert_show: Unhandled exception for blob %s. Error: %s", upsertblob.name, e, exc_info=True)
         raise
@@ -1,7 +1,7 @@
 """Update shows from TV Maze"""
 import json
 import logging
-from typing import Any
+from typing import Any, TYPE_CHECKING
 
 import azure.functions as func
 
@@ -11,13 +11,25 @@ from tvbingefriend_show_sync.config import (
     UPDATE_SEASONS_EPISODES_NCRON,
     UPDATE_SHOWS_NCRON, TVMAZE_SHOWS_UPDATE_QUEUE
 )
-from tvbingefriend_show_sync.services.update_service import UpdateService
+from tvbingefriend_show_sync.metrics import instrument
+from tvbingefriend_show_sync.profiling import profiled
+from tvbingefriend_show_sync.services.service_container import get_services
+from tvbingefriend_show_sync.staging_gc import consumes_blob
+from tvbingefriend_show_sync.tracing import traced
+
+if TYPE_CHECKING:
+    from tvbingefriend_show_sync.services.update_service import UpdateService
+
+logger = logging.getLogger(__name__)
 
 bp = func.Blueprint()
 
 
 @bp.function_name(name="get_updates_manually")
 @bp.route(route="update_shows_manually", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument("function.get_updates_manually")
+@traced("get_updates_manually")
+@profiled("get_updates_manually")
 def get_updates_manually(req: func.HttpRequest) -> func.HttpResponse:
     """Update shows manually
 
@@ -33,13 +45,13 @@ def get_updates_manually(req: func.HttpRequest) -> func.HttpResponse:
     since: str = req.params.get('since', 'day')
 
     if since not in ('day', 'week', 'month'):  # if invalid, log error and return
-        logging.error(f"Invalid since parameter provided: {since}")
+        logger.error("Invalid since parameter provided: %s", since)
         return func.HttpResponse(
             "Query parameter 'since' must be 'day', 'week', or 'month'.",
             status_code=400
         )
 
-    update_service: UpdateService = UpdateService()  # create update service
+    update_service: UpdateService = get_services().update_service  # get shared update service
     update_service.get_updates(since)  # update shows manually
 
     message = f"Getting all updates from TV Maze for the last {since}"
@@ -54,9 +66,12 @@ def get_updates_manually(req: func.HttpRequest) -> func.HttpResponse:
     schedule=UPDATE_SHOWS_NCRON,
     run_on_startup=False
 )
+@instrument("function.get_updates_timer")
+@traced("get_updates_timer")
+@profiled("get_updates_timer")
 def get_updates_timer(updateshows: func.TimerRequest) -> None:
     """Update shows from TV Maze"""
-    update_service: UpdateService = UpdateService()  # create update service
+    update_service: UpdateService = get_services().update_service  # get shared update service
     update_service.get_updates()
 
 
@@ -67,9 +82,12 @@ def get_updates_timer(updateshows: func.TimerRequest) -> None:
     schedule=UPDATE_SEASONS_EPISODES_NCRON,
     run_on_startup=False
 )
+@instrument("function.update_seasons_episodes")
+@traced("update_seasons_episodes")
+@profiled("update_seasons_episodes")
 def update_seasons_episodes(updateseasonsepisodes: func.TimerRequest) -> None:
     """Update seasons and episodes from TV Maze"""
-    update_service: UpdateService = UpdateService()  # create update service
+    update_service: UpdateService = get_services().update_service  # get shared update service
     update_service.update_seasons_episodes()
 
 
@@ -79,33 +97,38 @@ def update_seasons_episodes(updateseasonsepisodes: func.TimerRequest) -> None:
     queue_name=TVMAZE_SHOWS_UPDATE_QUEUE,
     connection=STORAGE_CONNECTION_SETTING_NAME
 )
+@instrument("function.get_show_update_details")
+@traced("get_show_update_details")
+@profiled("get_show_update_details")
 def get_show_update_details(updateshowmsg: func.QueueMessage) -> None:
     """Get show update details
 
     Args:
         updateshowmsg (func.QueueMessage): Queue message
     """
-    logging.info(
-        f"get_show_update_details: Processing queue message ID: {updateshowmsg.id}, "
-        f"DequeueCount: {updateshowmsg.dequeue_count}"
+    logger.info(
+        "get_show_update_details: Processing queue message ID: %s, DequeueCount: %s",
+        updateshowmsg.id, updateshowmsg.dequeue_count
     )
     try:
         message: dict[str, Any] = updateshowmsg.get_json()  # get message from queue
-        show_id = message.get("show_id")
-
-        if not show_id:
-            logging.error("Received show update message without a 'show_id'. Aborting.")
-            return
-
-        logging.info(f"get_show_update_details: Getting update details for show_id: {show_id}")
-        update_service: UpdateService = UpdateService()  # create update service
-        update_service.get_show_update_details(show_id)  # get show update details
-        logging.info(f"get_show_update_details: Successfully processed show_id: {show_id}")
+        show_ids = message.get("show_ids") or message.get("show_id")
+        logger.info("get_show_update_details: Getting update details for show_id: %s", show_ids)
+
+        update_service: UpdateService = get_services().update_service  # get shared update service
+        outcomes = update_service.get_show_update_details_batch(message)  # get show update details
+        succeeded = sum(outcome.succeeded for outcome in outcomes)
+        logger.info(
+            "get_show_update_details: Successfully processed %s of %s shows from message ID %s",
+            succeeded, len(outcomes), updateshowmsg.id
+        )
     except Exception as e:
-        logging.error(
-            f"get_show_update_details: Unhandled exception for message ID {updateshowmsg.id}. Error: {e}",
-            exc_info=True
+        logger.error(
+            "get_show_update_details: Unhandled exception for message ID %s. Error: %s",
+            updateshowmsg.id, e, exc_info=True
         )
+        if get_services().dead_letter_service.record_if_permanent("get_show_update_details", updateshowmsg.id, e):
+            return  # malformed messages can't succeed on retry
         raise
 
 
@@ -115,22 +138,29 @@ def get_show_update_details(updateshowmsg: func.QueueMessage) -> None:
     path=TVMAZE_UPDATES_CONTAINER,
     connection=STORAGE_CONNECTION_SETTING_NAME,
 )
+@instrument("function.stage_season_episode_updates_for_upsert")
+@traced("stage_season_episode_updates_for_upsert")
+@profiled("stage_season_episode_updates_for_upsert")
+@consumes_blob
 def stage_season_episode_updates_for_upsert(stageblob: func.InputStream) -> None:
     """Stage season/episode updates for upsert
 
     Args:
         stageblob (func.InputStream): Blob input stream
     """
-    logging.info(f"stage_season_episode_updates_for_upsert: Processing blob {stageblob.name}.")
+    logger.info("stage_season_episode_updates_for_upsert: Processing blob %s.", stageblob.name)
     try:
         updates: dict[str, Any] = json.loads(stageblob.read())  # get updates from blob
-        logging.info(f"stage_season_episode_updates_for_upsert: Staging {len(updates)} updates from {stageblob.name}.")
-        update_service: UpdateService = UpdateService()  # create update service
+        logger.info(
+            "stage_season_episode_updates_for_upsert: Staging %s updates from %s.", len(updates), stageblob.name
+        )
+        update_service: UpdateService = get_services().update_service  # get shared update service
         update_service.stage_updates_for_upsert(updates)  # stage updates for upsert
-        logging.info(f"stage_season_episode_updates_for_upsert: Successfully staged updates from {stageblob.name}.")
+        update_service.advance_update_watermark(updates, stageblob.metadata)  # only once staging succeeded
+        logger.info("stage_season_episode_updates_for_upsert: Successfully staged updates from %s.", stageblob.name)
     except Exception as e:
-        logging.error(
-            f"stage_season_episode_updates_for_upsert: Unhandled exception for blob {stageblob.name}. Error: {e}",
-            exc_info=True
+        logger.error(
+            "stage_season_episode_updates_for_upsert: Unhandled exception for blob %s. Error: %s",
+            stageblob.name, e, exc_info=True
         )
         raise
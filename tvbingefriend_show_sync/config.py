@@ -1,5 +1,10 @@
-"""Configuration for tvbingefriend_show_sync"""
+"""Configuration for tvbingefriend_show_sync
+
+Names used by function binding decorators are read at import time. Connection strings are only needed
+once a function touches storage or the database, so they are read on first use.
+"""
 import os
+from functools import cache
 
 
 def _get_required_env(var_name: str) -> str:
@@ -13,9 +18,32 @@ def _get_required_env(var_name: str) -> str:
 # App Setting Keys (for use in function binding decorators)
 STORAGE_CONNECTION_SETTING_NAME = "AzureWebJobsStorage"
 
+
 # Connection Strings
-SQLALCHEMY_CONNECTION_STRING = _get_required_env("SQLALCHEMY_CONNECTION_STRING")
-STORAGE_CONNECTION_STRING = _get_required_env(STORAGE_CONNECTION_SETTING_NAME)
+@cache
+def get_sqlalchemy_connection_string() -> str:
+    """Gets the database connection string, read on first use."""
+    return _get_required_env("SQLALCHEMY_CONNECTION_STRING")
+
+
+@cache
+def get_storage_connection_string() -> str:
+    """Gets the storage account connection string, read on first use."""
+    return _get_required_env(STORAGE_CONNECTION_SETTING_NAME)
+
+
+_LAZY_SETTINGS = {
+    "SQLALCHEMY_CONNECTION_STRING": get_sqlalchemy_connection_string,
+    "STORAGE_CONNECTION_STRING": get_storage_connection_string,
+}
+
+
+def __getattr__(name: str) -> str:
+    """Resolves connection string constants lazily for modules that import them by name."""
+    if name in _LAZY_SETTINGS:
+        return _LAZY_SETTINGS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Show storage
 TVMAZE_SHOWS_QUEUE = os.getenv("TVMAZE_SHOWS_QUEUE", "tvshowsqueue")
@@ -42,6 +70,77 @@ TVMAZE_SEASONS_EPISODES_UPDATE_TABLE = os.getenv(
     "TVMAZE_SEASONS_EPISODES_UPDATE_TABLE",
     "tvseasonsepisodesupdatetable"
 )
+TVMAZE_UPDATE_WATERMARK_TABLE = os.getenv("TVMAZE_UPDATE_WATERMARK_TABLE", "tvupdatewatermarktable")
+
+# Ingest progress storage
+TVMAZE_SYNC_PROGRESS_TABLE = os.getenv("TVMAZE_SYNC_PROGRESS_TABLE", "tvsyncprogresstable")
+
+# Dead-letter storage for permanently failed work
+TVMAZE_DEAD_LETTER_TABLE = os.getenv("TVMAZE_DEAD_LETTER_TABLE", "tvdeadlettertable")
+
+# Ledger of applied staging blobs, to skip duplicate deliveries and unchanged uploads; recent ones cached per worker
+TVMAZE_APPLIED_BLOBS_TABLE = os.getenv("TVMAZE_APPLIED_BLOBS_TABLE", "tvappliedblobstable")
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "50000"))
+# Ledger entries older than this no longer count as applied, so their blobs are applied again; 0 keeps them
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "720"))
+
+# Staging blob garbage collection: blobs are deleted once processed, and a sweeper deletes leftovers past the TTL
+STAGING_BLOB_DELETE_ON_SUCCESS = os.getenv("STAGING_BLOB_DELETE_ON_SUCCESS", "true").lower() == "true"
+STAGING_BLOB_TTL_HOURS = int(os.getenv("STAGING_BLOB_TTL_HOURS", "72"))
+STAGING_BLOB_SWEEP_NCRON = os.getenv("STAGING_BLOB_SWEEP_NCRON", "0 30 4 * * *")
+STAGING_CONTAINERS = (
+    SHOW_STAGE_CONTAINER,
+    SHOW_UPSERT_CONTAINER,
+    TVMAZE_SHOW_IDS_CONTAINER,
+    TVMAZE_SEASONS_EPISODES_CONTAINER,
+    TVMAZE_SEASONS_CONTAINER,
+    SEASON_UPSERT_CONTAINER,
+    TVMAZE_EPISODES_CONTAINER,
+    EPISODE_UPSERT_CONTAINER,
+    TVMAZE_UPDATES_CONTAINER
+)
+
+# Database group commit for blob-triggered upserts
+DB_GROUP_COMMIT_MAX_BATCH = int(os.getenv("DB_GROUP_COMMIT_MAX_BATCH", "50"))
+DB_GROUP_COMMIT_MAX_DELAY_MS = int(os.getenv("DB_GROUP_COMMIT_MAX_DELAY_MS", "100"))
+
+# Upsert batches of at least this many rows merge through a temporary staging table; 0 disables
+DB_STAGING_MERGE_MIN_ROWS = int(os.getenv("DB_STAGING_MERGE_MIN_ROWS", "500"))
+
+# Networks and web channels are stored once in their own tables and referenced by ID; false stops also storing
+# the nested JSON on each show and season row, once nothing reads it
+STORE_DIMENSION_JSON = os.getenv("STORE_DIMENSION_JSON", "true").lower() == "true"
+
+# Work items (show IDs or pages) carried per queue message
+QUEUE_MESSAGE_BATCH_SIZE = int(os.getenv("QUEUE_MESSAGE_BATCH_SIZE", "10"))
+
+# Maximum show index pages fetched in parallel on initial ingest
+SHOW_PAGE_MAX_WINDOW = int(os.getenv("SHOW_PAGE_MAX_WINDOW", "8"))
+
+# In-process retries of transient errors (429, 5xx, connection errors, DB deadlocks)
+TRANSIENT_RETRY_ATTEMPTS = int(os.getenv("TRANSIENT_RETRY_ATTEMPTS", "3"))
+TRANSIENT_RETRY_BASE_DELAY_MS = int(os.getenv("TRANSIENT_RETRY_BASE_DELAY_MS", "500"))
+TRANSIENT_RETRY_MAX_DELAY_MS = int(os.getenv("TRANSIENT_RETRY_MAX_DELAY_MS", "8000"))
+
+# In-process retries of database transactions on deadlocks, lock wait timeouts, and lost connections
+DB_RETRY_ATTEMPTS = int(os.getenv("DB_RETRY_ATTEMPTS", "4"))
+DB_RETRY_BASE_DELAY_MS = int(os.getenv("DB_RETRY_BASE_DELAY_MS", "50"))
+DB_RETRY_MAX_DELAY_MS = int(os.getenv("DB_RETRY_MAX_DELAY_MS", "2000"))
+
+# Metrics export: "opentelemetry" also records stage metrics through OpenTelemetry (Application Insights)
+METRICS_EXPORTER = os.getenv("METRICS_EXPORTER", "").lower()
+
+# Sampled profiling: one invocation in PROFILE_SAMPLE_RATE per function (0 disables), "cprofile" or "tracemalloc"
+PROFILE_SAMPLE_RATE = int(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "cprofile").lower()
+PROFILE_FUNCTIONS = frozenset(name.strip() for name in os.getenv("PROFILE_FUNCTIONS", "").split(",") if name.strip())
+PROFILE_CONTAINER = os.getenv("PROFILE_CONTAINER", "profilecontainer")
+
+# Per-logger levels, e.g. "tvbingefriend_show_sync=ERROR,tvbingefriend_show_sync.services.update_service=INFO"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+
+# TV Maze API base URL override, e.g. a local fake server for load tests; empty uses the client's default
+TVMAZE_API_BASE_URL = os.getenv("TVMAZE_API_BASE_URL", "").rstrip("/")
 
 # Update schedule
 UPDATE_SHOWS_NCRON = _get_required_env("UPDATE_SHOWS_NCRON")
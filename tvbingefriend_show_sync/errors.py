@@ -0,0 +1,183 @@
+"""Classification of errors into permanent and transient, with in-process retry for transient ones."""
+import json
+import logging
+import random
+import time
+from typing import Callable, TypeVar
+
+from requests.exceptions import HTTPError
+from sqlalchemy.exc import DBAPIError
+
+from tvbingefriend_show_sync.config import (
+    DB_RETRY_ATTEMPTS,
+    DB_RETRY_BASE_DELAY_MS,
+    DB_RETRY_MAX_DELAY_MS,
+    TRANSIENT_RETRY_ATTEMPTS,
+    TRANSIENT_RETRY_BASE_DELAY_MS,
+    TRANSIENT_RETRY_MAX_DELAY_MS
+)
+from tvbingefriend_show_sync.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PERMANENT = "permanent"
+TRANSIENT = "transient"
+
+TRANSIENT_HTTP_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+TRANSIENT_MYSQL_ERROR_CODES = {
+    1040,  # too many connections
+    1053,  # server shutdown in progress
+    1205,  # lock wait timeout exceeded
+    1213,  # deadlock found when trying to get lock
+    2003,  # can't connect to MySQL server
+    2006,  # MySQL server has gone away
+    2013,  # lost connection to MySQL server during query
+    2055,  # lost connection to MySQL server at a system error
+}
+
+
+class PayloadValidationError(ValueError):
+    """A queue message or staged payload is malformed, so processing it can never succeed"""
+
+
+def get_http_status(error: BaseException) -> int | None:
+    """Get the HTTP status code of a requests HTTPError, if any"""
+    if isinstance(error, HTTPError) and error.response is not None:
+        return error.response.status_code
+    return None
+
+
+def get_mysql_error_code(error: BaseException) -> int | None:
+    """Get the MySQL error code wrapped by a SQLAlchemy DBAPIError, if any"""
+    if isinstance(error, DBAPIError) and error.orig is not None and error.orig.args:
+        code = error.orig.args[0]
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def is_transient_db_error(error: BaseException) -> bool:
+    """Check whether an error is a MySQL deadlock, lock wait timeout, or lost connection
+
+    Args:
+        error (BaseException): Error to check
+
+    Returns:
+        bool: True if re-running the transaction on a fresh connection may succeed
+    """
+    if not isinstance(error, DBAPIError):
+        return False
+    return error.connection_invalidated or get_mysql_error_code(error) in TRANSIENT_MYSQL_ERROR_CODES
+
+
+def classify_error(error: BaseException) -> str:
+    """Classify an error as PERMANENT (retrying cannot help) or TRANSIENT (retrying may succeed)
+
+    Only HTTP 4xx responses other than 408 and 429, undecodable JSON, and PayloadValidationError are PERMANENT.
+    Anything else, including database errors and bugs such as a KeyError, is TRANSIENT, so it keeps the host retry
+    policy and the poison queue rather than being dead-lettered.
+
+    Args:
+        error (BaseException): Error to classify
+
+    Returns:
+        str: PERMANENT or TRANSIENT
+    """
+    status = get_http_status(error)
+    if status is not None:
+        return PERMANENT if 400 <= status < 500 and status not in TRANSIENT_HTTP_STATUS_CODES else TRANSIENT
+
+    if isinstance(error, (json.JSONDecodeError, PayloadValidationError)):  # malformed or invalid payloads
+        return PERMANENT
+
+    return TRANSIENT
+
+
+def get_retry_delay(error: BaseException, attempt: int, base_delay: float, max_delay: float) -> float:
+    """Get the delay before the next attempt using exponential backoff with full jitter
+
+    A Retry-After header on a 429 response is honored when it asks for a longer wait.
+
+    Args:
+        error (BaseException): Error from the failed attempt
+        attempt (int): Number of the failed attempt, starting at 1
+        base_delay (float): Delay cap after the first attempt, in seconds
+        max_delay (float): Largest delay, in seconds
+
+    Returns:
+        float: Seconds to wait
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+    if isinstance(error, HTTPError) and error.response is not None:
+        retry_after = error.response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), max_delay))
+
+    return delay
+
+
+def retry_transient(
+    operation: Callable[[], T],
+    label: str,
+    attempts: int = TRANSIENT_RETRY_ATTEMPTS,
+    base_delay: float = TRANSIENT_RETRY_BASE_DELAY_MS / 1000,
+    max_delay: float = TRANSIENT_RETRY_MAX_DELAY_MS / 1000,
+    is_retriable: Callable[[BaseException], bool] | None = None
+) -> T:
+    """Run an operation, retrying in-process on transient errors
+
+    Args:
+        operation (Callable[[], T]): Operation to run
+        label (str): Name used in log messages
+        attempts (int): Total attempts, including the first
+        base_delay (float): Backoff delay cap after the first attempt, in seconds
+        max_delay (float): Largest backoff delay, in seconds
+        is_retriable (Callable[[BaseException], bool] | None): Decides which errors are retried. Defaults to
+            errors classified as TRANSIENT.
+
+    Returns:
+        T: Result of the operation
+
+    Raises:
+        Exception: A permanent error immediately, or the last transient error once attempts are exhausted.
+    """
+    attempt = 1
+    while True:
+        try:
+            return operation()
+        except Exception as e:
+            retriable = is_retriable(e) if is_retriable else classify_error(e) == TRANSIENT
+            if not retriable or attempt >= attempts:
+                raise
+            delay = get_retry_delay(e, attempt, base_delay, max_delay)
+            logger.warning(
+                "%s: Transient error on attempt %s of %s, retrying in %.2fs: %s", label, attempt, attempts, delay, e
+            )
+            get_registry().increment("transient_retries")
+            time.sleep(delay)
+            attempt += 1
+
+
+def retry_db_transaction(operation: Callable[[], T], label: str) -> T:
+    """Run a database transaction, re-running it on MySQL deadlocks, lock wait timeouts, and lost connections
+
+    The operation must open its own session so every attempt starts a fresh transaction on a fresh connection.
+
+    Args:
+        operation (Callable[[], T]): Transaction to run
+        label (str): Name used in log messages
+
+    Returns:
+        T: Result of the operation
+    """
+    return retry_transient(
+        operation,
+        label=label,
+        attempts=DB_RETRY_ATTEMPTS,
+        base_delay=DB_RETRY_BASE_DELAY_MS / 1000,
+        max_delay=DB_RETRY_MAX_DELAY_MS / 1000,
+        is_retriable=is_transient_db_error
+    )
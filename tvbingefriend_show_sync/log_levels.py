@@ -0,0 +1,48 @@
+"""Per-logger log levels configured with the LOG_LEVELS setting.
+
+Every module logs through logging.getLogger(__name__) with lazily formatted arguments, so a record below its
+logger's level is dropped before its message is built. Setting a module or package level to match the host's
+level in host.json keeps the worker from building records the host would discard.
+"""
+import logging
+
+from tvbingefriend_show_sync.config import LOG_LEVELS
+
+logger = logging.getLogger(__name__)
+
+
+def parse_log_levels(spec: str) -> dict[str, int]:
+    """Parse a comma-separated list of logger=LEVEL pairs
+
+    Args:
+        spec (str): e.g. "tvbingefriend_show_sync=ERROR,tvbingefriend_show_sync.services=INFO"
+
+    Returns:
+        dict[str, int]: Level per logger name; invalid entries are skipped with a warning
+    """
+    levels: dict[str, int] = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        name, _, level_name = entry.partition("=")
+        level = logging.getLevelName(level_name.strip().upper())
+        if not name.strip() or not isinstance(level, int):
+            logger.warning("parse_log_levels: Ignoring invalid LOG_LEVELS entry '%s'", entry)
+            continue
+        levels[name.strip()] = level
+    return levels
+
+
+def configure_log_levels(spec: str = LOG_LEVELS) -> dict[str, int]:
+    """Apply LOG_LEVELS to the named loggers
+
+    Args:
+        spec (str): Levels to apply. Defaults to the LOG_LEVELS setting.
+
+    Returns:
+        dict[str, int]: Levels applied per logger name
+    """
+    levels = parse_log_levels(spec)
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+    return levels
@@ -0,0 +1,246 @@
+"""Per-stage latency and throughput metrics.
+
+Stages are timed into an in-memory registry per worker, exposed as Prometheus text by the metrics route and
+used directly by the benchmarks. With METRICS_EXPORTER=opentelemetry, each measurement is also recorded on an
+OpenTelemetry histogram, which Application Insights collects as a custom metric when the Azure Monitor
+OpenTelemetry distro is installed. Only the standard library is imported unless that exporter is enabled.
+"""
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Generator, Iterable, TypeVar
+
+from tvbingefriend_show_sync.config import METRICS_EXPORTER
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+LATENCY_BUCKETS_MS: tuple[float, ...] = (  # up to an hour, so pipeline lag fits the same histograms
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000, 900000, 3600000
+)
+
+
+class _StageStats:
+    """Count, error count, and latency histogram of one stage"""
+    __slots__ = ("count", "errors", "total_ms", "buckets")
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.errors: int = 0
+        self.total_ms: float = 0.0
+        self.buckets: list[int] = [0] * (len(LATENCY_BUCKETS_MS) + 1)  # last bucket is +Inf
+
+
+class MetricsRegistry:
+    """Thread-safe in-memory store of stage timings and counters for one worker"""
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: dict[str, _StageStats] = {}
+        self._counters: dict[str, int] = {}
+        self._otel: tuple[Any, Any] | None = None
+        self._otel_checked = False
+
+    def observe(self, stage: str, duration_ms: float, error: bool = False) -> None:
+        """Record one run of a stage
+
+        Args:
+            stage (str): Stage name, e.g. 'storage.upload_blob_data'
+            duration_ms (float): Duration in milliseconds
+            error (bool): Whether the run raised
+        """
+        index = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if duration_ms <= bound:
+                index = i
+                break
+
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats()
+            stats.count += 1
+            stats.errors += error
+            stats.total_ms += duration_ms
+            stats.buckets[index] += 1
+
+        otel = self._get_otel()
+        if otel is not None:
+            histogram, _ = otel
+            histogram.record(duration_ms, {"stage": stage, "outcome": "error" if error else "success"})
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Add to a counter
+
+        Args:
+            name (str): Counter name, e.g. 'show_stubs_inserted'
+            value (int): Amount to add
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+        otel = self._get_otel()
+        if otel is not None:
+            _, counter = otel
+            counter.add(value, {"name": name})
+
+    def snapshot(self) -> dict[str, Any]:
+        """Get a copy of every stage and counter
+
+        Returns:
+            dict[str, Any]: {'stages': {stage: {count, errors, total_ms, mean_ms, buckets}}, 'counters': {...}}
+        """
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "total_ms": stats.total_ms,
+                    "mean_ms": stats.total_ms / stats.count if stats.count else 0.0,
+                    "buckets": list(stats.buckets)
+                }
+                for stage, stats in self._stages.items()
+            }
+            return {"stages": stages, "counters": dict(self._counters)}
+
+    def render_prometheus(self) -> str:
+        """Render every stage and counter in the Prometheus text exposition format
+
+        Returns:
+            str: Prometheus text
+        """
+        snapshot = self.snapshot()
+        lines: list[str] = [
+            "# HELP tvbingefriend_stage_duration_ms Stage latency in milliseconds",
+            "# TYPE tvbingefriend_stage_duration_ms histogram"
+        ]
+        for stage, stats in sorted(snapshot["stages"].items()):
+            cumulative = 0
+            for bound, count in zip([*LATENCY_BUCKETS_MS, "+Inf"], stats["buckets"]):
+                cumulative += count
+                lines.append(f'tvbingefriend_stage_duration_ms_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'tvbingefriend_stage_duration_ms_sum{{stage="{stage}"}} {stats["total_ms"]:.3f}')
+            lines.append(f'tvbingefriend_stage_duration_ms_count{{stage="{stage}"}} {stats["count"]}')
+
+        lines += [
+            "# HELP tvbingefriend_stage_errors_total Stage runs that raised",
+            "# TYPE tvbingefriend_stage_errors_total counter"
+        ]
+        for stage, stats in sorted(snapshot["stages"].items()):
+            lines.append(f'tvbingefriend_stage_errors_total{{stage="{stage}"}} {stats["errors"]}')
+
+        lines += [
+            "# HELP tvbingefriend_events_total Pipeline event counters",
+            "# TYPE tvbingefriend_events_total counter"
+        ]
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f'tvbingefriend_events_total{{name="{name}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear every stage and counter"""
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def _get_otel(self) -> tuple[Any, Any] | None:
+        """Get the OpenTelemetry histogram and counter, creating them on first use if the exporter is enabled"""
+        if self._otel_checked:
+            return self._otel
+
+        with self._lock:
+            if not self._otel_checked:
+                self._otel = _create_otel_instruments() if METRICS_EXPORTER == "opentelemetry" else None
+                self._otel_checked = True
+        return self._otel
+
+
+def _create_otel_instruments() -> tuple[Any, Any] | None:
+    """Create OpenTelemetry instruments, configuring Azure Monitor export when the distro is installed"""
+    try:
+        from opentelemetry import metrics as otel_metrics
+    except ImportError:
+        logger.warning("metrics: METRICS_EXPORTER is 'opentelemetry' but opentelemetry-api is not installed")
+        return None
+
+    try:
+        from azure.monitor.opentelemetry import configure_azure_monitor
+        configure_azure_monitor()  # reads APPLICATIONINSIGHTS_CONNECTION_STRING
+    except ImportError:
+        pass  # use whatever meter provider the app configured
+    except Exception as e:
+        logger.warning("metrics: Failed to configure Azure Monitor export: %s", e)
+
+    meter = otel_metrics.get_meter("tvbingefriend_show_sync")
+    histogram = meter.create_histogram("tvbingefriend.stage.duration", unit="ms", description="Stage latency")
+    counter = meter.create_counter("tvbingefriend.events", description="Pipeline event counters")
+    return histogram, counter
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Get the worker-level metrics registry"""
+    return _registry
+
+
+@contextmanager
+def timed(stage: str) -> Generator[None, None, None]:
+    """Time a block as one run of a stage, counting it as an error if it raises
+
+    Args:
+        stage (str): Stage name
+    """
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _registry.observe(stage, (time.perf_counter() - start) * 1000, error)
+
+
+def instrument(stage: str) -> Callable[[F], F]:
+    """Decorate a function so each call is timed as one run of a stage
+
+    The wrapper keeps the function's signature, so it can sit under the Azure Functions trigger decorators.
+
+    Args:
+        stage (str): Stage name
+
+    Returns:
+        Callable[[F], F]: Decorator
+    """
+    def decorator(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with timed(stage):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def instrument_methods(target: Any, prefix: str, method_names: Iterable[str]) -> Any:
+    """Time the given methods of an object whose class we don't own, e.g. the TV Maze client
+
+    Args:
+        target (Any): Object to instrument in place
+        prefix (str): Stage name prefix, e.g. 'tvmaze'
+        method_names (Iterable[str]): Methods to time; missing ones are skipped
+
+    Returns:
+        Any: The same object
+    """
+    for name in method_names:
+        method = getattr(target, name, None)
+        if callable(method):
+            setattr(target, name, instrument(f"{prefix}.{name}")(method))
+    return target
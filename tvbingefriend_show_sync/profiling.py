@@ -0,0 +1,154 @@
+"""Sampled per-invocation profiling of function invocations.
+
+With PROFILE_SAMPLE_RATE set to N, one invocation in N of each function is profiled with cProfile (CPU) or
+tracemalloc (allocations), as chosen by PROFILE_MODE, and the report is uploaded to PROFILE_CONTAINER under
+the function's name. Both profilers are process-wide, so only one invocation is profiled at a time; samples
+that would overlap are skipped. Profiling is off by default, which leaves functions undecorated.
+"""
+import cProfile
+import functools
+import io
+import itertools
+import logging
+import marshal
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, TypeVar
+
+from tvbingefriend_show_sync.config import (
+    PROFILE_CONTAINER,
+    PROFILE_FUNCTIONS,
+    PROFILE_MODE,
+    PROFILE_SAMPLE_RATE
+)
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+REPORT_LINES = 60  # rows of the profile kept in the text report
+
+_profiler_lock = threading.Lock()
+
+
+def is_profiling_enabled(name: str) -> bool:
+    """Check whether invocations of a function are sampled
+
+    Args:
+        name (str): Function name
+
+    Returns:
+        bool: True if PROFILE_SAMPLE_RATE is set and PROFILE_FUNCTIONS is empty or lists the function
+    """
+    return PROFILE_SAMPLE_RATE > 0 and (not PROFILE_FUNCTIONS or name in PROFILE_FUNCTIONS)
+
+
+def profile_with_cprofile(function: Callable[..., Any], *args: Any, **kwargs: Any) -> tuple[Any, dict[str, bytes]]:
+    """Run a function under cProfile
+
+    Returns:
+        tuple[Any, dict[str, bytes]]: Function result, and reports keyed by file extension ('txt' sorted by
+            cumulative time, 'prof' for pstats-compatible viewers such as snakeviz)
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:  # another profiler (e.g. a debugger) holds the process-wide hook
+        logger.warning("profiling: cProfile unavailable, running unprofiled: %s", e)
+        return function(*args, **kwargs), {}
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        profiler.disable()
+
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)  # takes the collected stats from the profiler
+    prof = marshal.dumps(stats.stats)  # the format pstats.Stats reads from a .prof file
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_LINES)
+
+    return result, {"txt": text.getvalue().encode(), "prof": prof}
+
+
+def profile_with_tracemalloc(function: Callable[..., Any], *args: Any, **kwargs: Any) -> tuple[Any, dict[str, bytes]]:
+    """Run a function under tracemalloc
+
+    Returns:
+        tuple[Any, dict[str, bytes]]: Function result, and a 'txt' report of the peak and the largest
+            allocation sites still held when the function returned
+    """
+    tracemalloc.start(10)
+    try:
+        result = function(*args, **kwargs)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    lines = [f"current={current} bytes peak={peak} bytes", ""]
+    lines += [str(stat) for stat in snapshot.statistics("lineno")[:REPORT_LINES]]
+    return result, {"txt": "\n".join(lines).encode()}
+
+
+def upload_reports(name: str, reports: dict[str, bytes], duration_ms: float) -> None:
+    """Upload profile reports as blobs named after the function
+
+    Failures are logged and never fail the invocation.
+
+    Args:
+        name (str): Function name
+        reports (dict[str, bytes]): Report contents keyed by file extension
+        duration_ms (float): Duration of the profiled invocation
+    """
+    from tvbingefriend_show_sync.services.service_container import get_services  # avoid an import cycle
+
+    stem = f"{name}/{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}_{PROFILE_MODE}_{uuid.uuid4().hex[:8]}"
+    try:
+        storage_service = get_services().storage_service
+        for extension, data in reports.items():
+            storage_service.upload_blob_data(
+                container_name=PROFILE_CONTAINER,
+                blob_name=f"{stem}.{extension}",
+                data=data
+            )
+        logger.warning("profiling: Profiled %s (%.0f ms) to %s/%s", name, duration_ms, PROFILE_CONTAINER, stem)
+    except Exception as e:
+        logger.error("profiling: Failed to upload profile of %s: %s", name, e)
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """Decorate a function so one invocation in PROFILE_SAMPLE_RATE is profiled and the report uploaded
+
+    Args:
+        name (str): Function name, used to filter with PROFILE_FUNCTIONS and to name the report blobs
+
+    Returns:
+        Callable[[F], F]: Decorator, returning the function unchanged when profiling is disabled for it
+    """
+    def decorator(function: F) -> F:
+        if not is_profiling_enabled(name):
+            return function
+
+        calls = itertools.count(1)  # next() on itertools.count is atomic under the GIL
+        profile = profile_with_tracemalloc if PROFILE_MODE == "tracemalloc" else profile_with_cprofile
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if next(calls) % PROFILE_SAMPLE_RATE or not _profiler_lock.acquire(blocking=False):
+                return function(*args, **kwargs)
+
+            start = time.perf_counter()
+            reports: dict[str, bytes] = {}
+            try:
+                result, reports = profile(function, *args, **kwargs)
+                return result
+            finally:
+                _profiler_lock.release()
+                if reports:
+                    upload_reports(name, reports, (time.perf_counter() - start) * 1000)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,184 @@
+"""Bulk load of show, season, and episode payloads with LOAD DATA LOCAL INFILE.
+
+For a cold database, LOAD DATA is far faster than any form of INSERT. Payloads (the same shapes the upsert
+methods take) are written to tab-separated files with one column per table column, in table order, and JSON
+columns serialized. Each table's files are loaded into a temporary staging table created LIKE the target, then
+merged with one INSERT ... SELECT ... ON DUPLICATE KEY UPDATE, so the load is idempotent and safe to re-run over
+existing rows. Seasons and episodes give their shows stub rows first, as the group commit does. Shows and seasons
+then have their network and web channel references set from the loaded JSON.
+
+The merge sets every column, so payloads should be complete TV Maze responses. The MySQL server must allow
+local_infile; the client side is enabled on the bulk load engine.
+"""
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Iterable, NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from tvbingefriend_tvmaze_models.models.episode import Episode
+from tvbingefriend_tvmaze_models.models.season import Season
+from tvbingefriend_tvmaze_models.models.show import Show
+
+from tvbingefriend_show_sync.repositories.bulk_upsert import get_table_columns
+from tvbingefriend_show_sync.repositories.dimensions import REFERENCE_COLUMNS, backfill_references
+from tvbingefriend_show_sync.repositories.show_repo import TVMAZE_SHOW_URL
+from tvbingefriend_show_sync.services.group_commit_writer import EPISODE, SEASON, SHOW
+
+logger = logging.getLogger(__name__)
+
+MODELS: dict[str, type] = {SHOW: Show, SEASON: Season, EPISODE: Episode}
+LOAD_ORDER = (SHOW, SEASON, EPISODE)  # parents first
+
+NULL = "\\N"  # LOAD DATA's NULL with the default ESCAPED BY '\\'
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+
+
+class LoadResult(NamedTuple):
+    """Rows and timings of one table's bulk load"""
+    rows: int
+    load_seconds: float
+    merge_seconds: float
+
+
+def payload_to_row(kind: str, payload: dict[str, Any]) -> dict[str, Any] | None:
+    """Get the column values of a show, season, or episode payload
+
+    Args:
+        kind (str): SHOW, SEASON, or EPISODE
+        payload (dict[str, Any]): A show, or {'show_id': int, 'season' | 'episode': dict}
+
+    Returns:
+        dict[str, Any] | None: Values keyed by payload key, or None if the payload has no ID
+    """
+    if kind == SHOW:
+        return payload if payload.get("id") else None
+
+    data: dict[str, Any] | None = payload.get(kind)
+    if not payload.get("show_id") or not data or not data.get("id"):
+        return None
+    return {**data, "show_id": payload["show_id"]}
+
+
+def encode_field(value: Any, is_json: bool) -> str:
+    """Encode one value for a LOAD DATA file with the default field and line escapes"""
+    if value is None:
+        return NULL
+    if is_json:
+        return json.dumps(value, ensure_ascii=False).translate(_ESCAPES)
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value).translate(_ESCAPES)
+
+
+def write_load_file(kind: str, payloads: Iterable[dict[str, Any]], path: str | Path) -> int:
+    """Write payloads as a tab-separated load file for their table
+
+    Args:
+        kind (str): SHOW, SEASON, or EPISODE
+        payloads (Iterable[dict[str, Any]]): Payloads in the shape the upsert methods take
+        path (str | Path): File to write
+
+    Returns:
+        int: Rows written; payloads without IDs are skipped
+    """
+    columns = get_table_columns(MODELS[kind])
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as file:
+        for payload in payloads:
+            row = payload_to_row(kind, payload)
+            if row is None:
+                logger.error("write_load_file: Skipping %s without an id", kind)
+                continue
+            file.write("\t".join(encode_field(row.get(column.key), column.is_json) for column in columns))
+            file.write("\n")
+            rows += 1
+    return rows
+
+
+def get_load_file_paths(directory: str | Path, kind: str) -> list[Path]:
+    """Get the load files of one kind in a directory, named '<kind>-*.tsv'"""
+    return sorted(Path(directory).glob(f"{kind}-*.tsv"))
+
+
+def load_table(kind: str, paths: list[Path], connection: Connection) -> LoadResult:
+    """Load files into a staging table and merge it into the kind's table
+
+    Args:
+        kind (str): SHOW, SEASON, or EPISODE
+        paths (list[Path]): Load files written by write_load_file
+        connection (Connection): Connection in a transaction, on an engine with local_infile enabled
+
+    Returns:
+        LoadResult: Rows merged, and the seconds spent loading and merging
+    """
+    model = MODELS[kind]
+    table: str = model.__table__.name
+    staging = f"_load_{table}"
+    columns = get_table_columns(model)
+    column_list = ", ".join(f"`{column.name}`" for column in columns)
+
+    start = time.perf_counter()
+    connection.execute(text(f"DROP TEMPORARY TABLE IF EXISTS `{staging}`"))
+    connection.execute(text(f"CREATE TEMPORARY TABLE `{staging}` LIKE `{table}`"))  # no foreign keys
+    for path in paths:
+        connection.execute(  # REPLACE: a later file's row wins over an earlier one with the same id
+            text(
+                f"LOAD DATA LOCAL INFILE :path REPLACE INTO TABLE `{staging}` CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({column_list})"
+            ),
+            {"path": str(path)}
+        )
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if kind != SHOW:  # stub parents so the foreign key holds, as ShowRepository.insert_show_stubs does
+        connection.execute(
+            text(
+                f"INSERT IGNORE INTO `{Show.__table__.name}` (`id`, `url`, `name`, `type`) "
+                f"SELECT DISTINCT s.`show_id`, CONCAT(:show_url, '/', s.`show_id`), '', '' FROM `{staging}` AS s "
+                f"ORDER BY s.`show_id`"
+            ),
+            {"show_url": TVMAZE_SHOW_URL}
+        )
+    updates = ", ".join(f"`{column.name}` = s.`{column.name}`" for column in columns if column.name != "id")
+    result = connection.execute(
+        text(
+            f"INSERT INTO `{table}` ({column_list}) "
+            f"SELECT {', '.join(f's.`{column.name}`' for column in columns)} FROM `{staging}` AS s ORDER BY s.`id` "
+            f"ON DUPLICATE KEY UPDATE {updates}"
+        )
+    )
+    if table in REFERENCE_COLUMNS:  # rows were loaded with their nested JSON, so set their dimension references
+        backfill_references(connection, table, staging)
+    rows = connection.execute(text(f"SELECT COUNT(*) FROM `{staging}`")).scalar() or 0
+    connection.execute(text(f"DROP TEMPORARY TABLE `{staging}`"))
+    merge_seconds = time.perf_counter() - start
+
+    logger.info(
+        "load_table: Loaded %s %s rows from %s files in %.1fs and merged in %.1fs (%s affected)",
+        rows, table, len(paths), load_seconds, merge_seconds, result.rowcount
+    )
+    return LoadResult(rows, load_seconds, merge_seconds)
+
+
+def bulk_load_directory(directory: str | Path, engine: Engine) -> dict[str, LoadResult]:
+    """Load every load file in a directory, shows then seasons then episodes, one transaction per table
+
+    Args:
+        directory (str | Path): Directory of '<kind>-*.tsv' files
+        engine (Engine): Engine with local_infile enabled
+
+    Returns:
+        dict[str, LoadResult]: Result per kind that had files
+    """
+    results: dict[str, LoadResult] = {}
+    for kind in LOAD_ORDER:
+        paths = get_load_file_paths(directory, kind)
+        if not paths:
+            continue
+        with engine.begin() as connection:
+            results[kind] = load_table(kind, paths, connection)
+    return results
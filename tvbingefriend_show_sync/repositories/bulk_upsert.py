@@ -0,0 +1,132 @@
+"""Multi-row upsert helpers shared by the repositories."""
+from functools import cache
+from operator import attrgetter
+from typing import Any, NamedTuple, Sequence, TYPE_CHECKING
+
+from sqlalchemy import JSON, Column, Integer, MetaData, Table, inspect
+from sqlalchemy.orm import Session, Mapper
+from sqlalchemy.orm.properties import ColumnProperty
+
+from tvbingefriend_show_sync.repositories.dimensions import REFERENCE_COLUMNS
+
+if TYPE_CHECKING:
+    from tvbingefriend_show_sync.repositories.records import Record
+
+
+class TableColumn(NamedTuple):
+    """A mapped table column"""
+    key: str  # payload key (mapped attribute name)
+    name: str  # database column name
+    is_json: bool
+
+
+@cache
+def get_mapped_columns(model: type) -> frozenset[str]:
+    """Get the column attribute names of a mapped model, computed once per model
+
+    Args:
+        model (type): SQLAlchemy mapped class
+
+    Returns:
+        frozenset[str]: Column attribute names
+    """
+    mapper: Mapper = inspect(model)
+    return frozenset(prop.key for prop in mapper.attrs.values() if isinstance(prop, ColumnProperty))
+
+
+def _get_unmapped_references(model: type) -> tuple[str, ...]:
+    """Get the dimension reference columns of a model's table that the model doesn't map"""
+    source: Table = model.__table__
+    return tuple(name for name in REFERENCE_COLUMNS.get(source.name, ()) if name not in source.c)
+
+
+@cache
+def get_table_columns(model: type) -> tuple[TableColumn, ...]:
+    """Get a model's columns in table order, then any unmapped reference columns, computed once per model
+
+    Args:
+        model (type): SQLAlchemy mapped class
+
+    Returns:
+        tuple[TableColumn, ...]: Columns in table order; reference columns are keyed by their name
+    """
+    mapper: Mapper = inspect(model)
+    return tuple(
+        TableColumn(mapper.get_property_by_column(column).key, column.name, isinstance(column.type, JSON))
+        for column in model.__table__.columns
+    ) + tuple(TableColumn(name, name, False) for name in _get_unmapped_references(model))
+
+
+@cache
+def get_write_table(model: type) -> Table:
+    """Get the table a model's rows are written to, computed once per model
+
+    This is the mapped table, plus the dimension reference columns added by migration that the model doesn't map.
+
+    Args:
+        model (type): SQLAlchemy mapped class
+
+    Returns:
+        Table: Table with every column in get_table_columns
+    """
+    source: Table = model.__table__
+    references = _get_unmapped_references(model)
+    if not references:
+        return source
+    return Table(
+        source.name,
+        MetaData(),
+        *(
+            Column(column.name, column.type, primary_key=column.primary_key, autoincrement=False)
+            for column in source.columns
+        ),
+        *(Column(name, Integer) for name in references)
+    )
+
+
+@cache
+def get_insert_sql(table_name: str, columns: tuple[TableColumn, ...]) -> str:
+    """Get a driver-level INSERT of one row of some columns, for executemany with parameter tuples
+
+    PyMySQL rewrites an executemany of this statement into multi-row INSERTs of up to about 1 MB each.
+    """
+    return (
+        f"INSERT INTO `{table_name}` ({', '.join(f'`{column.name}`' for column in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+
+
+@cache
+def get_upsert_sql(table_name: str, columns: tuple[TableColumn, ...]) -> str:
+    """Get a driver-level INSERT ... ON DUPLICATE KEY UPDATE of some columns, computed once per column set"""
+    sql = get_insert_sql(table_name, columns)
+    update_columns = [column.name for column in columns if column.name != "id"]
+    if not update_columns:  # nothing to update, so existing rows are left as they are
+        return sql.replace("INSERT", "INSERT IGNORE", 1)
+    return sql + " ON DUPLICATE KEY UPDATE " + ", ".join(f"`{name}` = VALUES(`{name}`)" for name in update_columns)
+
+
+def bulk_upsert(model: type, records: Sequence["Record"], db: Session) -> int:
+    """Upsert records with one executemany of INSERT ... ON DUPLICATE KEY UPDATE per distinct column set
+
+    Records are grouped by their columns so a column missing from a payload is left untouched on update. Records
+    are written in primary key order, so concurrent writers lock overlapping rows in the same order and are less
+    likely to deadlock.
+
+    Args:
+        model (type): SQLAlchemy mapped class
+        records (Sequence[Record]): Records of the model's rows
+        db (Session): Database session
+
+    Returns:
+        int: Number of rows sent to the database
+    """
+    table_name: str = get_write_table(model).name
+    groups: dict[tuple[TableColumn, ...], list[tuple[Any, ...]]] = {}
+    for record in sorted(records, key=attrgetter("id")):
+        groups.setdefault(record.columns, []).append(record.values)
+
+    connection = db.connection()
+    for columns, values in groups.items():
+        connection.exec_driver_sql(get_upsert_sql(table_name, columns), values)
+    return len(records)
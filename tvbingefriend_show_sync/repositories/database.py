@@ -1,24 +1,78 @@
-"""Database connection for Azure SQL Database (or MySQL as implied by errors)."""
+"""Database connection for Azure SQL Database (or MySQL as implied by errors).
+
+The engine and session factory are created on first use so that functions which never touch the
+database don't pay for creating them.
+"""
+import threading
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker, Session
 # noinspection PyUnresolvedReferences
 from tvbingefriend_tvmaze_models.models.base import Base
 
 import tvbingefriend_show_sync.config as config
 
-SQLALCHEMY_DATABASE_URL = config.SQLALCHEMY_CONNECTION_STRING
+_lock = threading.Lock()
+_engine: Engine | None = None
+_session_factory: sessionmaker[Session] | None = None
+
+
+def get_engine() -> Engine:
+    """Get the shared database engine, creating it on first use
+
+    Returns:
+        Engine: SQLAlchemy engine
+    """
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                sqlalchemy_database_url = config.get_sqlalchemy_connection_string()
+
+                if not sqlalchemy_database_url:
+                    raise ValueError("SQLALCHEMY_CONNECTION_STRING is not set in the configuration.")
+
+                _engine = create_engine(
+                    sqlalchemy_database_url,
+                    pool_size=5,          # Number of connections to keep open in the pool
+                    max_overflow=10,      # Number of connections that can be opened beyond pool_size
+                    pool_recycle=1800,    # Recycle connections after 30 minutes (important for MySQL)
+                    pool_timeout=30,      # How long to wait for a connection from the pool
+                    pool_pre_ping=True    # Enable "pre-ping" to test connections before checkout
+                )
+    return _engine
+
+
+def get_session_factory() -> sessionmaker[Session]:
+    """Get the shared session factory, creating it on first use
+
+    Returns:
+        sessionmaker[Session]: Session factory bound to the shared engine
+    """
+    global _session_factory
+    if _session_factory is None:
+        engine = get_engine()
+        with _lock:
+            if _session_factory is None:
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return _session_factory
+
+
+
+def create_bulk_load_engine() -> Engine:
+    """Create an engine that allows LOAD DATA LOCAL INFILE, for bulk loads outside the function app
 
-if not SQLALCHEMY_DATABASE_URL:
-    raise ValueError("SQLALCHEMY_CONNECTION_STRING is not set in the configuration.")
+    Returns:
+        Engine: SQLAlchemy engine with the client's local_infile enabled
+    """
+    sqlalchemy_database_url = config.get_sqlalchemy_connection_string()
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_size=5,          # Number of connections to keep open in the pool
-    max_overflow=10,      # Number of connections that can be opened beyond pool_size
-    pool_recycle=1800,    # Recycle connections after 30 minutes (important for MySQL)
-    pool_timeout=30,      # How long to wait for a connection from the pool
-    pool_pre_ping=True    # Enable "pre-ping" to test connections before checkout
-)
+    if not sqlalchemy_database_url:
+        raise ValueError("SQLALCHEMY_CONNECTION_STRING is not set in the configuration.")
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return create_engine(
+        sqlalchemy_database_url,
+        connect_args={"local_infile": True},  # PyMySQL refuses LOAD DATA LOCAL without it
+        pool_pre_ping=True
+    )
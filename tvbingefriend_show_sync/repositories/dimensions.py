@@ -0,0 +1,205 @@
+"""Network and web channel dimension tables referenced by shows and seasons.
+
+TV Maze embeds the full network or web channel object in every show and season, and a few thousand distinct
+objects repeat across hundreds of thousands of rows. Each distinct object is stored once in the networks or
+webchannels table, and shows and seasons reference it through network_id and webchannel_id. Objects already
+written by this worker are remembered in an in-process cache, so a batch only sends the ones that are new or
+changed.
+
+The models package doesn't map the reference columns, so these tables are defined here with SQLAlchemy Core and
+the reference columns are added to the write table of shows and seasons (see bulk_upsert.get_write_table). The
+nested JSON is still stored unless STORE_DIMENSION_JSON is false.
+"""
+import logging
+import threading
+from typing import Any, NamedTuple
+
+from sqlalchemy import JSON, Column, Integer, MetaData, String, Table, event, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from tvbingefriend_show_sync.config import STORE_DIMENSION_JSON
+from tvbingefriend_show_sync.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+
+def _dimension_table(name: str) -> Table:
+    """Define a dimension table, keyed by the TV Maze ID"""
+    return Table(
+        name,
+        metadata,
+        Column("id", Integer, primary_key=True, autoincrement=False),
+        Column("name", String(255)),
+        Column("country", JSON),
+        Column("officialSite", String(255))
+    )
+
+
+networks = _dimension_table("networks")
+webchannels = _dimension_table("webchannels")
+
+
+class Dimension(NamedTuple):
+    """A nested TV Maze object stored in its own table"""
+    name: str
+    table: Table
+    payload_keys: tuple[str, ...]  # keys the object may have in a payload or row
+    json_column: str  # column of shows and seasons holding the nested JSON
+    reference: str  # column of shows and seasons referencing the table
+
+
+DIMENSIONS: tuple[Dimension, ...] = (
+    Dimension("network", networks, ("network",), "network", "network_id"),
+    Dimension("webchannel", webchannels, ("webChannel", "webchannel"), "webchannel", "webchannel_id"),
+)
+
+# Tables referencing the dimensions, with their reference columns
+REFERENCE_COLUMNS: dict[str, tuple[str, ...]] = {
+    "shows": tuple(dimension.reference for dimension in DIMENSIONS),
+    "seasons": tuple(dimension.reference for dimension in DIMENSIONS),
+}
+
+
+class DimensionCache:
+    """Dimension rows known to be stored, keyed by dimension name and ID"""
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rows: dict[str, dict[int, dict[str, Any]]] = {dimension.name: {} for dimension in DIMENSIONS}
+
+    def is_stored(self, name: str, row: dict[str, Any]) -> bool:
+        """Check whether this exact row is stored"""
+        with self._lock:
+            return self._rows[name].get(row["id"]) == row
+
+    def remember(self, name: str, rows: list[dict[str, Any]]) -> None:
+        """Record rows as stored"""
+        with self._lock:
+            self._rows[name].update((row["id"], row) for row in rows)
+
+    def clear(self) -> None:
+        """Forget every row, e.g. after the tables were rebuilt"""
+        with self._lock:
+            for rows in self._rows.values():
+                rows.clear()
+
+
+_cache = DimensionCache()
+
+
+def get_dimension_cache() -> DimensionCache:
+    """Get the worker-level dimension cache"""
+    return _cache
+
+
+def to_dimension_row(value: dict[str, Any]) -> dict[str, Any]:
+    """Get the dimension table row of a nested network or web channel object"""
+    return {
+        "id": value["id"],
+        "name": value.get("name"),
+        "country": value.get("country"),
+        "officialSite": value.get("officialSite")
+    }
+
+
+def extract_dimensions(payload: dict[str, Any], found: dict[str, dict[int, Any]]) -> dict[str, Any]:
+    """Get a row's reference columns from the nested objects of its payload, collecting the objects
+
+    A payload without the key leaves the reference out, so an upsert leaves it untouched, as with any missing
+    column. When STORE_DIMENSION_JSON is false, the nested JSON is cleared as well.
+
+    Args:
+        payload (dict[str, Any]): Show or season payload from TV Maze
+        found (dict[str, dict[int, Any]]): Dimension rows by dimension name and ID, updated in place
+
+    Returns:
+        dict[str, Any]: Column values to set over the payload's, keyed by reference column or payload key
+    """
+    columns: dict[str, Any] = {}
+    for dimension in DIMENSIONS:
+        key = next((key for key in dimension.payload_keys if key in payload), None)
+        if key is None:
+            continue
+        value = payload[key]
+        if isinstance(value, dict) and value.get("id"):
+            columns[dimension.reference] = value["id"]
+            found.setdefault(dimension.name, {})[value["id"]] = to_dimension_row(value)
+        else:
+            columns[dimension.reference] = None
+        if not STORE_DIMENSION_JSON:
+            columns.update(dict.fromkeys(dimension.payload_keys))
+    return columns
+
+
+def upsert_dimensions(found: dict[str, dict[int, Any]], db: Session) -> int:
+    """Upsert the dimension rows this worker hasn't stored yet, or stored with other values
+
+    Rows are only added to the cache once the session commits, so a rolled-back batch is written again.
+
+    Args:
+        found (dict[str, dict[int, Any]]): Dimension rows by dimension name and ID, from extract_dimensions
+        db (Session): Database session
+
+    Returns:
+        int: Number of rows sent to the database
+    """
+    written = 0
+    for dimension in DIMENSIONS:
+        rows = [
+            row for _, row in sorted(found.get(dimension.name, {}).items())  # primary key order, as in bulk_upsert
+            if not _cache.is_stored(dimension.name, row)
+        ]
+        if not rows:
+            continue
+
+        stmt = mysql_insert(dimension.table).values(rows)
+        stmt = stmt.on_duplicate_key_update({
+            column.name: stmt.inserted[column.name] for column in dimension.table.columns if column.name != "id"
+        })
+        db.execute(stmt)
+        event.listen(
+            db, "after_commit", lambda _, name=dimension.name, stored=rows: _cache.remember(name, stored), once=True
+        )
+        written += len(rows)
+
+    if written:
+        get_registry().increment("dimension_rows_written", written)
+    return written
+
+
+def backfill_references(connection: Connection | Session, table_name: str, staging_table: str | None = None) -> None:
+    """Upsert the dimension rows of a table's stored JSON and set its reference columns from it
+
+    Used after a bulk load, whose rows are written with their nested JSON and no references. When
+    STORE_DIMENSION_JSON is false, the JSON is cleared once the references are set.
+
+    Args:
+        connection (Connection | Session): Connection or session in a transaction
+        table_name (str): 'shows' or 'seasons'
+        staging_table (str | None): Table holding the IDs of the rows to backfill; None backfills every row
+    """
+    join = f"JOIN `{staging_table}` AS s ON s.`id` = t.`id` " if staging_table else ""
+    for dimension in DIMENSIONS:
+        nested = f"t.`{dimension.json_column}`"
+        has_id = f"JSON_TYPE({nested}->'$.id') = 'INTEGER'"  # NULL unless the JSON is an object with an ID
+        connection.execute(text(
+            f"INSERT INTO `{dimension.table.name}` (`id`, `name`, `country`, `officialSite`) "
+            f"SELECT * FROM ("
+            f"SELECT CAST({nested}->>'$.id' AS UNSIGNED) AS `id`, "
+            f"NULLIF({nested}->>'$.name', 'null') AS `name`, "
+            f"IF(JSON_TYPE({nested}->'$.country') = 'OBJECT', {nested}->'$.country', NULL) AS `country`, "
+            f"NULLIF({nested}->>'$.officialSite', 'null') AS `officialSite` "
+            f"FROM `{table_name}` AS t {join}WHERE {has_id} ORDER BY `id`"
+            f") AS d "
+            f"ON DUPLICATE KEY UPDATE `name` = d.`name`, `country` = d.`country`, `officialSite` = d.`officialSite`"
+        ))
+        connection.execute(text(
+            f"UPDATE `{table_name}` AS t {join}"
+            f"SET t.`{dimension.reference}` = IF({has_id}, CAST({nested}->>'$.id' AS UNSIGNED), NULL)"
+        ))
+        if not STORE_DIMENSION_JSON:  # separately: a multi-table UPDATE may assign in any order
+            connection.execute(text(f"UPDATE `{table_name}` AS t {join}SET {nested} = NULL"))
+    _cache.clear()  # rows were written behind the cache's back
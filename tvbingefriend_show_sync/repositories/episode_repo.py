@@ -2,83 +2,48 @@
 import logging
 from typing import Any
 
-from sqlalchemy import inspect
-from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session, Mapper
-from sqlalchemy.orm.properties import ColumnProperty
+from sqlalchemy.orm import Session
 from tvbingefriend_tvmaze_models.models.episode import Episode
 
+from tvbingefriend_show_sync.metrics import instrument
+from tvbingefriend_show_sync.repositories.records import EpisodeRecord
+from tvbingefriend_show_sync.repositories.staging_merge import upsert_rows
+
+logger = logging.getLogger(__name__)
+
 
 # noinspection PyMethodMayBeStatic
 class EpisodeRepository:
     """Repository for episodes."""
-    def upsert_episode(self, episode: dict[str, Any], db: Session) -> None:
-        """Upsert an episode in the database
+    @instrument("db.upsert_episodes")
+    def upsert_episodes(self, episodes: list[dict[str, Any]], db: Session, prune_missing: bool = False) -> None:
+        """Upsert multiple episodes in the database with multi-row statements
 
         Args:
-            episode (dict[str, Any]): Episode to upsert
+            episodes (list[dict[str, Any]]): Episodes to upsert, each with a show_id and episode
             db (Session): Database session
-        """
-        logging.info(
-            msg="EpisodeRepository.upsert_episode: Upserting episode"
-        )
-
-        show_id = episode.get('show_id')  # get show_id from episode
-        logging.debug(
-            msg=f"EpisodeRepository.upsert_episode: show_id: {show_id}"
-        )
-
-        episode_data: dict[str, Any] = episode.get('episode')  # get episode from episode
-
-        if not show_id or not episode_data:  # if show_id or episode is missing, log error and return
-            logging.error(
-                msg="EpisodeRepository.upsert_episode: Episode must have both show_id and episode_data"
-            )
-            return
-
-        episode_id: int | None = episode_data.get('id')  # get episode_id from episode
-        logging.debug(
-            msg=f"EpisodeRepository.upsert_episode: episode_id: {episode_id}"
-        )
+            prune_missing (bool): Whether episodes holds every episode of its shows, so their stored episodes
+                missing from it are deleted
 
-        if not episode_id:  # if episode_id is missing, log error and return
-            logging.error(
-                msg="EpisodeRepository.upsert_episode: Episode must have episode_id"
-            )
+        Raises:
+            SQLAlchemyError: If the upsert fails, so the caller's transaction can be rolled back.
+        """
+        records: list[EpisodeRecord] = []
+        for episode in episodes:
+            record: EpisodeRecord | None = EpisodeRecord.from_payload(episode)
+            if record is None:
+                logger.error("EpisodeRepository.upsert_episodes: Skipping episode without a show_id and episode_id")
+                continue
+            records.append(record)
+
+        if not records:
             return
 
-        logging.info(
-            msg=f"EpisodeRepository.upsert_episode: Upserting episode ID {episode_id} for show ID {show_id}"
-        )
-
-        mapper: Mapper = inspect(Episode)  # get mapper for Episode
-        episode_columns: set[str] = {  # get columns for Episode
-            prop.key for prop in mapper.attrs.values() if isinstance(prop, ColumnProperty)
-        }
-
-        insert_values: dict[str, Any] = {  # create insert values
-            key: value for key, value in episode_data.items() if key in episode_columns
-        }
-        insert_values['id'] = episode_id  # set id
-        insert_values['show_id'] = show_id  # set show_id
-
-        update_values: dict[str, Any] = {  # create update values
-            key: value for key, value in insert_values.items() if key != 'id'
-        }
-
         try:
-            stmt: mysql_insert = mysql_insert(Episode).values(insert_values)  # create insert statement
-            stmt = stmt.on_duplicate_key_update(**update_values)  # create duplicate key update statement
-
-            db.execute(stmt)  # execute insert statement
-            db.flush()  # flush changes
-
-        except SQLAlchemyError as e:  # catch any SQLAchemy errors and log them
-            logging.error(
-                msg=f"Database error during upsert of episode_id {episode_id}: {e}"
-            )
-        except Exception as e:  # catch any other errors and log them
-            logging.error(
-                msg=f"Unexpected error during upsert of episode_id {episode_id}: {e}"
+            upsert_rows(Episode, records, db, {record.get("show_id") for record in records} if prune_missing else None)
+        except SQLAlchemyError as e:
+            logger.error(
+                "EpisodeRepository.upsert_episodes: Database error during upsert of %s episodes: %s", len(records), e
             )
+            raise
@@ -0,0 +1,127 @@
+"""Compact row records for the multi-row upsert paths.
+
+A TV Maze payload carries more keys than its table has columns, and season and episode payloads are wrapped with
+their show ID. A record keeps only the columns its payload has, in table order: a tuple of values, with JSON
+columns already serialized, and the tuple of those columns, shared by every record with the same column set.
+Records are grouped by their column tuple and their values passed to the driver as executemany parameter tuples,
+so no filtered or renamed dict is built per row between the decoded payload and the database.
+"""
+import json
+from typing import Any, ClassVar, Mapping, Self
+
+from tvbingefriend_tvmaze_models.models.episode import Episode
+from tvbingefriend_tvmaze_models.models.season import Season
+from tvbingefriend_tvmaze_models.models.show import Show
+
+from tvbingefriend_show_sync.repositories.bulk_upsert import TableColumn, get_table_columns
+from tvbingefriend_show_sync.repositories.dimensions import extract_dimensions
+
+_column_sets: dict[tuple[TableColumn, ...], tuple[TableColumn, ...]] = {}
+
+
+def encode_json(value: Any) -> str:
+    """Serialize a JSON column value as SQLAlchemy's JSON type would, None becoming JSON 'null' rather than NULL"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class Record:
+    """Column values of one row, for the columns its payload has"""
+    __slots__ = ("id", "columns", "values")
+
+    model: ClassVar[type]  # SQLAlchemy mapped class of the table
+    has_dimensions: ClassVar[bool] = False  # whether payloads embed a network and web channel
+
+    def __init__(self, record_id: int, columns: tuple[TableColumn, ...], values: tuple[Any, ...]) -> None:
+        self.id = record_id
+        self.columns = columns
+        self.values = values
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get the value of a column by payload key, as dict.get does"""
+        for column, value in zip(self.columns, self.values):
+            if column.key == key:
+                return value
+        return default
+
+    @classmethod
+    def from_values(cls, values: Mapping[str, Any], extra: Mapping[str, Any] | None = None) -> Self:
+        """Get the record of a row's values, keeping only the model's columns
+
+        Args:
+            values (Mapping[str, Any]): Values keyed by mapped attribute, e.g. a decoded TV Maze object
+            extra (Mapping[str, Any] | None): Values set over those, e.g. the show_id of a season
+
+        Returns:
+            Self: Record of the columns present in values or extra
+        """
+        extra = extra or {}
+        present = tuple(
+            column for column in get_table_columns(cls.model) if column.key in extra or column.key in values
+        )
+        columns = _column_sets.setdefault(present, present)  # one shared tuple per column set
+        row = (extra[column.key] if column.key in extra else values[column.key] for column in columns)
+        return cls(
+            extra.get("id", values.get("id")),
+            columns,
+            tuple(encode_json(value) if column.is_json else value for column, value in zip(columns, row))
+        )
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any], dimensions: dict[str, dict[int, Any]] | None = None) -> Self | None:
+        """Get the record of an upsert payload
+
+        Args:
+            payload (dict[str, Any]): Upsert payload, as read from the staging blob
+            dimensions (dict[str, dict[int, Any]] | None): Networks and web channels by name and ID, updated with
+                the ones the payload references
+
+        Returns:
+            Self | None: Record, or None if the payload has no ID
+        """
+        if not payload.get("id"):
+            return None
+        return cls.from_values(payload, cls._get_references(payload, dimensions))
+
+    @classmethod
+    def _get_references(cls, data: dict[str, Any], dimensions: dict[str, dict[int, Any]] | None) -> dict[str, Any]:
+        """Get the dimension references of a payload, collecting the dimension rows"""
+        if not cls.has_dimensions:
+            return {}
+        return extract_dimensions(data, dimensions if dimensions is not None else {})
+
+
+class ShowRecord(Record):
+    """Show row"""
+    __slots__ = ()
+    model = Show
+    has_dimensions = True
+
+
+class ChildRecord(Record):
+    """Row of a show's child, whose payload is {'show_id': int, <payload_key>: dict}"""
+    __slots__ = ()
+    payload_key: ClassVar[str]
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any], dimensions: dict[str, dict[int, Any]] | None = None) -> Self | None:
+        """Get the record of an upsert payload, or None if it has no show_id or ID"""
+        show_id: int | None = payload.get("show_id")
+        data: dict[str, Any] | None = payload.get(cls.payload_key)
+        if not show_id or not data or not data.get("id"):
+            return None
+        return cls.from_values(data, {**cls._get_references(data, dimensions), "show_id": show_id})
+
+
+class SeasonRecord(ChildRecord):
+    """Season row"""
+    __slots__ = ()
+    model = Season
+    payload_key = "season"
+    has_dimensions = True
+
+
+class EpisodeRecord(ChildRecord):
+    """Episode row"""
+    __slots__ = ()
+    model = Episode
+    payload_key = "episode"
@@ -2,14 +2,25 @@
 import logging
 from typing import Any
 
-from sqlalchemy import inspect, select
+from sqlalchemy import exists, func, or_, select
 from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.engine.result import Result
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session, Mapper, ColumnProperty
+from sqlalchemy.orm import Session
 
+from tvbingefriend_tvmaze_models.models.episode import Episode
+from tvbingefriend_tvmaze_models.models.season import Season
 from tvbingefriend_tvmaze_models.models.show import Show
 
+from tvbingefriend_show_sync.metrics import instrument
+from tvbingefriend_show_sync.repositories.dimensions import upsert_dimensions
+from tvbingefriend_show_sync.repositories.records import ShowRecord
+from tvbingefriend_show_sync.repositories.staging_merge import upsert_rows
+
+logger = logging.getLogger(__name__)
+
+TVMAZE_SHOW_URL = "https://www.tvmaze.com/shows"
+
 
 # noinspection PyMethodMayBeStatic
 class ShowRepository:
@@ -18,7 +29,7 @@ class ShowRepository:
         """Get all show ids"""
         try:
             stmt: select = select(Show.id)  # create select statement
-            logging.debug(f"ShowRepository.get_all_show_ids: stmt: {stmt}")
+            logger.debug("ShowRepository.get_all_show_ids: stmt: %s", stmt)
 
             result: Result[tuple[int]] = db.execute(stmt)  # execute select statement
 
@@ -27,49 +38,107 @@ class ShowRepository:
             return show_ids
 
         except SQLAlchemyError as e:  # catch any SQLAchemy errors, log them, and return None
-            logging.error(f"ShowRepository.get_all_show_ids: Database error during get_all_show_ids: {e}")
+            logger.error("ShowRepository.get_all_show_ids: Database error during get_all_show_ids: %s", e)
             return None
         except Exception as e:  # catch any other errors, log them, and return None
-            logging.error(f"ShowRepository.get_all_show_ids: Unexpected error during get_all_show_ids: {e}")
+            logger.error("ShowRepository.get_all_show_ids: Unexpected error during get_all_show_ids: %s", e)
             return None
 
-    def upsert_show(self, show: dict[str, Any], db: Session) -> None:
-        """Upsert a show in the database
+    def get_show_ids_missing_seasons_episodes(self, db: Session) -> list[int] | None:
+        """Get ids of shows with no stored seasons or no stored episodes
 
-        Args:
-            show (dict[str, Any]): Show to upsert
-            db (Session): Database session
+        Uses NOT EXISTS anti-joins, which MySQL resolves against the show_id foreign key indexes.
         """
-        show_id: int | None = show.get("id")  # get show_id from show
-        logging.debug(f"ShowRepository.upsert_show: show_id: {show_id}")
+        try:
+            stmt: select = select(Show.id).where(
+                or_(
+                    ~exists().where(Season.show_id == Show.id),
+                    ~exists().where(Episode.show_id == Show.id)
+                )
+            )
+            logger.debug("ShowRepository.get_show_ids_missing_seasons_episodes: stmt: %s", stmt)
 
-        if not show_id:  # if show_id is missing, log error and return
-            logging.error(f"show_repository.upsert_show: Error upserting show: Show must have a show_id")
-            return
+            return [row[0] for row in db.execute(stmt)]
+
+        except SQLAlchemyError as e:  # catch any SQLAchemy errors, log them, and return None
+            logger.error(
+                "ShowRepository.get_show_ids_missing_seasons_episodes: Database error during "
+                "get_show_ids_missing_seasons_episodes: %s", e
+            )
+            return None
+
+    def get_max_show_id(self, db: Session) -> int | None:
+        """Get the highest stored show id
+
+        Returns:
+            int | None: Highest show id, or None if no shows are stored
+        """
+        try:
+            return db.execute(select(func.max(Show.id))).scalar()
+        except SQLAlchemyError as e:
+            logger.error("ShowRepository.get_max_show_id: Database error during get_max_show_id: %s", e)
+            return None
 
-        mapper: Mapper = inspect(Show)  # get show mapper
-        show_columns: set[str] = {  # get show columns
-            prop.key for prop in mapper.attrs.values() if isinstance(prop, ColumnProperty)
-        }
+    @instrument("db.insert_show_stubs")
+    def insert_show_stubs(self, show_ids: set[int], db: Session) -> int:
+        """Insert placeholder rows for shows that aren't stored yet, leaving existing shows untouched
 
-        insert_values: dict[str, Any] = {  # create insert values
-            key: value for key, value in show.items() if key in show_columns
-        }
-        insert_values["id"] = show_id  # add id value to insert values
+        Seasons and episodes reference shows.id, so a stub lets them be written before the full show arrives.
+        The stub is overwritten by the next upsert of the show.
 
-        update_values: dict[str, Any] = {  # create update values
-            key: value for key, value in insert_values.items() if key != "id"
-        }
+        Args:
+            show_ids (set[int]): Show IDs that must exist
+            db (Session): Database session
+
+        Returns:
+            int: Number of stubs inserted, i.e. shows that were missing
+
+        Raises:
+            SQLAlchemyError: If the insert fails, so the caller's transaction can be rolled back.
+        """
+        if not show_ids:
+            return 0
+
+        rows: list[dict[str, Any]] = [  # url, name, and type are NOT NULL
+            {"id": show_id, "url": f"{TVMAZE_SHOW_URL}/{show_id}", "name": "", "type": ""}
+            for show_id in sorted(show_ids)  # primary key order, as in bulk_upsert
+        ]
 
         try:
+            stmt: mysql_insert = mysql_insert(Show).values(rows).prefix_with("IGNORE")
+            result = db.execute(stmt)
+            db.flush()
+            return result.rowcount
+        except SQLAlchemyError as e:
+            logger.error("ShowRepository.insert_show_stubs: Database error during insert of %s stubs: %s", len(rows), e)
+            raise
+
+    @instrument("db.upsert_shows")
+    def upsert_shows(self, shows: list[dict[str, Any]], db: Session) -> None:
+        """Upsert multiple shows in the database with multi-row statements
 
-            stmt: mysql_insert = mysql_insert(Show).values(insert_values)  # create insert statement
-            stmt = stmt.on_duplicate_key_update(**update_values)  # add duplicate key update statement
+        Args:
+            shows (list[dict[str, Any]]): Shows to upsert
+            db (Session): Database session
 
-            db.execute(stmt)  # execute insert statement
-            db.flush()  # flush changes
+        Raises:
+            SQLAlchemyError: If the upsert fails, so the caller's transaction can be rolled back.
+        """
+        records: list[ShowRecord] = []
+        dimensions: dict[str, dict[int, Any]] = {}  # networks and web channels referenced by the shows
+        for show in shows:
+            record: ShowRecord | None = ShowRecord.from_payload(show, dimensions)
+            if record is None:  # skip shows without an id
+                logger.error("ShowRepository.upsert_shows: Skipping show without a show_id")
+                continue
+            records.append(record)
+
+        if not records:
+            return
 
-        except SQLAlchemyError as e:  # catch any SQLAchemy errors and log them
-            logging.error(f"show_repository.upsert_show: Database error during upsert of show_id {show_id}: {e}")
-        except Exception as e:  # catch any other errors and log them
-            logging.error(f"show_repository.upsert_show: Unexpected error during upsert of show show_id {show_id}: {e}")
+        try:
+            upsert_dimensions(dimensions, db)  # before the shows, which reference them
+            upsert_rows(Show, records, db)
+        except SQLAlchemyError as e:
+            logger.error("ShowRepository.upsert_shows: Database error during upsert of %s shows: %s", len(records), e)
+            raise
@@ -0,0 +1,202 @@
+"""Set-based merge of large upsert batches through session-local temporary tables.
+
+A multi-row INSERT ... ON DUPLICATE KEY UPDATE locks and rewrites every row it touches, changed or not. For large
+batches, rows are instead bulk-inserted into a temporary table (private to the connection, so concurrent writers
+never contend on it) and merged into the target with set-based statements:
+
+1. UPDATE ... JOIN changes only rows whose values differ, leaving unchanged rows untouched
+2. INSERT ... SELECT ... LEFT JOIN adds the rows the table doesn't have
+3. Optionally, DELETE ... LEFT JOIN removes a show's stored rows that its batch no longer has
+
+Everything runs in the caller's transaction (creating and dropping a temporary table doesn't commit), so a batch
+is still one short transaction. Batches smaller than DB_STAGING_MERGE_MIN_ROWS go through bulk_upsert, which is
+faster when there is little to stage.
+"""
+import logging
+import time
+from operator import attrgetter
+from typing import Any, NamedTuple, Sequence, TYPE_CHECKING
+
+from sqlalchemy import Column, MetaData, Table, bindparam, text
+from sqlalchemy.orm import Session
+
+from tvbingefriend_show_sync.config import DB_STAGING_MERGE_MIN_ROWS
+from tvbingefriend_show_sync.metrics import get_registry
+from tvbingefriend_show_sync.repositories.bulk_upsert import (
+    TableColumn,
+    bulk_upsert,
+    get_insert_sql,
+    get_table_columns,
+    get_write_table
+)
+
+if TYPE_CHECKING:
+    from tvbingefriend_show_sync.repositories.records import Record
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("stage", "update", "insert", "delete")
+
+
+class MergeResult(NamedTuple):
+    """Row counts and per-phase timings of one merge"""
+    rows: int
+    updated: int
+    inserted: int
+    deleted: int
+    seconds: dict[str, float]  # keyed by phase in PHASES
+
+
+def create_staging_table(model: type, columns: tuple[TableColumn, ...], db: Session) -> Table:
+    """Create a temporary table with some of a model's columns, keyed by 'id' and otherwise nullable
+
+    Only the given columns are staged, so NOT NULL columns a partial payload leaves out don't fail the insert.
+    """
+    source: Table = get_write_table(model)
+    staging = Table(
+        f"_merge_{source.name}",
+        MetaData(),
+        *(
+            Column(column.name, source.c[column.name].type, primary_key=column.name == "id", autoincrement=False)
+            for column in columns
+        ),
+        prefixes=["TEMPORARY"]
+    )
+    db.execute(text(f"DROP TEMPORARY TABLE IF EXISTS `{staging.name}`"))
+    staging.create(db.connection())
+    return staging
+
+
+def latest_records(records: Sequence["Record"]) -> list["Record"]:
+    """Keep the last record of each ID, as ON DUPLICATE KEY UPDATE lets the last row win in bulk_upsert
+
+    The staging tables have a primary key on id, so a batch repeating an ID (e.g. a blob delivered twice) would
+    otherwise fail with a duplicate entry error.
+    """
+    return list({record.id: record for record in records}.values())
+
+
+def merge_rows(
+    model: type,
+    records: Sequence["Record"],
+    db: Session,
+    prune_show_ids: set[int] | None = None
+) -> MergeResult:
+    """Merge records into a model's table through a temporary staging table
+
+    Records are grouped by their columns, as in bulk_upsert, so a column missing from a payload is left untouched.
+    A repeated ID keeps only its last record.
+
+    Args:
+        model (type): SQLAlchemy mapped class
+        records (Sequence[Record]): Records of the model's rows
+        db (Session): Database session
+        prune_show_ids (set[int] | None): For seasons or episodes, shows whose complete set of rows is in the
+            batch; their stored rows missing from it are deleted. None deletes nothing.
+
+    Returns:
+        MergeResult: Rows merged, updated, inserted, and deleted, and seconds per phase
+    """
+    table_name: str = model.__table__.name
+    seconds = dict.fromkeys(PHASES, 0.0)
+    updated = inserted = deleted = 0
+    records = latest_records(records)
+
+    groups: dict[tuple[TableColumn, ...], list[tuple[Any, ...]]] = {}
+    for record in sorted(records, key=attrgetter("id")):
+        groups.setdefault(record.columns, []).append(record.values)
+
+    for columns, values in groups.items():
+        start = time.perf_counter()
+        staging = create_staging_table(model, columns, db)
+        db.connection().exec_driver_sql(get_insert_sql(staging.name, columns), values)
+        seconds["stage"] += time.perf_counter() - start
+
+        names = [column.name for column in columns]
+        update_names = [name for name in names if name != "id"]
+        if update_names:
+            start = time.perf_counter()
+            result = db.execute(text(
+                f"UPDATE `{table_name}` AS t JOIN `{staging.name}` AS s ON t.`id` = s.`id` "
+                f"SET {', '.join(f't.`{name}` = s.`{name}`' for name in update_names)} "
+                f"WHERE NOT ({' AND '.join(f't.`{name}` <=> s.`{name}`' for name in update_names)})"
+            ))
+            updated += result.rowcount
+            seconds["update"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = db.execute(text(
+            f"INSERT INTO `{table_name}` ({', '.join(f'`{name}`' for name in names)}) "
+            f"SELECT {', '.join(f's.`{name}`' for name in names)} FROM `{staging.name}` AS s "
+            f"LEFT JOIN `{table_name}` AS t ON t.`id` = s.`id` WHERE t.`id` IS NULL ORDER BY s.`id`"
+        ))
+        inserted += result.rowcount
+        seconds["insert"] += time.perf_counter() - start
+        staging.drop(db.connection())
+
+    if prune_show_ids:
+        start = time.perf_counter()
+        deleted = delete_missing_rows(model, records, prune_show_ids, db)
+        seconds["delete"] += time.perf_counter() - start
+
+    registry = get_registry()
+    for phase, phase_seconds in seconds.items():
+        if phase_seconds:
+            registry.observe(f"db.merge.{table_name}.{phase}", phase_seconds * 1000)
+    logger.debug(
+        "merge_rows: %s: %s rows, %s updated, %s inserted, %s deleted (%s)",
+        table_name, len(records), updated, inserted, deleted,
+        ", ".join(f"{phase} {phase_seconds * 1000:.0f} ms" for phase, phase_seconds in seconds.items())
+    )
+    return MergeResult(len(records), updated, inserted, deleted, seconds)
+
+
+def delete_missing_rows(model: type, records: Sequence["Record"], show_ids: set[int], db: Session) -> int:
+    """Delete the stored rows of some shows that a batch doesn't have
+
+    Args:
+        model (type): SQLAlchemy mapped class with a 'show_id' column
+        records (Sequence[Record]): The batch, each record including 'show_id'
+        show_ids (set[int]): Shows whose complete set of rows is in the batch
+        db (Session): Database session
+
+    Returns:
+        int: Number of rows deleted
+    """
+    table_name: str = model.__table__.name
+    id_column = tuple(column for column in get_table_columns(model) if column.key == "id")
+    staging = create_staging_table(model, id_column, db)
+    kept = [(record.id,) for record in latest_records(records) if record.get("show_id") in show_ids]
+    if kept:
+        db.connection().exec_driver_sql(get_insert_sql(staging.name, id_column), kept)
+    result = db.execute(
+        text(
+            f"DELETE t FROM `{table_name}` AS t LEFT JOIN `{staging.name}` AS s ON s.`id` = t.`id` "
+            f"WHERE t.`show_id` IN :show_ids AND s.`id` IS NULL"
+        ).bindparams(bindparam("show_ids", expanding=True)),
+        {"show_ids": sorted(show_ids)}
+    )
+    staging.drop(db.connection())
+    return result.rowcount
+
+
+def upsert_rows(
+    model: type,
+    records: Sequence["Record"],
+    db: Session,
+    prune_show_ids: set[int] | None = None
+) -> int:
+    """Upsert records, merging through a staging table when the batch is large or missing rows are to be deleted
+
+    Args:
+        model (type): SQLAlchemy mapped class
+        records (Sequence[Record]): Records of the model's rows
+        db (Session): Database session
+        prune_show_ids (set[int] | None): Shows whose stored rows missing from the batch are deleted
+
+    Returns:
+        int: Number of rows sent to the database
+    """
+    if prune_show_ids or (DB_STAGING_MERGE_MIN_ROWS and len(records) >= DB_STAGING_MERGE_MIN_ROWS):
+        return merge_rows(model, records, db, prune_show_ids).rows
+    return bulk_upsert(model, records, db)
@@ -0,0 +1,54 @@
+"""Service recording work that failed permanently."""
+import logging
+import time
+from typing import Any
+
+from tvbingefriend_show_sync.config import TVMAZE_DEAD_LETTER_TABLE
+from tvbingefriend_show_sync.errors import PERMANENT, classify_error, get_http_status
+from tvbingefriend_show_sync.metrics import get_registry
+from tvbingefriend_show_sync.services.storage_service import StorageService
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterService:
+    """Records permanently failed work items in an Azure Table instead of letting the host retry them"""
+    def __init__(self, storage_service: StorageService, table_name: str = TVMAZE_DEAD_LETTER_TABLE) -> None:
+        self.storage_service = storage_service
+        self.table_name = table_name
+
+    def record(self, source: str, key: Any, error: BaseException) -> None:
+        """Record a failed work item
+
+        Args:
+            source (str): Function or stage that failed, used as the PartitionKey
+            key (Any): Work item identifier, e.g. a show ID or message ID, used as the RowKey
+            error (BaseException): Error that failed the item
+        """
+        entity: dict[str, Any] = {
+            "PartitionKey": source,
+            "RowKey": str(key),
+            "ErrorType": type(error).__name__,
+            "Error": str(error)[:32000],  # table string properties are limited to 64 KiB
+            "StatusCode": get_http_status(error),
+            "RecordedAt": int(time.time())
+        }
+        self.storage_service.upsert_entity(table_name=self.table_name, entity=entity)
+        get_registry().increment("dead_lettered")
+        logger.warning("DeadLetterService.record: Dead-lettered %s item %s: %s", source, key, error)
+
+    def record_if_permanent(self, source: str, key: Any, error: BaseException) -> bool:
+        """Record a failed work item if its error is permanent
+
+        Args:
+            source (str): Function or stage that failed
+            key (Any): Work item identifier
+            error (BaseException): Error that failed the item
+
+        Returns:
+            bool: True if the error was permanent and the item was recorded, so it should not be retried
+        """
+        if classify_error(error) != PERMANENT:
+            return False
+        self.record(source, key, error)
+        return True
@@ -0,0 +1,109 @@
+"""Group-commit writer batching upserts from concurrent invocations into one transaction."""
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+SHOW = "show"
+SEASON = "season"
+EPISODE = "episode"
+
+
+class GroupCommitError(Exception):
+    """Raised in every invocation whose upsert was part of a failed group commit."""
+
+
+class _PendingBatch:
+    """Upserts collected for one group commit"""
+    def __init__(self) -> None:
+        self.items: dict[str, list[dict[str, Any]]] = {}
+        self.size: int = 0
+        self.done = threading.Event()
+        self.error: BaseException | None = None
+
+
+class GroupCommitWriter:
+    """Collects upserts from concurrent invocations in a worker and commits them together
+
+    The first invocation to submit into an empty batch becomes its leader. The batch is flushed by whichever
+    invocation fills it to max_batch_size, or by the leader once max_delay_seconds has passed. Every submitter
+    blocks until its batch is flushed and receives the flush error, if any, so a failed commit is retried by
+    the host for every blob in the batch.
+    """
+    def __init__(
+        self,
+        flush: Callable[[dict[str, list[dict[str, Any]]]], None],
+        max_batch_size: int = 50,
+        max_delay_seconds: float = 0.1
+    ) -> None:
+        """Initialize the writer
+
+        Args:
+            flush (Callable[[dict[str, list[dict[str, Any]]]], None]): Writes one batch, keyed by entity kind,
+                in a single transaction
+            max_batch_size (int): Number of upserts that triggers an immediate flush
+            max_delay_seconds (float): Longest time the first upsert in a batch waits for others
+        """
+        self._flush = flush
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay_seconds = max(0.0, max_delay_seconds)
+        self._lock = threading.Lock()
+        self._current: _PendingBatch | None = None
+
+    def submit(self, kind: str, payload: dict[str, Any]) -> None:
+        """Add an upsert to the current batch and wait until it is committed
+
+        Args:
+            kind (str): Entity kind (SHOW, SEASON, or EPISODE)
+            payload (dict[str, Any]): Upsert payload as read from the staging blob
+
+        Raises:
+            GroupCommitError: If the batch containing this upsert failed to commit.
+        """
+        with self._lock:
+            batch = self._current
+            if batch is None:
+                batch = self._current = _PendingBatch()
+            batch.items.setdefault(kind, []).append(payload)
+            batch.size += 1
+            is_leader = batch.size == 1
+            is_full = batch.size >= self.max_batch_size
+            if is_full:
+                self._current = None  # seal the batch so new submissions start another
+
+        if is_full:
+            self._run_flush(batch)
+        elif is_leader and not batch.done.wait(self.max_delay_seconds):
+            with self._lock:
+                should_flush = self._current is batch  # not already sealed and flushed by a full batch
+                if should_flush:
+                    self._current = None
+            if should_flush:
+                self._run_flush(batch)
+
+        batch.done.wait()
+        if batch.error is not None:
+            raise GroupCommitError(
+                f"Group commit of {batch.size} upserts failed: {batch.error}"
+            ) from batch.error
+
+    def _run_flush(self, batch: _PendingBatch) -> None:
+        """Flush a sealed batch and wake every submitter waiting on it
+
+        Args:
+            batch (_PendingBatch): Batch to flush
+        """
+        start = time.perf_counter()
+        try:
+            self._flush(batch.items)
+            logger.info(
+                "GroupCommitWriter: Committed %s upserts in %.3fs (%s)",
+                batch.size, time.perf_counter() - start, ', '.join(f'{len(v)} {k}' for k, v in batch.items.items())
+            )
+        except BaseException as e:
+            batch.error = e
+            logger.error("GroupCommitWriter: Group commit of %s upserts failed: %s", batch.size, e, exc_info=True)
+        finally:
+            batch.done.set()
@@ -0,0 +1,184 @@
+"""Ledger of applied staging blobs, used to skip duplicate blob-trigger deliveries and unchanged uploads."""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from tvbingefriend_show_sync.config import IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_TTL_HOURS, TVMAZE_APPLIED_BLOBS_TABLE
+from tvbingefriend_show_sync.metrics import get_registry
+from tvbingefriend_show_sync.services.storage_service import StorageService, content_hash
+from tvbingefriend_show_sync.staging_gc import split_blob_path
+
+logger = logging.getLogger(__name__)
+
+
+RESET_PARTITION_KEY = "_ledger"  # not a valid container name, so it never clashes with a blob's partition
+RESET_ROW_KEY = "reset"
+RESET_CHECK_SECONDS = 60  # how often each worker checks whether the ledger was reset elsewhere
+
+
+class IdempotencyLedger:
+    """Records the content hash last applied for each staging blob, in memory and in an Azure Table
+
+    Blob triggers deliver at least once, so an upsert function may receive content it has already written. Staging
+    checks the ledger before an upload with skip_unchanged, so content already applied under a blob name isn't
+    uploaded again, while content whose trigger failed or hasn't run yet still is. Each container is one partition
+    and each blob name one entity holding the hash of the content last applied. Recent entries are kept in an LRU
+    cache, so a duplicate is usually recognized without a table read.
+
+    Entries older than ttl_hours no longer count as applied, and reset clears the whole ledger, e.g. after the
+    database was restored or rebuilt. A reset is recorded in the table, and every worker drops its cached entries
+    within RESET_CHECK_SECONDS of it.
+    """
+    def __init__(
+        self,
+        storage_service: StorageService,
+        table_name: str = TVMAZE_APPLIED_BLOBS_TABLE,
+        capacity: int = IDEMPOTENCY_CACHE_SIZE,
+        ttl_hours: int = IDEMPOTENCY_TTL_HOURS
+    ) -> None:
+        self.storage_service = storage_service
+        self.table_name = table_name
+        self.capacity = capacity
+        self.ttl_seconds = ttl_hours * 60 * 60
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[tuple[str, str], tuple[str, int]] = OrderedDict()  # (hash, applied at) per blob
+        self._reset_at = 0  # epoch of the last reset seen
+        self._reset_checked_at = 0.0
+
+    @staticmethod
+    def _get_keys(blob_path: str) -> tuple[str, str]:
+        """Get the PartitionKey and RowKey of a 'container/blob' path; '/' isn't allowed in table keys"""
+        container_name, blob_name = split_blob_path(blob_path)
+        return container_name, blob_name.replace("/", "|")
+
+    def _remember(self, keys: tuple[str, str], digest: str, applied_at: int) -> None:
+        """Cache the hash applied for a blob, evicting the least recently used entry past capacity"""
+        with self._lock:
+            self._cache[keys] = (digest, applied_at)
+            self._cache.move_to_end(keys)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def _is_current(self, applied_at: int) -> bool:
+        """Check whether an entry applied at an epoch is neither expired nor from before the last reset"""
+        if applied_at <= self._reset_at:
+            return False
+        return not self.ttl_seconds or time.time() - applied_at <= self.ttl_seconds
+
+    def _check_reset(self) -> None:
+        """Drop the cached entries if the ledger was reset since this worker last checked"""
+        now = time.monotonic()
+        if now - self._reset_checked_at < RESET_CHECK_SECONDS:
+            return
+        self._reset_checked_at = now
+        try:
+            marker = self.storage_service.get_entity(self.table_name, RESET_PARTITION_KEY, RESET_ROW_KEY)
+        except Exception as e:
+            logger.warning("IdempotencyLedger._check_reset: Failed to read reset marker: %s", e)
+            return
+        reset_at = int((marker or {}).get("ResetAt", 0))
+        if reset_at > self._reset_at:
+            with self._lock:
+                self._reset_at = reset_at
+                self._cache.clear()
+
+    def is_applied(self, blob_path: str, digest: str) -> bool:
+        """Check whether a blob's content has already been applied
+
+        Args:
+            blob_path (str): Blob path, 'container/blob'
+            digest (str): content_hash of the blob's content
+
+        Returns:
+            bool: True if the ledger holds this exact content for the blob, applied since the last reset and
+                within the TTL
+        """
+        self._check_reset()
+        keys = self._get_keys(blob_path)
+        with self._lock:
+            cached = self._cache.get(keys)
+            if cached is not None:
+                self._cache.move_to_end(keys)
+        if cached is None:
+            entity = self.storage_service.get_entity(self.table_name, *keys)
+            if entity is None:
+                return False
+            cached = (entity.get("ContentHash", ""), int(entity.get("AppliedAt", 0)))
+            self._remember(keys, *cached)
+        return cached[0] == digest and self._is_current(cached[1])
+
+    def record_applied(self, blob_path: str, digest: str) -> None:
+        """Record that a blob's content has been applied; a current record the cache holds isn't written again
+
+        Args:
+            blob_path (str): Blob path, 'container/blob'
+            digest (str): content_hash of the blob's content
+        """
+        self._check_reset()
+        keys = self._get_keys(blob_path)
+        with self._lock:
+            cached = self._cache.get(keys)
+        if cached is not None and cached[0] == digest and self._is_current(cached[1]):
+            return
+        applied_at = int(time.time())
+        self.storage_service.upsert_entity(
+            table_name=self.table_name,
+            entity={"PartitionKey": keys[0], "RowKey": keys[1], "ContentHash": digest, "AppliedAt": applied_at}
+        )
+        self._remember(keys, digest, applied_at)
+
+    def reset(self) -> int:
+        """Clear the ledger, so every blob is uploaded and applied again, e.g. after a database restore
+
+        Returns:
+            int: Number of entries deleted
+        """
+        reset_at = int(time.time())
+        self.storage_service.upsert_entity(  # first, so entries recorded during the reset don't count either
+            table_name=self.table_name,
+            entity={"PartitionKey": RESET_PARTITION_KEY, "RowKey": RESET_ROW_KEY, "ResetAt": reset_at}
+        )
+        with self._lock:
+            self._reset_at = max(self._reset_at, reset_at)
+            self._cache.clear()
+
+        entities = [
+            entity for entity in self.storage_service.get_entities(table_name=self.table_name)
+            if entity.get("PartitionKey") != RESET_PARTITION_KEY
+        ]
+        self.storage_service.delete_entities_batch(table_name=self.table_name, entities=entities)
+        logger.info("IdempotencyLedger.reset: Cleared %s entries", len(entities))
+        return len(entities)
+
+    def apply_once(self, blob_path: str, data: bytes, apply: Callable[[], None]) -> bool:
+        """Apply a blob's content unless that exact content was already applied
+
+        The ledger is only written after apply returns, so content whose upsert failed is applied again on retry.
+        A failure to read or write the ledger is logged and never fails the upsert.
+
+        Args:
+            blob_path (str): Blob path, 'container/blob'
+            data (bytes): Blob content
+            apply (Callable[[], None]): Writes the content, e.g. submits it to the group commit
+
+        Returns:
+            bool: True if the content was applied, False if it was skipped as a duplicate
+        """
+        digest = content_hash(data)
+        try:
+            if self.is_applied(blob_path, digest):
+                get_registry().increment("duplicate_blobs_skipped")
+                logger.debug("IdempotencyLedger.apply_once: Skipping already applied blob %s", blob_path)
+                return False
+        except Exception as e:
+            logger.warning("IdempotencyLedger.apply_once: Failed to check ledger for %s: %s", blob_path, e)
+
+        apply()
+
+        try:
+            self.record_applied(blob_path, digest)
+        except Exception as e:
+            logger.warning("IdempotencyLedger.apply_once: Failed to record %s in ledger: %s", blob_path, e)
+        return True
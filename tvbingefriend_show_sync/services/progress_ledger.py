@@ -0,0 +1,66 @@
+"""Ledger of completed ingest work, used to resume an interrupted backfill."""
+import logging
+import time
+from typing import Any
+
+from tvbingefriend_show_sync.config import TVMAZE_SYNC_PROGRESS_TABLE
+from tvbingefriend_show_sync.services.storage_service import StorageService
+
+logger = logging.getLogger(__name__)
+
+SHOW_PAGES = "show_pages"
+SEASONS_EPISODES = "seasons_episodes"
+
+
+class ProgressLedger:
+    """Records completed show pages and season/episode show IDs in an Azure Table
+
+    Each stage is one partition and each completed unit one entity, keyed by its zero-padded number.
+    """
+    def __init__(self, storage_service: StorageService, table_name: str = TVMAZE_SYNC_PROGRESS_TABLE) -> None:
+        self.storage_service = storage_service
+        self.table_name = table_name
+
+    def record(self, stage: str, key: int, **fields: Any) -> None:
+        """Record one completed unit of work
+
+        Args:
+            stage (str): Ledger partition (SHOW_PAGES or SEASONS_EPISODES)
+            key (int): Page number or show ID
+            **fields (Any): Extra properties stored on the entity
+        """
+        entity: dict[str, Any] = {
+            "PartitionKey": stage,
+            "RowKey": f"{int(key):010d}",
+            "CompletedAt": int(time.time()),
+            **fields
+        }
+        self.storage_service.upsert_entity(table_name=self.table_name, entity=entity)
+
+    def get_completed(self, stage: str) -> dict[int, dict[str, Any]]:
+        """Get every completed unit of a stage
+
+        Args:
+            stage (str): Ledger partition
+
+        Returns:
+            dict[int, dict[str, Any]]: Ledger entities keyed by page number or show ID
+        """
+        entities = self.storage_service.get_entities(
+            table_name=self.table_name,
+            filter_query=f"PartitionKey eq '{stage}'"
+        )
+        return {int(entity["RowKey"]): entity for entity in entities}
+
+    def reset(self, stage: str) -> None:
+        """Clear a stage before a fresh run
+
+        Args:
+            stage (str): Ledger partition
+        """
+        entities = self.storage_service.get_entities(
+            table_name=self.table_name,
+            filter_query=f"PartitionKey eq '{stage}'"
+        )
+        self.storage_service.delete_entities_batch(table_name=self.table_name, entities=entities)
+        logger.info("ProgressLedger.reset: Cleared %s entries for stage '%s'", len(entities), stage)
@@ -0,0 +1,130 @@
+"""Helpers for queue messages carrying a batch of work items."""
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Sequence, TypeVar
+
+from tvbingefriend_show_sync.errors import PayloadValidationError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class ItemOutcome:
+    """Result of processing one item from a batched queue message"""
+    item: Any
+    succeeded: bool
+    error: str | None = None
+    requeued: bool = False
+
+
+def chunk(items: Sequence[T], size: int) -> Iterator[list[T]]:
+    """Split items into lists of at most size items
+
+    Args:
+        items (Sequence[T]): Items to split
+        size (int): Maximum items per list
+
+    Yields:
+        list[T]: Consecutive slices of items
+    """
+    size = max(1, size)
+    for i in range(0, len(items), size):
+        yield list(items[i:i + size])
+
+
+def get_batch_items(message: dict[str, Any], single_key: str, batch_key: str) -> list[Any]:
+    """Get the work items from a queue message in single-item or batched form
+
+    Args:
+        message (dict[str, Any]): Queue message, e.g. {"show_id": 1} or {"show_ids": [1, 2]}
+        single_key (str): Key holding a single item
+        batch_key (str): Key holding a list of items
+
+    Returns:
+        list[Any]: Work items, empty if the message holds none
+
+    Raises:
+        PayloadValidationError: If the message isn't an object or its batch isn't a list
+    """
+    if not isinstance(message, dict):
+        raise PayloadValidationError(f"Queue message must be a JSON object, got {type(message).__name__}")
+    if message.get(batch_key):
+        if not isinstance(message[batch_key], list):
+            raise PayloadValidationError(f"Queue message '{batch_key}' must be a list")
+        return list(message[batch_key])
+    if message.get(single_key) is not None:
+        return [message[single_key]]
+    return []
+
+
+def build_batch_message(items: list[Any], single_key: str, batch_key: str) -> dict[str, Any]:
+    """Build a queue message for items, using the single-item form for one item
+
+    Args:
+        items (list[Any]): Work items
+        single_key (str): Key for a single item
+        batch_key (str): Key for a list of items
+
+    Returns:
+        dict[str, Any]: Queue message
+    """
+    if len(items) == 1:
+        return {single_key: items[0]}
+    return {batch_key: items}
+
+
+def process_batch(
+    items: list[T],
+    handler: Callable[[T], None],
+    requeue: Callable[[T], None],
+    label: str
+) -> list[ItemOutcome]:
+    """Process each item of a batched queue message independently
+
+    A single-item batch lets errors propagate, so the host retries it as it would any message. In a larger
+    batch each failed item is requeued on its own and the others still complete, so one bad item doesn't
+    poison the batch.
+
+    Args:
+        items (list[T]): Work items from the message
+        handler (Callable[[T], None]): Processes one item
+        requeue (Callable[[T], None]): Queues one failed item as its own message
+        label (str): Name used in log messages
+
+    Returns:
+        list[ItemOutcome]: Outcome per item
+
+    Raises:
+        Exception: If a single item fails, or a failed item could not be requeued.
+    """
+    if len(items) == 1:
+        handler(items[0])
+        return [ItemOutcome(item=items[0], succeeded=True)]
+
+    outcomes: list[ItemOutcome] = []
+    requeue_errors: list[Exception] = []
+    for item in items:
+        try:
+            handler(item)
+            outcomes.append(ItemOutcome(item=item, succeeded=True))
+        except Exception as e:
+            logger.error("%s: Failed to process item %s: %s", label, item, e, exc_info=True)
+            outcome = ItemOutcome(item=item, succeeded=False, error=str(e))
+            try:
+                requeue(item)
+                outcome.requeued = True
+            except Exception as requeue_error:
+                logger.error("%s: Failed to requeue item %s: %s", label, item, requeue_error)
+                requeue_errors.append(requeue_error)
+            outcomes.append(outcome)
+
+    failed = [outcome.item for outcome in outcomes if not outcome.succeeded]
+    logger.info(
+        "%s: Processed %s of %s items; requeued %s", label, len(items) - len(failed), len(items), failed or 'none'
+    )
+
+    if requeue_errors:  # let the host retry the whole message rather than lose items
+        raise requeue_errors[0]
+    return outcomes
@@ -3,103 +3,214 @@ import logging
 from typing import Any
 
 import azure.functions as func
+from sqlalchemy.orm import Session
 from tvbingefriend_tvmaze_client.tvmaze_api import TVMazeAPI
 
 from tvbingefriend_show_sync.config import (
-    STORAGE_CONNECTION_STRING,
+    QUEUE_MESSAGE_BATCH_SIZE,
     TVMAZE_SHOW_IDS_CONTAINER,
     TVMAZE_SEASONS_EPISODES_QUEUE,
-    TVMAZE_SEASONS_EPISODES_CONTAINER
+    TVMAZE_SEASONS_EPISODES_CONTAINER,
+    get_storage_connection_string
 )
-from tvbingefriend_show_sync.repositories.database import SessionLocal
+from tvbingefriend_show_sync.errors import retry_transient
+from tvbingefriend_show_sync.repositories.database import get_session_factory
+from tvbingefriend_show_sync.services.dead_letter_service import DeadLetterService
 from tvbingefriend_show_sync.services.episode_service import EpisodeService
+from tvbingefriend_show_sync.services.progress_ledger import ProgressLedger, SEASONS_EPISODES
+from tvbingefriend_show_sync.services.queue_batch import (
+    ItemOutcome,
+    build_batch_message,
+    chunk,
+    get_batch_items,
+    process_batch
+)
 from tvbingefriend_show_sync.services.season_service import SeasonService
 from tvbingefriend_show_sync.services.show_service import ShowService
 from tvbingefriend_show_sync.services.storage_service import StorageService
 
+logger = logging.getLogger(__name__)
+
 
 # noinspection PyMethodMayBeStatic
 class SeasonsEpisodesService:
     """Service for TV season/episode-related operations."""
-    def __init__(self) -> None:
-        self.show_service = ShowService()
-        self.season_service = SeasonService()
-        self.episode_service = EpisodeService()
-        self.storage_service = StorageService(STORAGE_CONNECTION_STRING)
-        self.tvmaze_api = TVMazeAPI()
-
-    def start_get_seasons_episodes(self) -> func.HttpResponse:
-        """Starts the workflow by fetching all show IDs and staging them in a blob."""
-        logging.info("SeasonsEpisodesService: Starting season/episode retrieval workflow.")
-        db = SessionLocal()
+    def __init__(
+        self,
+        show_service: ShowService | None = None,
+        season_service: SeasonService | None = None,
+        episode_service: EpisodeService | None = None,
+        storage_service: StorageService | None = None,
+        tvmaze_api: TVMazeAPI | None = None,
+        progress_ledger: ProgressLedger | None = None,
+        dead_letter_service: DeadLetterService | None = None
+    ) -> None:
+        self.storage_service = storage_service or StorageService(get_storage_connection_string())
+        self.tvmaze_api = tvmaze_api or TVMazeAPI()
+        self.progress_ledger = progress_ledger or ProgressLedger(self.storage_service)
+        self.dead_letter_service = dead_letter_service or DeadLetterService(self.storage_service)
+        self.show_service = show_service or ShowService(
+            storage_service=self.storage_service, tvmaze_api=self.tvmaze_api, progress_ledger=self.progress_ledger
+        )
+        self.season_service = season_service or SeasonService(storage_service=self.storage_service)
+        self.episode_service = episode_service or EpisodeService(storage_service=self.storage_service)
+
+    def start_get_seasons_episodes(self, missing_only: bool = False) -> func.HttpResponse:
+        """Starts the workflow by fetching show IDs and staging them in a blob.
+
+        Args:
+            missing_only (bool): Only stage shows with no stored seasons or episodes
+        """
+        logger.info(
+            "SeasonsEpisodesService: Starting season/episode retrieval workflow (missing_only=%s).", missing_only
+        )
+        db = get_session_factory()()
 
         try:
-            show_ids: list[int] | None = self.show_service.get_all_show_ids(db)
+            show_ids: list[int] | None = self.get_show_ids(db, missing_only)
             if not show_ids:
-                logging.warning("SeasonsEpisodesService: No show IDs found in the database.")
+                logger.warning("SeasonsEpisodesService: No show IDs found in the database.")
                 return func.HttpResponse("No show IDs found to process.", status_code=200)
 
+            self.progress_ledger.reset(SEASONS_EPISODES)  # fresh run
+
             blob_name = "all_show_ids.json"
             self.storage_service.upload_blob_data(
                 container_name=TVMAZE_SHOW_IDS_CONTAINER,
                 blob_name=blob_name,
                 data=show_ids
             )
-            logging.info(f"SeasonsEpisodesService: Staged {len(show_ids)} show IDs to blob '{blob_name}'.")
+            logger.info("SeasonsEpisodesService: Staged %s show IDs to blob '%s'.", len(show_ids), blob_name)
             return func.HttpResponse(f"Successfully started processing for {len(show_ids)} shows.", status_code=202)
 
         except Exception as e:  # catch any errors, log error, and return 500
-            logging.error(f"SeasonsEpisodesService: Failed to start workflow: {e}", exc_info=True)
+            logger.error("SeasonsEpisodesService: Failed to start workflow: %s", e, exc_info=True)
             return func.HttpResponse("Failed to start season/episode retrieval process.", status_code=500)
         finally:
             db.close()
 
+    def resume_get_seasons_episodes(self, missing_only: bool = False) -> func.HttpResponse:
+        """Queues only the shows the progress ledger has not recorded as complete.
+
+        Args:
+            missing_only (bool): Only consider shows with no stored seasons or episodes
+        """
+        logger.info(
+            "SeasonsEpisodesService: Resuming season/episode retrieval workflow (missing_only=%s).", missing_only
+        )
+        db = get_session_factory()()
+
+        try:
+            show_ids: list[int] | None = self.get_show_ids(db, missing_only)
+            if not show_ids:
+                logger.warning("SeasonsEpisodesService: No show IDs found in the database.")
+                return func.HttpResponse("No show IDs found to process.", status_code=200)
+
+            completed: dict[int, dict[str, Any]] = self.progress_ledger.get_completed(SEASONS_EPISODES)
+            outstanding: list[int] = [show_id for show_id in show_ids if show_id not in completed]
+            self.stage_show_ids_for_retrieval(outstanding)
+
+            logger.info(
+                "SeasonsEpisodesService: %s shows already done; queued %s shows.", len(completed), len(outstanding)
+            )
+            return func.HttpResponse(f"Resumed processing for {len(outstanding)} shows.", status_code=202)
+
+        except Exception as e:  # catch any errors, log error, and return 500
+            logger.error("SeasonsEpisodesService: Failed to resume workflow: %s", e, exc_info=True)
+            return func.HttpResponse("Failed to resume season/episode retrieval process.", status_code=500)
+        finally:
+            db.close()
+
+    def get_show_ids(self, db: Session, missing_only: bool) -> list[int] | None:
+        """Gets all show IDs, or only those with no stored seasons or episodes."""
+        if missing_only:
+            return self.show_service.get_show_ids_missing_seasons_episodes(db)
+        return self.show_service.get_all_show_ids(db)
+
     def stage_show_ids_for_retrieval(self, show_ids: list[int]) -> None:
-        """Takes a list of show IDs and queues each one for individual retrieval."""
-        logging.info(f"SeasonsEpisodesService: Queuing {len(show_ids)} show IDs for season/episode retrieval.")
-        for show_id in show_ids:  # for each show id
+        """Takes a list of show IDs and queues them for retrieval, QUEUE_MESSAGE_BATCH_SIZE IDs per message."""
+        logger.info("SeasonsEpisodesService: Queuing %s show IDs for season/episode retrieval.", len(show_ids))
+        for batch in chunk(show_ids, QUEUE_MESSAGE_BATCH_SIZE):  # for each batch of show ids
             try:
-                message = {'show_id': show_id}
+                message = build_batch_message(batch, 'show_id', 'show_ids')
                 self.storage_service.upload_queue_message(
-
                     queue_name=TVMAZE_SEASONS_EPISODES_QUEUE,
                     message=message
                 )
 
             except Exception as e:
-                logging.error(
-                    f"SeasonsEpisodesService: Failed to queue message for show ID {show_id}: {e}", exc_info=True
+                logger.error(
+                    "SeasonsEpisodesService: Failed to queue message for show IDs %s: %s", batch, e, exc_info=True
                 )
-        logging.info("SeasonsEpisodesService: Finished queuing all show IDs.")
+        logger.info("SeasonsEpisodesService: Finished queuing all show IDs.")
+
+    def get_seasons_episodes_batch(self, msg: dict[str, Any]) -> list[ItemOutcome]:
+        """Fetches seasons/episodes for every show in a single-show or batched queue message.
+
+        Args:
+            msg (dict[str, Any]): Queue message with 'show_id' or 'show_ids'
+
+        Returns:
+            list[ItemOutcome]: Outcome per show ID
+        """
+        show_ids: list[int] = get_batch_items(msg, 'show_id', 'show_ids')
+        if not show_ids:
+            logger.error("SeasonsEpisodesService: Message is missing 'show_id'. Message content: %s", msg)
+            return []
+
+        return process_batch(
+            items=show_ids,
+            handler=lambda show_id: self.get_show_seasons_episodes({'show_id': show_id}),
+            requeue=lambda show_id: self.storage_service.upload_queue_message(
+                queue_name=TVMAZE_SEASONS_EPISODES_QUEUE,
+                message={'show_id': show_id}
+            ),
+            label="SeasonsEpisodesService.get_seasons_episodes_batch"
+        )
 
     def get_show_seasons_episodes(self, msg: dict[str, Any]) -> None:
-        """Fetches show details with embedded seasons/episodes and stages them in a blob."""
+        """Fetches show details with embedded seasons/episodes and stages them in a blob.
+
+        Transient API errors are retried in-process and then raised for the host to retry. Permanent errors
+        (e.g. a 404 for a deleted show) are dead-lettered and the show is completed without retrying.
+        """
         show_id = msg.get("show_id")
         if not show_id:
-            logging.error(f"SeasonsEpisodesService: Message is missing 'show_id'. Message content: {msg}")
+            logger.error("SeasonsEpisodesService: Message is missing 'show_id'. Message content: %s", msg)
             return
 
-        logging.info(f"SeasonsEpisodesService: Getting seasons and episodes for show ID {show_id}")
-        show_data = self.tvmaze_api.get_show_details(show_id=show_id, embed=['seasons', 'episodes'])
+        logger.info("SeasonsEpisodesService: Getting seasons and episodes for show ID %s", show_id)
+        try:
+            show_data = retry_transient(
+                lambda: self.tvmaze_api.get_show_details(show_id=show_id, embed=['seasons', 'episodes']),
+                label=f"SeasonsEpisodesService.get_show_seasons_episodes({show_id})"
+            )
+        except Exception as e:
+            if not self.dead_letter_service.record_if_permanent("get_show_seasons_episodes", show_id, e):
+                raise
+            self.progress_ledger.record(SEASONS_EPISODES, show_id, DeadLettered=True)
+            return
 
         if not show_data:
-            logging.warning(f"SeasonsEpisodesService: No data returned from TVMaze API for show ID {show_id}")
+            logger.warning("SeasonsEpisodesService: No data returned from TVMaze API for show ID %s", show_id)
+            self.progress_ledger.record(SEASONS_EPISODES, show_id, Empty=True)
             return
         self.storage_service.upload_blob_data(
             container_name=TVMAZE_SEASONS_EPISODES_CONTAINER,
             blob_name=f"tv_show_{show_id}.json",
-            data=show_data
+            data=show_data  # always staged: unchanged seasons and episodes are skipped by their own upsert blobs
         )
-        logging.info(f"SeasonsEpisodesService: Staged raw show data for show ID {show_id}")
+        logger.info("SeasonsEpisodesService: Staged raw show data for show ID %s", show_id)
+        self.progress_ledger.record(SEASONS_EPISODES, show_id)
 
     def stage_show_seasons_episodes(self, show_data: dict[str, Any]) -> None:
         """Extracts seasons and episodes from raw show data and delegates to the appropriate services for staging."""
         show_id = show_data.get('id')
         if not show_id:
-            logging.error(f"SeasonsEpisodesService: Raw show data from blob is missing 'id'. Data: {show_data}")
+            logger.error("SeasonsEpisodesService: Raw show data from blob is missing 'id'. Data: %s", show_data)
             return
 
-        logging.info(f"SeasonsEpisodesService: Staging seasons and episodes for show ID {show_id}")
+        logger.info("SeasonsEpisodesService: Staging seasons and episodes for show ID %s", show_id)
         embedded_data = show_data.get('_embedded', {})
 
         # Delegate to SeasonService to stage seasons
@@ -0,0 +1,248 @@
+"""Worker-level container for shared service instances."""
+import inspect
+import threading
+from typing import Any, Callable, TypeVar, TYPE_CHECKING
+
+from tvbingefriend_show_sync.config import (
+    DB_GROUP_COMMIT_MAX_BATCH,
+    DB_GROUP_COMMIT_MAX_DELAY_MS,
+    TVMAZE_API_BASE_URL,
+    get_storage_connection_string
+)
+from tvbingefriend_show_sync.metrics import instrument_methods, timed
+from tvbingefriend_show_sync.services.group_commit_writer import EPISODE, GroupCommitWriter, SEASON, SHOW
+from tvbingefriend_show_sync.utils import db_session_manager
+
+if TYPE_CHECKING:
+    from tvbingefriend_tvmaze_client.tvmaze_api import TVMazeAPI
+
+    from tvbingefriend_show_sync.services.dead_letter_service import DeadLetterService
+    from tvbingefriend_show_sync.services.episode_service import EpisodeService
+    from tvbingefriend_show_sync.services.idempotency_ledger import IdempotencyLedger
+    from tvbingefriend_show_sync.services.progress_ledger import ProgressLedger
+    from tvbingefriend_show_sync.services.season_service import SeasonService
+    from tvbingefriend_show_sync.services.seasons_episodes_service import SeasonsEpisodesService
+    from tvbingefriend_show_sync.services.show_service import ShowService
+    from tvbingefriend_show_sync.services.storage_service import StorageService
+    from tvbingefriend_show_sync.services.update_service import UpdateService
+
+T = TypeVar("T")
+
+
+def create_tvmaze_api(base_url: str = TVMAZE_API_BASE_URL) -> "TVMazeAPI":
+    """Create a TV Maze API client, pointed at base_url when one is given
+
+    The base URL is passed as the client's base_url constructor parameter. A client without one can't be pointed
+    elsewhere, so a configured base URL is an error rather than being dropped: load tests and backfills aimed at
+    a fake server must never fall back to the real TV Maze API.
+
+    Args:
+        base_url (str): Base URL override, e.g. a local fake server; empty uses the client's default
+
+    Returns:
+        TVMazeAPI: Client
+
+    Raises:
+        ValueError: If base_url is set and the installed client doesn't accept a base_url parameter
+    """
+    from tvbingefriend_tvmaze_client.tvmaze_api import TVMazeAPI
+
+    if not base_url:
+        return TVMazeAPI()
+    if "base_url" not in inspect.signature(TVMazeAPI).parameters:
+        raise ValueError(
+            f"TVMAZE_API_BASE_URL is set to {base_url}, but the installed TV Maze client doesn't accept a base_url"
+        )
+    return TVMazeAPI(base_url=base_url)
+
+
+class ServiceContainer:
+    """Lazily creates services once per worker and shares them across invocations
+
+    All services share one StorageService and one TVMazeAPI client, so storage clients and HTTP sessions are
+    reused instead of being rebuilt on every trigger. Creation is guarded by a lock so concurrent invocations
+    in the same worker never build duplicate instances. Service modules are imported on first access, so
+    importing the container (and the blueprints using it) doesn't load SQLAlchemy or the TV Maze client.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._instances: dict[str, Any] = {}
+
+    def _get_or_create(self, name: str, factory: Callable[[], T]) -> T:
+        """Get a cached instance, creating it on first use
+
+        Args:
+            name (str): Cache key for the instance
+            factory (Callable[[], T]): Function creating the instance
+
+        Returns:
+            T: Cached instance
+        """
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:  # re-entrant, since factories resolve their own dependencies
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = factory()
+                    self._instances[name] = instance
+        return instance
+
+    @property
+    def storage_service(self) -> "StorageService":
+        """Shared storage service"""
+        def create() -> "StorageService":
+            from tvbingefriend_show_sync.services.storage_service import StorageService
+            return StorageService(get_storage_connection_string())
+
+        return self._get_or_create("storage_service", create)
+
+    @property
+    def tvmaze_api(self) -> "TVMazeAPI":
+        """Shared TV Maze API client"""
+        def create() -> "TVMazeAPI":
+            tvmaze_api = create_tvmaze_api()
+            return instrument_methods(tvmaze_api, "tvmaze", ("get_shows", "get_show_details", "get_show_updates"))
+
+        return self._get_or_create("tvmaze_api", create)
+
+    @property
+    def progress_ledger(self) -> "ProgressLedger":
+        """Shared ingest progress ledger"""
+        def create() -> "ProgressLedger":
+            from tvbingefriend_show_sync.services.progress_ledger import ProgressLedger
+            return ProgressLedger(self.storage_service)
+
+        return self._get_or_create("progress_ledger", create)
+
+    @property
+    def dead_letter_service(self) -> "DeadLetterService":
+        """Shared dead-letter service"""
+        def create() -> "DeadLetterService":
+            from tvbingefriend_show_sync.services.dead_letter_service import DeadLetterService
+            return DeadLetterService(self.storage_service)
+
+        return self._get_or_create("dead_letter_service", create)
+
+    @property
+    def idempotency_ledger(self) -> "IdempotencyLedger":
+        """Shared ledger of applied staging blobs, the one the storage service checks before uploads"""
+        return self.storage_service.applied_blobs
+
+    @property
+    def show_service(self) -> "ShowService":
+        """Shared show service"""
+        def create() -> "ShowService":
+            from tvbingefriend_show_sync.services.show_service import ShowService
+            return ShowService(
+                storage_service=self.storage_service,
+                tvmaze_api=self.tvmaze_api,
+                progress_ledger=self.progress_ledger
+            )
+
+        return self._get_or_create("show_service", create)
+
+    @property
+    def season_service(self) -> "SeasonService":
+        """Shared season service"""
+        def create() -> "SeasonService":
+            from tvbingefriend_show_sync.services.season_service import SeasonService
+            return SeasonService(storage_service=self.storage_service)
+
+        return self._get_or_create("season_service", create)
+
+    @property
+    def episode_service(self) -> "EpisodeService":
+        """Shared episode service"""
+        def create() -> "EpisodeService":
+            from tvbingefriend_show_sync.services.episode_service import EpisodeService
+            return EpisodeService(storage_service=self.storage_service)
+
+        return self._get_or_create("episode_service", create)
+
+    @property
+    def seasons_episodes_service(self) -> "SeasonsEpisodesService":
+        """Shared season/episode service"""
+        def create() -> "SeasonsEpisodesService":
+            from tvbingefriend_show_sync.services.seasons_episodes_service import SeasonsEpisodesService
+            return SeasonsEpisodesService(
+                show_service=self.show_service,
+                season_service=self.season_service,
+                episode_service=self.episode_service,
+                storage_service=self.storage_service,
+                tvmaze_api=self.tvmaze_api,
+                progress_ledger=self.progress_ledger,
+                dead_letter_service=self.dead_letter_service
+            )
+
+        return self._get_or_create("seasons_episodes_service", create)
+
+    @property
+    def update_service(self) -> "UpdateService":
+        """Shared update service"""
+        def create() -> "UpdateService":
+            from tvbingefriend_show_sync.services.update_service import UpdateService
+            return UpdateService(
+                storage_service=self.storage_service,
+                tvmaze_api=self.tvmaze_api,
+                dead_letter_service=self.dead_letter_service
+            )
+
+        return self._get_or_create("update_service", create)
+
+    @property
+    def upsert_writer(self) -> GroupCommitWriter:
+        """Shared group-commit writer for blob-triggered upserts"""
+        return self._get_or_create(
+            "upsert_writer",
+            lambda: GroupCommitWriter(
+                flush=self.flush_upserts,
+                max_batch_size=DB_GROUP_COMMIT_MAX_BATCH,
+                max_delay_seconds=DB_GROUP_COMMIT_MAX_DELAY_MS / 1000
+            )
+        )
+
+    def flush_upserts(self, batch: dict[str, list[dict[str, Any]]]) -> None:
+        """Write a group-commit batch in one transaction, parents before children
+
+        Season and episode blobs can be consumed before the blob of their show. Any show they reference that
+        isn't in the batch is given a stub row in the same transaction, so the foreign key always holds and the
+        children never fail and retry waiting for their parent. The full show upsert overwrites the stub.
+
+        The transaction is re-run on a fresh session if it hits a MySQL deadlock, lock wait timeout, or lost
+        connection, so the host only re-runs the blob triggers once in-process retries are exhausted.
+
+        Args:
+            batch (dict[str, list[dict[str, Any]]]): Upsert payloads keyed by entity kind
+        """
+        from tvbingefriend_show_sync.errors import retry_db_transaction  # deferred for cold start
+
+        def write() -> None:
+            with db_session_manager() as db:
+                if batch.get(SHOW):
+                    self.show_service.upsert_shows(batch[SHOW], db)
+                child_show_ids: set[int] = {
+                    payload["show_id"] for payload in batch.get(SEASON, []) + batch.get(EPISODE, [])
+                    if payload.get("show_id")
+                } - {show.get("id") for show in batch.get(SHOW, [])}
+                if child_show_ids:
+                    self.show_service.ensure_shows_exist(child_show_ids, db)
+                if batch.get(SEASON):
+                    self.season_service.upsert_seasons(batch[SEASON], db)
+                if batch.get(EPISODE):
+                    self.episode_service.upsert_episodes(batch[EPISODE], db)
+
+        with timed("db.group_commit"):
+            retry_db_transaction(write, label="ServiceContainer.flush_upserts")
+
+    def reset(self) -> None:
+        """Drop all cached instances so the next access creates new ones"""
+        with self._lock:
+            self._instances.clear()
+
+
+_services = ServiceContainer()
+
+
+def get_services() -> ServiceContainer:
+    """Get the worker-level service container"""
+    return _services
@@ -5,76 +5,205 @@ from requests.exceptions import HTTPError
 
 from sqlalchemy.orm import Session
 
-from tvbingefriend_show_sync.config import STORAGE_CONNECTION_STRING, TVMAZE_SHOWS_QUEUE, SHOW_STAGE_CONTAINER, \
-    SHOW_UPSERT_CONTAINER
+from tvbingefriend_show_sync.config import TVMAZE_SHOWS_QUEUE, SHOW_STAGE_CONTAINER, SHOW_UPSERT_CONTAINER, \
+    SHOW_PAGE_MAX_WINDOW, QUEUE_MESSAGE_BATCH_SIZE, get_storage_connection_string
+from tvbingefriend_show_sync.metrics import get_registry
 from tvbingefriend_show_sync.repositories.show_repo import ShowRepository
+from tvbingefriend_show_sync.services.progress_ledger import ProgressLedger, SHOW_PAGES
+from tvbingefriend_show_sync.services.queue_batch import chunk, get_batch_items, process_batch
 from tvbingefriend_show_sync.services.storage_service import StorageService
+from tvbingefriend_show_sync.tracing import with_new_trace
+from tvbingefriend_show_sync.utils import db_session_manager
 from tvbingefriend_tvmaze_client.tvmaze_api import TVMazeAPI
 
+logger = logging.getLogger(__name__)
+
+SHOWS_PER_PAGE = 250  # TV Maze show index page size
+
 
 # noinspection PyMethodMayBeStatic
 class ShowService:
     """Service for TV show-related operations."""
-    def __init__(self, show_repository: ShowRepository | None = None) -> None:
+    def __init__(
+        self,
+        show_repository: ShowRepository | None = None,
+        storage_service: StorageService | None = None,
+        tvmaze_api: TVMazeAPI | None = None,
+        progress_ledger: ProgressLedger | None = None
+    ) -> None:
         self.show_repository = show_repository or ShowRepository()
-        self.storage_service = StorageService(STORAGE_CONNECTION_STRING)
-        self.tvmaze_api = TVMazeAPI()
+        self.storage_service = storage_service or StorageService(get_storage_connection_string())
+        self.tvmaze_api = tvmaze_api or TVMazeAPI()
+        self.progress_ledger = progress_ledger or ProgressLedger(self.storage_service)
 
-    def start_get_shows(self, page: int = 0) -> None:
+    def start_get_shows(self, page: int = 0, window: int | None = None) -> int:
         """Start get all shows from TV Maze
 
+        Queues a window of consecutive pages at once. Each page that returns shows queues the page one
+        window ahead of it, so the crawl keeps `window` pages in flight until the terminal empty page.
+        Starting from page 0 clears the progress ledger of any earlier run.
+
         Args:
             page (int): Page number to start from. Defaults to 0.
+            window (int | None): Number of pages in flight. Defaults to an estimate from stored shows.
+
+        Returns:
+            int: Window used
+        """
+        if window is None:
+            window = self.estimate_page_window(page)
+        window = max(1, window)
+
+        if page == 0:  # fresh run
+            self.progress_ledger.reset(SHOW_PAGES)
+
+        logger.info("ShowService.start_get_shows: Starting show retrieval from page %s with window %s", page, window)
+
+        for window_page in range(page, page + window):
+            msg: dict[str, Any] = {  # create message to retrieve one page of shows
+                "page": window_page,  # page number
+                "window": window  # pages in flight
+            }
+            logger.debug("ShowService.start_get_shows: message: %s", msg)
+
+            self.storage_service.upload_queue_message(  # upload message to queue
+                queue_name=TVMAZE_SHOWS_QUEUE,  # queue name
+                message=msg  # message to upload
+            )
+        logger.info("ShowService.start_get_shows: Queued pages %s-%s for retrieval", page, page + window - 1)
+        return window
+
+    def resume_get_shows(self, window: int | None = None) -> dict[str, Any]:
+        """Resume an interrupted show ingest from the progress ledger
+
+        Each parallel chain stops at its own terminal page, so a chain that died leaves pages below the first
+        terminal page that no other chain will reach. If the crawl never got within one page of the first terminal
+        page (or never reached one), it continues after the highest completed page and the pages below that page
+        that never completed are queued without chaining. Otherwise every page below the first terminal page that
+        never completed is queued without chaining.
+
+        Args:
+            window (int | None): Number of pages in flight when continuing the crawl
+
+        Returns:
+            dict[str, Any]: Summary with the missing pages queued and the page the crawl continued from
         """
-        logging.info(f"ShowService.start_get_shows: Starting show retrieval from page {page}")
+        completed: dict[int, dict[str, Any]] = self.progress_ledger.get_completed(SHOW_PAGES)
+        fetched_pages = [page for page, entry in completed.items() if not entry.get("Terminal")]
+        first_terminal: int | None = min(
+            (page for page, entry in completed.items() if entry.get("Terminal")), default=None
+        )
+        highest_page = max(fetched_pages, default=-1)
+        continue_crawl = first_terminal is None or highest_page + 1 < first_terminal
+
+        last_page = highest_page if continue_crawl else first_terminal  # the crawl covers the pages after this
+        missing_pages = [page for page in range(last_page) if page not in completed]
+        for batch in chunk(missing_pages, QUEUE_MESSAGE_BATCH_SIZE):
+            self.storage_service.upload_queue_message(queue_name=TVMAZE_SHOWS_QUEUE, message={"pages": batch})
 
-        msg: dict[str, Any] = {  # create message to retrieve first page of shows
-            "page": page  # page number
-        }
-        logging.debug(f"ShowService.start_get_shows: message: {msg}")
+        continued_from: int | None = None
+        if continue_crawl:
+            continued_from = highest_page + 1
+            self.start_get_shows(page=continued_from, window=window)
 
-        self.storage_service.upload_queue_message(  # upload message to queue
-            queue_name=TVMAZE_SHOWS_QUEUE,  # queue name
-            message=msg  # message to upload
+        logger.info(
+            "ShowService.resume_get_shows: %s pages already done; queued %s missing pages; continued crawl from page "
+            "%s", len(fetched_pages), len(missing_pages), continued_from
         )
-        logging.info(f"ShowService.start_get_shows: Queued page {page} for retrieval")
+        return {"missing_pages": missing_pages, "continued_from": continued_from}
 
-    def get_show_page(self, message: dict[str, Any]):
-        """Get one page of shows from TV Maze
+    def estimate_page_window(self, page: int) -> int:
+        """Estimate how many pages to fetch in parallel from the highest stored show ID
 
         Args:
-            message (dict[str, Any]): Message containing page number
+            page (int): Page number the crawl starts from
+
+        Returns:
+            int: Remaining pages up to the estimated last page, capped at SHOW_PAGE_MAX_WINDOW
         """
-        page_number = message.get("page")
-        logging.debug(f"ShowService.get_show_page: page_number: {page_number}")
+        with db_session_manager() as db:
+            max_show_id: int | None = self.show_repository.get_max_show_id(db)
 
-        if page_number is None:
-            logging.error(f"Queue message is missing 'page' number.")
-            return
+        if not max_show_id:  # nothing stored yet, so the catalog size is unknown
+            return SHOW_PAGE_MAX_WINDOW
 
-        logging.info(f"ShowService.get_show_page: Getting shows from TV Maze for page_number: {page_number}")
-        shows: list[dict[str, Any]] | None = self.tvmaze_api.get_shows(page_number)  # get shows from TV Maze API
+        remaining_pages = max_show_id // SHOWS_PER_PAGE + 1 - page
+        return min(max(remaining_pages, 1), SHOW_PAGE_MAX_WINDOW)
 
-        if shows:  # if shows are returned
-            blob_name = f"shows_page_{page_number}.json"
+    def get_show_page(self, message: dict[str, Any]):
+        """Get one page of shows from TV Maze, or each page of a batched message
 
-            logging.debug(f"ShowService.get_show_page: container_name: {SHOW_STAGE_CONTAINER}")
-            logging.debug(f"ShowService.get_show_page: Blob name: {blob_name}")
+        A single-page message ('page') queues the next page once its page has shows. A batched message
+        ('pages') only fetches the listed pages.
 
-            self.storage_service.upload_blob_data(  # upload shows to blob storage
-                container_name=SHOW_STAGE_CONTAINER,  # container name
-                blob_name=blob_name,  # blob name
-                data=shows  # data to upload
+        Args:
+            message (dict[str, Any]): Message containing page number or page numbers
+        """
+        if message.get("pages"):
+            process_batch(
+                items=get_batch_items(message, "page", "pages"),
+                handler=self.fetch_show_page,
+                requeue=lambda page: self.storage_service.upload_queue_message(
+                    queue_name=TVMAZE_SHOWS_QUEUE,
+                    message={"pages": [page]}
+                ),
+                label="ShowService.get_show_page"
             )
-            logging.info(f"Staged all shows from page {page_number} for upsert in blob {blob_name}")
+            return
 
-            message["page"] += 1  # increment page number
+        page_number = message.get("page")
+        logger.debug("ShowService.get_show_page: page_number: %s", page_number)
+
+        if page_number is None:
+            logger.error("Queue message is missing 'page' number.")
+            return
+
+        if self.fetch_show_page(page_number):  # if shows are returned
+            message["page"] += message.get("window", 1)  # advance one window ahead
 
             self.storage_service.upload_queue_message(  # upload next page of shows to queue
                 queue_name=TVMAZE_SHOWS_QUEUE,  # queue name
-                message=message  # message to upload
+                message=with_new_trace(message)  # each page is traced from when it was queued, not from the start
             )
-            logging.info(f"Queued page {message['page']} for retrieval")
+            logger.info("Queued page %s for retrieval", message['page'])
+        else:  # terminal page, so this chain stops extending the window
+            logger.info("ShowService.get_show_page: Page %s is past the last page; stopping", page_number)
+
+    def fetch_show_page(self, page_number: int) -> bool:
+        """Fetch one page of shows from TV Maze and stage it for upsert
+
+        Args:
+            page_number (int): Page number
+
+        Returns:
+            bool: True if the page had shows, False if it was empty (past the last page)
+        """
+        logger.info("ShowService.get_show_page: Getting shows from TV Maze for page_number: %s", page_number)
+        try:
+            shows: list[dict[str, Any]] | None = self.tvmaze_api.get_shows(page_number)  # get shows from TV Maze API
+        except HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:  # TV Maze returns 404 past the last page
+                self.progress_ledger.record(SHOW_PAGES, page_number, Terminal=True)
+                return False
+            raise
+
+        if not shows:
+            self.progress_ledger.record(SHOW_PAGES, page_number, Terminal=True)
+            return False
+
+        blob_name = f"shows_page_{page_number}.json"
+
+        logger.debug("ShowService.get_show_page: container_name: %s", SHOW_STAGE_CONTAINER)
+        logger.debug("ShowService.get_show_page: Blob name: %s", blob_name)
+
+        self.storage_service.upload_blob_data(  # upload shows to blob storage
+            container_name=SHOW_STAGE_CONTAINER,  # container name
+            blob_name=blob_name,  # blob name
+            data=shows  # data to upload
+        )
+        logger.info("Staged all shows from page %s for upsert in blob %s", page_number, blob_name)
+        self.progress_ledger.record(SHOW_PAGES, page_number, ShowCount=len(shows))
+        return True
 
     def stage_shows_for_upsert(self, shows: list[dict[str, Any]]):
         """Stage shows for upsert
@@ -83,35 +212,65 @@ class ShowService:
             shows (list[dict[str, Any]]): Shows to stage
         """
 
-        logging.info(f"ShowService.stage_shows_for_upsert: Staging shows for upsert")
+        logger.info("ShowService.stage_shows_for_upsert: Staging shows for upsert")
 
+        uploaded = 0
         for show in shows:  # for each show
             tvmaze_id = show.get("id")  # get TV Maze id
-            logging.debug(f"ShowService.stage_shows_for_upsert: tvmaze_id: {tvmaze_id}")
-
             blob_name = f"tv_show_{tvmaze_id}.json"
-            logging.debug(f"ShowService.stage_shows_for_upsert: blob_name: {blob_name}")
-            logging.debug(f"ShowService.stage_shows_for_upsert: container_name: {SHOW_UPSERT_CONTAINER}")
+            logger.debug(
+                "ShowService.stage_shows_for_upsert: Staging show %s to %s/%s",
+                tvmaze_id, SHOW_UPSERT_CONTAINER, blob_name
+            )
 
-            self.storage_service.upload_blob_data(  # upload show to blob storage
+            uploaded += self.storage_service.upload_blob_data(  # upload show to blob storage
                 container_name=SHOW_UPSERT_CONTAINER,  # container name
                 blob_name=blob_name,  # blob name
-                data=show  # data to upload
+                data=show,  # data to upload
+                skip_unchanged=True  # an unchanged show needs no upsert
             )
-            logging.info(f"Staged show {tvmaze_id} for upsert")
+
+        logger.info(
+            "ShowService.stage_shows_for_upsert: Staged %s shows for upsert (%s unchanged)",
+            uploaded, len(shows) - uploaded
+        )  # one summary per page
 
     def get_all_show_ids(self, db: Session):
         """Get all show ids"""
-        logging.info("ShowService.get_all_show_ids: Get all show ids")
+        logger.info("ShowService.get_all_show_ids: Get all show ids")
         show_ids = self.show_repository.get_all_show_ids(db=db)
         return show_ids
 
-    def upsert_show(self, show: dict[str, Any], db: Session) -> None:
-        """Upsert a show in the database
+    def get_show_ids_missing_seasons_episodes(self, db: Session):
+        """Get ids of shows with no stored seasons or episodes"""
+        logger.info("ShowService.get_show_ids_missing_seasons_episodes: Get show ids missing seasons or episodes")
+        show_ids = self.show_repository.get_show_ids_missing_seasons_episodes(db=db)
+        return show_ids
+
+    def upsert_shows(self, shows: list[dict[str, Any]], db: Session) -> None:
+        """Upsert multiple shows in the database
 
         Args:
-            show (dict[str, Any]): Show to upsert
+            shows (list[dict[str, Any]]): Shows to upsert
             db (Session): Database session
         """
-        logging.info("ShowService.upsert_show: Upserting show")
-        self.show_repository.upsert_show(show, db)
+        logger.info("ShowService.upsert_shows: Upserting %s shows", len(shows))
+        self.show_repository.upsert_shows(shows, db)
+
+    def ensure_shows_exist(self, show_ids: set[int], db: Session) -> int:
+        """Insert stubs for shows that aren't stored yet, so their seasons and episodes can be written
+
+        Args:
+            show_ids (set[int]): Show IDs referenced by seasons or episodes
+            db (Session): Database session
+
+        Returns:
+            int: Number of stubs inserted
+        """
+        inserted: int = self.show_repository.insert_show_stubs(show_ids, db)
+        if inserted:
+            get_registry().increment("show_stubs_inserted", inserted)
+            logger.info(
+                "ShowService.ensure_shows_exist: Inserted %s show stubs ahead of their seasons/episodes", inserted
+            )
+        return inserted
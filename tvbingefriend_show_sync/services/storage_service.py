@@ -1,17 +1,41 @@
 """Service for interacting with Azure Blob Storage"""
+import hashlib
 import json
 import logging
-from typing import Any, List, Dict
+import threading
+from datetime import datetime
+from typing import Any, List, Dict, TYPE_CHECKING
 
-from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
 from azure.data.tables import TableServiceClient, TableClient, TableEntity, UpdateMode
 from azure.storage.blob import ContainerClient, BlobClient
 from azure.storage.queue import QueueClient
 
+from tvbingefriend_show_sync.metrics import get_registry, instrument
+from tvbingefriend_show_sync.tracing import attach_trace, get_trace_metadata
+
+if TYPE_CHECKING:
+    from tvbingefriend_show_sync.services.idempotency_ledger import IdempotencyLedger
+
+logger = logging.getLogger(__name__)
+
+BLOB_BATCH_SIZE = 256  # most blobs one batch request can delete
+CONTENT_HASH_METADATA = "content_hash"  # metadata key holding content_hash of a blob uploaded with skip_unchanged
+
+
+def content_hash(data: bytes) -> str:
+    """Get a compact hash identifying a blob's content"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
 
 # noinspection PyMethodMayBeStatic
 class StorageService:
-    """Service for interacting with Azure Storage"""
+    """Service for interacting with Azure Storage
+
+    Queue, container, and table clients are created once per name and reused. Azure SDK clients are safe to
+    share across threads, so a single instance can serve concurrent invocations in the same worker.
+    """
     def __init__(self, connection_string: str) -> None:
         """Initialize the Storage Service
 
@@ -28,6 +52,24 @@ class StorageService:
         else:
             self.connection_string = connection_string
 
+        self._lock = threading.Lock()
+        self._queue_clients: dict[str, QueueClient] = {}
+        self._container_clients: dict[str, ContainerClient] = {}
+        self._table_service_client: TableServiceClient | None = None
+        self._known_tables: set[str] = set()
+        self._applied_blobs: "IdempotencyLedger | None" = None
+
+    @property
+    def applied_blobs(self) -> "IdempotencyLedger":
+        """Ledger of the blobs whose content was applied downstream, created on first use"""
+        if self._applied_blobs is None:
+            from tvbingefriend_show_sync.services.idempotency_ledger import IdempotencyLedger  # avoid an import cycle
+
+            with self._lock:
+                if self._applied_blobs is None:
+                    self._applied_blobs = IdempotencyLedger(self)
+        return self._applied_blobs
+
     def get_queue_service_client(self, queue_name: str) -> QueueClient:
         """Get the queue service client
 
@@ -36,20 +78,30 @@ class StorageService:
         Returns:
             QueueClient: Client for the queue.
         """
-        queue_client = QueueClient.from_connection_string(  # Create queue client
-            conn_str=self.connection_string,  # Connection string
-            queue_name=queue_name  # Queue name
-        )
+        queue_client = self._queue_clients.get(queue_name)
+        if queue_client is not None:  # Reuse client created by an earlier call
+            return queue_client
 
-        try:
-            queue_client.create_queue()  # Create queue if it doesn't exist
-        except ResourceExistsError:  # If queue already exists, log info
-            logging.info(
-                msg="StorageService.get_queue_service_client: Queue already exists"
+        with self._lock:
+            queue_client = self._queue_clients.get(queue_name)
+            if queue_client is not None:
+                return queue_client
+
+            queue_client = QueueClient.from_connection_string(  # Create queue client
+                conn_str=self.connection_string,  # Connection string
+                queue_name=queue_name  # Queue name
             )
 
+            try:
+                queue_client.create_queue()  # Create queue if it doesn't exist
+            except ResourceExistsError:  # If queue already exists, log info
+                logger.info("StorageService.get_queue_service_client: Queue already exists")
+
+            self._queue_clients[queue_name] = queue_client
+
         return queue_client
 
+    @instrument("storage.upload_queue_message")
     def upload_queue_message(self, queue_name: str, message: str | bytes | dict[str, Any]) -> None:
         """Upload a message to the queue
 
@@ -61,14 +113,10 @@ class StorageService:
             Exception: If there is an error uploading the message.
         """
         if not queue_name or not message:  # Check for empty queue name or message
-            logging.error(
-                msg="StorageService.upload_queue_message: Queue name and message cannot be empty."
-            )
+            logger.error("StorageService.upload_queue_message: Queue name and message cannot be empty.")
             raise ValueError
 
-        logging.debug(
-            msg=f"StorageService.upload_queue_message: Attempting to upload message to {queue_name}"
-        )
+        logger.debug("StorageService.upload_queue_message: Attempting to upload message to %s", queue_name)
 
         try:
             queue_client = self.get_queue_service_client(  # Get queue client
@@ -76,26 +124,20 @@ class StorageService:
             )
 
         except ValueError as e:  # Catch connection string format error from getter
-            logging.error(
-                msg=f"StorageService.upload_queue_message: Failed to get queue client for {queue_name}: {e}"
-            )
+            logger.error("StorageService.upload_queue_message: Failed to get queue client for %s: %s", queue_name, e)
             raise
 
         upload_message = message
         if isinstance(message, dict):
-            upload_message = json.dumps(message)
+            upload_message = json.dumps(attach_trace(message))  # carry the invocation's trace downstream
 
         try:
             queue_client.send_message(upload_message)  # Send message to queue
 
-            logging.info(
-                msg=f"StorageService.upload_queue_message: Successfully uploaded message to {queue_name}"
-            )
+            logger.debug("StorageService.upload_queue_message: Successfully uploaded message to %s", queue_name)
 
         except Exception as e:  # Catch any errors
-            logging.error(
-                msg=f"StorageService.upload_queue_message: Failed to upload message to {queue_name}: {e}"
-            )
+            logger.error("StorageService.upload_queue_message: Failed to upload message to %s: %s", queue_name, e)
             raise
 
     def get_blob_service_client(self, container_name: str) -> ContainerClient:
@@ -107,29 +149,57 @@ class StorageService:
         Returns:
             ContainerClient: Client for the blob storage container.
         """
-        container_client = ContainerClient.from_connection_string(  # Create container client
-            conn_str=self.connection_string,
-            container_name=container_name
-        )
+        container_client = self._container_clients.get(container_name)
+        if container_client is not None:  # Reuse client created by an earlier call
+            return container_client
+
+        with self._lock:
+            container_client = self._container_clients.get(container_name)
+            if container_client is not None:
+                return container_client
+
+            container_client = ContainerClient.from_connection_string(  # Create container client
+                conn_str=self.connection_string,
+                container_name=container_name
+            )
 
-        try:
-            container_client.create_container()  # Create container if it doesn't exist
-        except ResourceExistsError:  # If container already exists, log info
-            logging.info("Container already exists")
+            try:
+                container_client.create_container()  # Create container if it doesn't exist
+            except ResourceExistsError:  # If container already exists, log info
+                logger.info("Container already exists")
+
+            self._container_clients[container_name] = container_client
 
         return container_client
 
+    @instrument("storage.upload_blob_data")
     def upload_blob_data(
-        self, container_name: str, blob_name: str, data: str | bytes | dict | list, overwrite: bool = True
-    ) -> None:
+        self,
+        container_name: str,
+        blob_name: str,
+        data: str | bytes | dict | list,
+        overwrite: bool = True,
+        skip_unchanged: bool = False,
+        metadata: dict[str, str] | None = None
+    ) -> bool:
         """
         Uploads data to Azure Blob Storage. Serializes Python dicts/lists to JSON.
 
+        With skip_unchanged, the upload is suppressed when the applied-blobs ledger shows the same content under
+        this name was already applied by its trigger. Otherwise the blob's metadata carries a hash of its content,
+        which the trigger records in the ledger once it succeeds (see staging_gc.consumes_blob). Content whose
+        trigger failed, or hasn't run yet, is never suppressed, so it is retried.
+
         Args:
             container_name: The name of the blob container.
             blob_name: The name of the blob.
             data: The data to upload. Dictionaries and lists are automatically serialized to JSON strings.
             overwrite: Whether to overwrite the blob if it already exists.
+            skip_unchanged: Whether to skip the upload if the same content was already applied.
+            metadata: Blob metadata to store with the content, read by the blob trigger.
+
+        Returns:
+            True if the blob was uploaded, False if the upload was skipped as unchanged.
 
         Raises:
             ValueError: If container or blob name is invalid.
@@ -137,14 +207,12 @@ class StorageService:
             Exception: For other unexpected errors.
         """
         if not container_name or not blob_name:  # Check for empty container name or blob name
-            logging.error(
-                msg="StorageService.upload_blob_data: Container name and blob name cannot be empty."
-            )
+            logger.error("StorageService.upload_blob_data: Container name and blob name cannot be empty.")
             raise ValueError("Container name and blob name cannot be empty.")
 
-        logging.debug(
-            msg=f"StorageService.upload_blob_data: Attempting to upload blob to {container_name}/{blob_name} "
-                f"(overwrite={overwrite})"
+        logger.debug(
+            "StorageService.upload_blob_data: Attempting to upload blob to %s/%s (overwrite=%s)",
+            container_name, blob_name, overwrite
         )
         try:
             blob_client: BlobClient = self.get_blob_service_client(  # Get blob client
@@ -153,8 +221,8 @@ class StorageService:
                 blob=blob_name  # Blob name
             )
         except ValueError as e:  # Catch connection string format error from getter
-            logging.error(
-                msg=f"StorageService.upload_blob_data: Failed to get blob client for {container_name}/{blob_name}: {e}"
+            logger.error(
+                "StorageService.upload_blob_data: Failed to get blob client for %s/%s: %s", container_name, blob_name, e
             )
             raise
 
@@ -162,47 +230,149 @@ class StorageService:
         # Automatically serialize dicts and lists to a JSON string
         if isinstance(data, (dict, list)):
             upload_data = json.dumps(data)
+        metadata = {**get_trace_metadata(), **(metadata or {})}  # Carry the trace downstream
+        if skip_unchanged:
+            digest = content_hash(upload_data.encode("utf-8") if isinstance(upload_data, str) else upload_data)
+            if self._is_applied(container_name, blob_name, digest):
+                get_registry().increment("blob_writes_suppressed")
+                logger.debug(
+                    "StorageService.upload_blob_data: Skipped unchanged blob %s/%s", container_name, blob_name
+                )
+                return False
+            metadata = {**metadata, CONTENT_HASH_METADATA: digest}  # recorded as applied by the blob trigger
 
         try:
             blob_client.upload_blob(  # Upload blob
                 data=upload_data,  # Data to upload
                 overwrite=overwrite,  # Whether to overwrite existing blob
+                metadata=metadata,  # Trace, content hash, and caller metadata
             )
 
-            logging.info(
-                msg=f"StorageService.upload_blob_data: Successfully uploaded blob: {container_name}/{blob_name}"
+            logger.debug(
+                "StorageService.upload_blob_data: Successfully uploaded blob: %s/%s", container_name, blob_name
             )
 
         except ResourceExistsError as e:  # Catch ResourceExistsError
             if not overwrite:  # If overwrite is False, log warning and re-raise
-                logging.warning(
-                    msg=f"StorageService.upload_blob_data: Blob {container_name}/{blob_name} already exists and "
-                        f"overwrite is False."
+                logger.warning(
+                    "StorageService.upload_blob_data: Blob %s/%s already exists and overwrite is False.",
+                    container_name, blob_name
                 )
                 raise
             else:  # If overwrite is True, log error and re-raise
-                logging.error(
-                    msg=f"StorageService.upload_blob_data: Unexpected ResourceExistsError despite overwrite=True for "
-                        f"{container_name}/{blob_name}: {e}"
+                logger.error(
+                    "StorageService.upload_blob_data: Unexpected ResourceExistsError despite overwrite=True for "
+                    "%s/%s: %s", container_name, blob_name, e
                 )
                 raise
         except Exception as e:  # Catch any other errors, log error, and re-raise
-            logging.error(
-                msg=f"StorageService.upload_blob_data: Failed to upload blob {container_name}/{blob_name}: {e}"
+            logger.error(
+                "StorageService.upload_blob_data: Failed to upload blob %s/%s: %s", container_name, blob_name, e
             )
             raise
+        return True
+
+    def _is_applied(self, container_name: str, blob_name: str, digest: str) -> bool:
+        """Check whether content with the given hash was already applied from a blob
+
+        A failed check only costs the upload it would have saved, so errors count as not applied.
+        """
+        try:
+            return self.applied_blobs.is_applied(f"{container_name}/{blob_name}", digest)
+        except Exception as e:
+            logger.warning(
+                "StorageService._is_applied: Failed to check ledger for %s/%s: %s", container_name, blob_name, e
+            )
+            return False
+
+    @instrument("storage.delete_blob")
+    def delete_blob(self, container_name: str, blob_name: str, etag: str | None = None) -> bool:
+        """
+        Deletes a blob. Does not raise an error if the blob does not exist or no longer has the given ETag.
+
+        Args:
+            container_name: The name of the blob container.
+            blob_name: The name of the blob.
+            etag: Only delete the blob if it still has this ETag, so a blob overwritten after it was read is kept
+                  for the trigger of its new content.
+
+        Returns:
+            True if the blob was deleted.
+        """
+        if not container_name or not blob_name:
+            logger.error("StorageService.delete_blob: Container name and blob name cannot be empty.")
+            raise ValueError("Container name and blob name cannot be empty.")
+
+        try:
+            conditions: dict[str, Any] = (
+                {"etag": etag, "match_condition": MatchConditions.IfNotModified} if etag else {}
+            )
+            self.get_blob_service_client(container_name).delete_blob(
+                blob_name, delete_snapshots="include", **conditions
+            )
+            logger.debug("StorageService.delete_blob: Deleted blob %s/%s", container_name, blob_name)
+            return True
+        except ResourceNotFoundError:
+            logger.debug(
+                "StorageService.delete_blob: Blob %s/%s not found, presumed deleted", container_name, blob_name
+            )
+        except ResourceModifiedError:
+            logger.info(
+                "StorageService.delete_blob: Blob %s/%s was overwritten since it was read, keeping it",
+                container_name, blob_name
+            )
+        return False
+
+    @instrument("storage.delete_blobs_older_than")
+    def delete_blobs_older_than(self, container_name: str, cutoff: datetime) -> int:
+        """
+        Deletes every blob in a container last modified before a cutoff, in batches of 256 per request.
+
+        Args:
+            container_name: The name of the blob container.
+            cutoff: Blobs last modified before this time are deleted.
+
+        Returns:
+            The number of blobs deleted.
+        """
+        container_client = self.get_blob_service_client(container_name)
+        expired: list[str] = [
+            blob.name for blob in container_client.list_blobs() if blob.last_modified < cutoff
+        ]
+
+        deleted = 0
+        for i in range(0, len(expired), BLOB_BATCH_SIZE):
+            batch = expired[i:i + BLOB_BATCH_SIZE]
+            responses = container_client.delete_blobs(
+                *batch, delete_snapshots="include", if_unmodified_since=cutoff, raise_on_any_failure=False
+            )
+            deleted += sum(1 for response in responses if 200 <= response.status_code < 300)
+        logger.info(
+            "StorageService.delete_blobs_older_than: Deleted %s of %s expired blobs from %s",
+            deleted, len(expired), container_name
+        )
+        return deleted
 
     def get_table_service_client(self) -> TableServiceClient:
         """Returns an authenticated TableServiceClient instance."""
+        if self._table_service_client is not None:
+            return self._table_service_client
+
         try:
-            return TableServiceClient.from_connection_string(conn_str=self.connection_string)
+            with self._lock:
+                if self._table_service_client is None:
+                    self._table_service_client = TableServiceClient.from_connection_string(
+                        conn_str=self.connection_string
+                    )
+            return self._table_service_client
         except ValueError as e:
-            logging.error(
-                msg=f"StorageService.get_table_service_client: Invalid storage connection string format for Table "
-                    f"Service: {e}"
+            logger.error(
+                "StorageService.get_table_service_client: Invalid storage connection string format for Table "
+                "Service: %s", e
             )
             raise ValueError(f"Invalid storage connection string format for Table Service: {e}") from e
 
+    @instrument("storage.get_entities")
     def get_entities(self, table_name: str, filter_query: str | None = None) -> List[Dict[str, Any]]:
         """
         Retrieves entities from a specified Azure Table, with an optional filter.
@@ -222,12 +392,12 @@ class StorageService:
             azure.core.exceptions.ServiceRequestError: For network or other service issues.
         """
         if not table_name:
-            logging.error(msg="StorageService.get_entities: Table name cannot be empty.")
+            logger.error("StorageService.get_entities: Table name cannot be empty.")
             raise ValueError("Table name cannot be empty.")
 
-        logging.debug(
-            msg=f"StorageService.get_entities: Querying entities from table '{table_name}' with filter: "
-                f"'{filter_query or 'All'}'"
+        logger.debug(
+            "StorageService.get_entities: Querying entities from table '%s' with filter: '%s'",
+            table_name, filter_query or 'All'
         )
         try:
             table_client: TableClient = self.get_table_service_client().get_table_client(table_name=table_name)
@@ -238,24 +408,61 @@ class StorageService:
             else:
                 entities = list(table_client.list_entities())
 
-            logging.info(
-                msg=f"StorageService.get_entities: Retrieved {len(entities)} entities from table '{table_name}'."
+            logger.info(
+                "StorageService.get_entities: Retrieved %s entities from table '%s'.", len(entities), table_name
             )
             return entities
 
         except ResourceNotFoundError:
-            logging.warning(
-                msg=f"StorageService.get_entities: Table '{table_name}' not found while querying entities. "
-                    f"Returning empty list."
+            logger.warning(
+                "StorageService.get_entities: Table '%s' not found while querying entities. Returning empty list.",
+                table_name
             )
             return []
         except Exception as e:
-            logging.error(
-                msg=f"StorageService.get_entities: Failed to query entities from table '{table_name}': {e}",
-                exc_info=True
+            logger.error(
+                "StorageService.get_entities: Failed to query entities from table '%s': %s",
+                table_name, e, exc_info=True
             )
             raise
 
+    @instrument("storage.get_entity")
+    def get_entity(self, table_name: str, partition_key: str, row_key: str) -> Dict[str, Any] | None:
+        """
+        Retrieves a single entity from an Azure Table.
+
+        Args:
+            table_name: The name of the table to query.
+            partition_key: The PartitionKey of the entity.
+            row_key: The RowKey of the entity.
+
+        Returns:
+            The entity as a dictionary, or None if the table or entity does not exist.
+
+        Raises:
+            ValueError: If any of the key arguments are invalid.
+            azure.core.exceptions.ServiceRequestError: For network or other service issues.
+        """
+        if not all([table_name, partition_key, row_key]):
+            logger.error("StorageService.get_entity: Table name, partition key, and row key cannot be empty.")
+            raise ValueError("Table name, partition key, and row key cannot be empty.")
+
+        try:
+            table_client: TableClient = self.get_table_service_client().get_table_client(table_name=table_name)
+            return dict(table_client.get_entity(partition_key=partition_key, row_key=row_key))
+        except ResourceNotFoundError:
+            logger.debug(
+                "StorageService.get_entity: Entity not found: Table='%s', PK='%s', RK='%s'",
+                table_name, partition_key, row_key
+            )
+            return None
+        except Exception as e:
+            logger.error(
+                "StorageService.get_entity: Failed to get entity from table '%s': %s", table_name, e, exc_info=True
+            )
+            raise
+
+    @instrument("storage.delete_entity")
     def delete_entity(self, table_name: str, partition_key: str, row_key: str) -> None:
         """
         Deletes a specific entity from an Azure Table.
@@ -271,33 +478,33 @@ class StorageService:
             azure.core.exceptions.ServiceRequestError: For network or other service issues.
         """
         if not all([table_name, partition_key, row_key]):
-            logging.error(msg="StorageService.delete_entity: Table name, partition key, and row key cannot be empty.")
+            logger.error("StorageService.delete_entity: Table name, partition key, and row key cannot be empty.")
             raise ValueError("Table name, partition key, and row key cannot be empty.")
 
-        logging.debug(
-            msg=f"StorageService.delete_entity: Attempting to delete entity from {table_name} "
-                f"with PK='{partition_key}' and RK='{row_key}'"
+        logger.debug(
+            "StorageService.delete_entity: Attempting to delete entity from %s with PK='%s' and RK='%s'",
+            table_name, partition_key, row_key
         )
         try:
             table_client: TableClient = self.get_table_service_client().get_table_client(table_name=table_name)
             table_client.delete_entity(partition_key=partition_key, row_key=row_key)
-            logging.info(
-                msg=f"StorageService.delete_entity: Successfully deleted entity from {table_name} with RowKey "
-                    f"'{row_key}'."
+            logger.debug(
+                "StorageService.delete_entity: Successfully deleted entity from %s with RowKey '%s'.",
+                table_name, row_key
             )
         except ResourceNotFoundError:
-            logging.warning(
-                msg=f"StorageService.delete_entity: Entity not found during deletion, presumed already deleted: "
-                f"Table='{table_name}', PK='{partition_key}', RK='{row_key}'"
+            logger.warning(
+                "StorageService.delete_entity: Entity not found during deletion, presumed already deleted: "
+                "Table='%s', PK='%s', RK='%s'", table_name, partition_key, row_key
             )
         except Exception as e:
-            logging.error(
-                msg=f"StorageService.delete_entity: Failed to delete entity from {table_name} with "
-                    f"RowKey '{row_key}': {e}",
-                exc_info=True
+            logger.error(
+                "StorageService.delete_entity: Failed to delete entity from %s with RowKey '%s': %s",
+                table_name, row_key, e, exc_info=True
             )
             raise
 
+    @instrument("storage.upsert_entity")
     def upsert_entity(self, table_name: str, entity: Dict[str, Any]) -> None:
         """
         Inserts or updates an entity in the specified Azure Table.
@@ -313,27 +520,27 @@ class StorageService:
             azure.core.exceptions.ServiceRequestError: For network or other service issues.
         """
         if not table_name:
-            logging.error(msg="StorageService.upsert_entity: Table name cannot be empty.")
+            logger.error("StorageService.upsert_entity: Table name cannot be empty.")
             raise ValueError("Table name cannot be empty.")
         if not all(k in entity for k in ["PartitionKey", "RowKey"]):
-            logging.error(msg="Entity must contain 'PartitionKey' and 'RowKey'.")
+            logger.error("Entity must contain 'PartitionKey' and 'RowKey'.")
             raise ValueError("Entity must contain 'PartitionKey' and 'RowKey'.")
 
-        logging.debug(msg=f"StorageService.upsert_entity: Attempting to upsert entity into table '{table_name}'")
+        logger.debug("StorageService.upsert_entity: Attempting to upsert entity into table '%s'", table_name)
         try:
             self.create_table_if_not_exists(table_name)
             table_client: TableClient = self.get_table_service_client().get_table_client(table_name)
 
             table_client.upsert_entity(entity=entity, mode=UpdateMode.REPLACE)
-            logging.info(
-                msg=f"StorageService.upsert_entity: Successfully upserted entity with RowKey '{entity.get('RowKey')}' "
-                    f"into table '{table_name}'."
+            logger.debug(
+                "StorageService.upsert_entity: Successfully upserted entity with RowKey '%s' into table '%s'.",
+                entity.get('RowKey'), table_name
             )
 
         except Exception as e:
-            logging.error(
-                msg=f"StorageService.upsert_entity: Failed to upsert entity into table '{table_name}': {e}",
-                exc_info=True
+            logger.error(
+                "StorageService.upsert_entity: Failed to upsert entity into table '%s': %s",
+                table_name, e, exc_info=True
             )
             raise
 
@@ -345,17 +552,22 @@ class StorageService:
             table_name: The name of the table to create.
         """
         if not table_name:
-            logging.error("StorageService.create_table_if_not_exists: Table name cannot be empty.")
+            logger.error("StorageService.create_table_if_not_exists: Table name cannot be empty.")
             raise ValueError("Table name cannot be empty.")
 
+        if table_name in self._known_tables:  # Skip the round trip for tables seen by this instance
+            return
+
         try:
             table_service_client = self.get_table_service_client()
             table_service_client.create_table(table_name=table_name)
-            logging.info(f"StorageService.create_table_if_not_exists: Table '{table_name}' created or already exists.")
+            self._known_tables.add(table_name)
+            logger.info("StorageService.create_table_if_not_exists: Table '%s' created or already exists.", table_name)
         except ResourceExistsError:
-            logging.debug(f"StorageService.create_table_if_not_exists: Table '{table_name}' already exists.")
+            self._known_tables.add(table_name)
+            logger.debug("StorageService.create_table_if_not_exists: Table '%s' already exists.", table_name)
         except Exception as e:
-            logging.error(f"StorageService.create_table_if_not_exists: Failed to create table '{table_name}': {e}")
+            logger.error("StorageService.create_table_if_not_exists: Failed to create table '%s': %s", table_name, e)
             raise
 
     def delete_table(self, table_name: str):
@@ -366,19 +578,21 @@ class StorageService:
             table_name: The name of the table to delete.
         """
         if not table_name:
-            logging.error("StorageService.delete_table: Table name cannot be empty.")
+            logger.error("StorageService.delete_table: Table name cannot be empty.")
             raise ValueError("Table name cannot be empty.")
 
         try:
             table_service_client = self.get_table_service_client()
             table_service_client.delete_table(table_name=table_name)
-            logging.info(f"StorageService.delete_table: Successfully deleted table '{table_name}'.")
+            self._known_tables.discard(table_name)
+            logger.info("StorageService.delete_table: Successfully deleted table '%s'.", table_name)
         except ResourceNotFoundError:
-            logging.warning(f"StorageService.delete_table: Table '{table_name}' not found, presumed already deleted.")
+            logger.warning("StorageService.delete_table: Table '%s' not found, presumed already deleted.", table_name)
         except Exception as e:
-            logging.error(f"StorageService.delete_table: Failed to delete table '{table_name}': {e}")
+            logger.error("StorageService.delete_table: Failed to delete table '%s': %s", table_name, e)
             raise
 
+    @instrument("storage.delete_entities_batch")
     def delete_entities_batch(self, table_name: str, entities: List[Dict[str, Any]]) -> None:
         """
         Deletes a list of entities from a table in batches of 100.
@@ -399,13 +613,13 @@ class StorageService:
             ]
             try:
                 table_client.submit_transaction(operations=operations)
-                logging.info(f"Successfully deleted batch of {len(operations)} entities from '{table_name}'.")
+                logger.info("Successfully deleted batch of %s entities from '%s'.", len(operations), table_name)
             except ResourceNotFoundError:
-                logging.warning(
-                    f"StorageService.delete_entities_batch: Table '{table_name}' not found while deleting a batch, "
-                    f"presumed already deleted. Halting further batches for this table."
+                logger.warning(
+                    "StorageService.delete_entities_batch: Table '%s' not found while deleting a batch, presumed "
+                    "already deleted. Halting further batches for this table.", table_name
                 )
                 break
             except Exception as e:
-                logging.error(f"Error deleting batch from table '{table_name}': {e}")
+                logger.error("Error deleting batch from table '%s': %s", table_name, e)
                 raise
@@ -1,48 +1,181 @@
 """Service for TV show-related operations."""
 import logging
+import time
 from typing import Literal, Any
 
 from tvbingefriend_show_sync.config import (
-    STORAGE_CONNECTION_STRING,
+    QUEUE_MESSAGE_BATCH_SIZE,
     TVMAZE_SEASONS_EPISODES_QUEUE,
     TVMAZE_SEASONS_EPISODES_UPDATE_TABLE,
     TVMAZE_SHOWS_UPDATE_QUEUE,
-    TVMAZE_UPDATES_CONTAINER, SHOW_UPSERT_CONTAINER
+    TVMAZE_UPDATE_WATERMARK_TABLE,
+    TVMAZE_UPDATES_CONTAINER, SHOW_UPSERT_CONTAINER,
+    get_storage_connection_string
+)
+from tvbingefriend_show_sync.errors import retry_transient
+from tvbingefriend_show_sync.services.dead_letter_service import DeadLetterService
+from tvbingefriend_show_sync.services.queue_batch import (
+    ItemOutcome,
+    build_batch_message,
+    chunk,
+    get_batch_items,
+    process_batch
 )
 from tvbingefriend_show_sync.services.storage_service import StorageService
 from tvbingefriend_tvmaze_client.tvmaze_api import TVMazeAPI
 
+logger = logging.getLogger(__name__)
+
+UPDATE_WINDOWS: dict[str, int] = {  # TV Maze update periods, smallest first, in seconds
+    "day": 24 * 60 * 60,
+    "week": 7 * 24 * 60 * 60,
+    "month": 30 * 24 * 60 * 60
+}
+WATERMARK_PARTITION_KEY = "watermark"
+WATERMARK_ROW_KEY = "show_updates"
+UPDATE_RUN_METADATA = "update_run"  # metadata key holding the epoch of the scheduled run that fetched an updates blob
+
 
 class UpdateService:
     """Service for updating shows from TV Maze"""
-    def __init__(self) -> None:
-        self.storage_service = StorageService(STORAGE_CONNECTION_STRING)
-        self.tvmaze_api = TVMazeAPI()
+    def __init__(
+        self,
+        storage_service: StorageService | None = None,
+        tvmaze_api: TVMazeAPI | None = None,
+        dead_letter_service: DeadLetterService | None = None
+    ) -> None:
+        self.storage_service = storage_service or StorageService(get_storage_connection_string())
+        self.tvmaze_api = tvmaze_api or TVMazeAPI()
+        self.dead_letter_service = dead_letter_service or DeadLetterService(self.storage_service)
+
+    def get_updates(self, since: Literal['day', 'week', 'month'] | str | None = None) -> None:
+        """Get updates from TV Maze
+
+        A scheduled run (no period given) uses the smallest TV Maze update window covering the time since the last
+        run and stages only shows updated after the stored watermark. The watermark isn't advanced here: the
+        updates blob carries this run's epoch in its metadata, and the watermark moves once the blob has been
+        staged (see advance_update_watermark), so updates whose staging failed are fetched again. A manual run
+        for a given period stages every update in it and leaves the watermark alone.
+
+        Args:
+            since (str | None): Update period ('day', 'week', or 'month'). Defaults to None (scheduled run).
+        """
+        scheduled: bool = since is None
+        watermark: dict[str, Any] = self.get_update_watermark()
+        last_updated: int = int(watermark.get("LastUpdated", 0))
+        last_run: int | None = watermark.get("LastRun")
+        now: int = int(time.time())
 
-    def get_updates(self, since: Literal['day', 'week', 'month'] | str = "day") -> None:
-        """Get updates from TV Maze"""
-        logging.debug(f"UpdateService.get_updates: since: {since}")
+        if scheduled:
+            since = self.select_update_window(last_run, now)
+        logger.debug("UpdateService.get_updates: since: %s, watermark: %s", since, last_updated)
 
         try:
-            logging.info(f"UpdateService.get_updates: Getting updates from TV Maze for since: {since}")
+            logger.info("UpdateService.get_updates: Getting updates from TV Maze for since: %s", since)
             updates: dict[str, Any] = self.tvmaze_api.get_show_updates(period=since)  # get updates from TV Maze API
         except Exception as e:  # catch any errors, log error, and return
-            logging.error(f"Error getting updates from TV Maze: {e}")
+            logger.error("Error getting updates from TV Maze: %s", e)
             return
 
-        if updates:  # if updates are returned
+        new_updates: dict[str, Any] = updates or {}
+        if scheduled:
+            new_updates = {  # keep only shows updated after the watermark
+                show_id: updated for show_id, updated in new_updates.items() if int(updated) > last_updated
+            }
+            logger.info(
+                "UpdateService.get_updates: %s of %s updates are newer than watermark %s",
+                len(new_updates), len(updates or {}), last_updated
+            )
+
+        if new_updates:  # if new updates are returned
             blob_name: str = f"updates_{since}.json"  # set blob name
 
-            logging.debug(f"UpdateService.get_updates: container_name: {TVMAZE_UPDATES_CONTAINER}")
-            logging.debug(f"UpdateService.get_updates: Blob name: {blob_name}")
+            logger.debug("UpdateService.get_updates: container_name: %s", TVMAZE_UPDATES_CONTAINER)
+            logger.debug("UpdateService.get_updates: Blob name: %s", blob_name)
 
             self.storage_service.upload_blob_data(  # upload updates to blob storage
                 container_name=TVMAZE_UPDATES_CONTAINER,  # container name
                 blob_name=blob_name,  # blob name
-                data=updates  # data to upload
+                data=new_updates,  # data to upload
+                metadata={UPDATE_RUN_METADATA: str(now)} if scheduled else None  # advances the watermark once staged
             )
 
-            logging.info(f"Staged all updates for {since} in blob {blob_name}")
+            logger.info("Staged all updates for %s in blob %s", since, blob_name)
+        elif scheduled:  # nothing to stage, so this run is complete
+            self.set_update_watermark(last_updated, now)
+
+    def advance_update_watermark(self, updates: dict[str, Any], metadata: dict[str, str] | None) -> None:
+        """Advance the update watermark past a staged updates blob of a scheduled run
+
+        Never moves the watermark back, so blobs staged out of order are harmless.
+
+        Args:
+            updates (dict[str, Any]): Staged updates, TV Maze 'updated' epochs by show ID
+            metadata (dict[str, str] | None): Metadata of the updates blob; without a run epoch (a manual run)
+                the watermark is left alone
+        """
+        run: str | None = (metadata or {}).get(UPDATE_RUN_METADATA)
+        if not run:
+            return
+
+        watermark: dict[str, Any] = self.get_update_watermark()
+        high_watermark: int = max(
+            [int(watermark.get("LastUpdated", 0)), *(int(updated) for updated in updates.values())]
+        )
+        self.set_update_watermark(high_watermark, max(int(run), int(watermark.get("LastRun") or 0)))
+
+    def select_update_window(self, last_run: int | None, now: int) -> str:
+        """Select the smallest TV Maze update window covering the time since the last run
+
+        Args:
+            last_run (int | None): Epoch of the last successful run, or None if there is none
+            now (int): Current epoch
+
+        Returns:
+            str: Update period ('day', 'week', or 'month')
+        """
+        if last_run is None:
+            return "day"
+
+        gap: int = now - int(last_run)
+        for period, seconds in UPDATE_WINDOWS.items():
+            if gap <= seconds:
+                return period
+
+        logger.warning(
+            "UpdateService.select_update_window: %s seconds since last run exceeds the largest update window. Some "
+            "updates may have been missed.", gap
+        )
+        return "month"
+
+    def get_update_watermark(self) -> dict[str, Any]:
+        """Get the stored update watermark
+
+        Returns:
+            dict[str, Any]: Watermark entity, or an empty dict if none has been stored
+        """
+        watermark: dict[str, Any] | None = self.storage_service.get_entity(
+            table_name=TVMAZE_UPDATE_WATERMARK_TABLE,
+            partition_key=WATERMARK_PARTITION_KEY,
+            row_key=WATERMARK_ROW_KEY
+        )
+        return watermark or {}
+
+    def set_update_watermark(self, last_updated: int, last_run: int) -> None:
+        """Store the update watermark
+
+        Args:
+            last_updated (int): Latest TV Maze 'updated' epoch that has been staged
+            last_run (int): Epoch of this run
+        """
+        entity: dict[str, Any] = {
+            "PartitionKey": WATERMARK_PARTITION_KEY,
+            "RowKey": WATERMARK_ROW_KEY,
+            "LastUpdated": last_updated,
+            "LastRun": last_run
+        }
+        self.storage_service.upsert_entity(table_name=TVMAZE_UPDATE_WATERMARK_TABLE, entity=entity)
+        logger.info("UpdateService.set_update_watermark: Watermark set to %s", last_updated)
 
     def stage_updates_for_upsert(self, updates: dict[str, Any]) -> None:
         """Stage updates for upsert
@@ -50,20 +183,20 @@ class UpdateService:
         Args:
             updates (dict[str, Any]): Updates to stage
         """
-        logging.info("UpdateService.stage_updates_for_upsert: Staging updates for upsert")
-
-        for show_id, last_updated in updates.items():  # for each update
-            logging.debug(f"UpdateService.stage_updates_for_upsert: show_id: {show_id}")
+        logger.info("UpdateService.stage_updates_for_upsert: Staging updates for upsert")
 
-            msg: dict[str, Any] = {  # create message to retrieve show
-                "show_id": int(show_id)  # show_id
-            }
+        show_ids: list[int] = [int(show_id) for show_id in updates]
+        for batch in chunk(show_ids, QUEUE_MESSAGE_BATCH_SIZE):  # for each batch of updated shows
+            msg: dict[str, Any] = build_batch_message(batch, "show_id", "show_ids")  # message to retrieve shows
 
             self.storage_service.upload_queue_message(  # upload queue message to trigger retrieval
                 queue_name=TVMAZE_SHOWS_UPDATE_QUEUE,  # queue name
                 message=msg  # message to upload
             )
 
+        for show_id, last_updated in updates.items():  # for each update
+            logger.debug("UpdateService.stage_updates_for_upsert: show_id: %s", show_id)
+
             entity: dict[str, Any] = {
                 "PartitionKey": "show",
                 "RowKey": str(show_id),
@@ -74,52 +207,91 @@ class UpdateService:
                 entity=entity  # entity to upsert
             )
 
+        logger.info(
+            "UpdateService.stage_updates_for_upsert: Queued %d shows for update and season/episode retrieval",
+            len(show_ids)
+        )
+
+    def get_show_update_details_batch(self, message: dict[str, Any]) -> list[ItemOutcome]:
+        """Update every show in a single-show or batched queue message
+
+        Args:
+            message (dict[str, Any]): Queue message with 'show_id' or 'show_ids'
+
+        Returns:
+            list[ItemOutcome]: Outcome per show ID
+        """
+        show_ids: list[int] = get_batch_items(message, "show_id", "show_ids")
+        if not show_ids:
+            logger.error("Received show update message without a 'show_id'. Aborting.")
+            return []
+
+        return process_batch(
+            items=show_ids,
+            handler=self.get_show_update_details,
+            requeue=lambda show_id: self.storage_service.upload_queue_message(
+                queue_name=TVMAZE_SHOWS_UPDATE_QUEUE,
+                message={"show_id": show_id}
+            ),
+            label="UpdateService.get_show_update_details_batch"
+        )
+
     def get_show_update_details(self, show_id: int):
         """Update a show from TV Maze
 
+        Transient API errors are retried in-process and then raised for the host to retry. Permanent errors
+        (e.g. a 404 for a deleted show) are dead-lettered without retrying.
+
         Args:
             show_id (int): ID of the show to update
         """
-        logging.info(f"UpdateService.get_show_update_details: Updating show {show_id} from TV Maze")
+        logger.info("UpdateService.get_show_update_details: Updating show %s from TV Maze", show_id)
 
-        show: dict[str, Any] = self.tvmaze_api.get_show_details(show_id)
+        try:
+            show: dict[str, Any] = retry_transient(
+                lambda: self.tvmaze_api.get_show_details(show_id),
+                label=f"UpdateService.get_show_update_details({show_id})"
+            )
+        except Exception as e:
+            if not self.dead_letter_service.record_if_permanent("get_show_update_details", show_id, e):
+                raise
+            return
 
         if show:
             blob_name: str = f"tv_show_{show_id}.json"
 
-            logging.debug(f"UpdateService.get_show_update_details: container_name: {SHOW_UPSERT_CONTAINER}")
-            logging.debug(f"UpdateService.get_show_update_details: Blob name: {blob_name}")
+            logger.debug("UpdateService.get_show_update_details: container_name: %s", SHOW_UPSERT_CONTAINER)
+            logger.debug("UpdateService.get_show_update_details: Blob name: %s", blob_name)
 
             self.storage_service.upload_blob_data(  # upload show for upsert
                 container_name=SHOW_UPSERT_CONTAINER,  # container name
                 blob_name=blob_name,  # blob name
-                data=show  # data to upload
+                data=show,  # data to upload
+                skip_unchanged=True  # an unchanged show needs no upsert
             )
 
     def update_seasons_episodes(self) -> None:
         """Update seasons and episodes from TV Maze"""
-        logging.info("UpdateService.update_seasons_episodes: Updating seasons and episodes from TV Maze")
+        logger.info("UpdateService.update_seasons_episodes: Updating seasons and episodes from TV Maze")
 
         staged_shows: list[dict[str, Any]] = self.storage_service.get_entities(TVMAZE_SEASONS_EPISODES_UPDATE_TABLE)
         if not staged_shows:
-            logging.info("UpdateService.update_seasons_episodes: No shows staged for season/episode updates.")
+            logger.info("UpdateService.update_seasons_episodes: No shows staged for season/episode updates.")
             return
 
-        show_ids_to_process: list[str] = [entity['RowKey'] for entity in staged_shows]
+        show_ids_to_process: list[int] = [int(entity['RowKey']) for entity in staged_shows]
 
-        for show_id in show_ids_to_process:
-            msg: dict[str, Any] = {
-                "show_id": int(show_id)
-            }
-            logging.debug(f"UpdateService.update_seasons_episodes: Queuing show {show_id} for season/episode update.")
+        for batch in chunk(show_ids_to_process, QUEUE_MESSAGE_BATCH_SIZE):
+            msg: dict[str, Any] = build_batch_message(batch, "show_id", "show_ids")
+            logger.debug("UpdateService.update_seasons_episodes: Queuing shows %s for season/episode update.", batch)
             self.storage_service.upload_queue_message(
                 queue_name=TVMAZE_SEASONS_EPISODES_QUEUE,
                 message=msg
             )
 
-        logging.info(
-            f"UpdateService.update_seasons_episodes: Deleting {len(staged_shows)} processed entities from the "
-            f"update table."
+        logger.info(
+            "UpdateService.update_seasons_episodes: Deleting %s processed entities from the update table.",
+            len(staged_shows)
         )
         self.storage_service.delete_entities_batch(
             table_name=TVMAZE_SEASONS_EPISODES_UPDATE_TABLE,
@@ -0,0 +1,147 @@
+"""Garbage collection of consumed staging blobs.
+
+Every stage of the ingest hands its output to the next through a staging blob. Once a blob-triggered function
+has processed its blob (for the upsert functions, once the group commit holding its upsert has committed), the
+blob is deleted, so the staging containers only hold work in flight. Blobs uploaded with skip_unchanged are first
+recorded in the applied-blobs ledger, so the same content isn't uploaded again. Blobs left behind by failed
+invocations, or written while deletion is disabled, are removed by the sweep once they are older than
+STAGING_BLOB_TTL_HOURS.
+"""
+import functools
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, TypeVar
+
+from tvbingefriend_show_sync.config import STAGING_BLOB_DELETE_ON_SUCCESS, STAGING_BLOB_TTL_HOURS, STAGING_CONTAINERS
+from tvbingefriend_show_sync.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def split_blob_path(path: str) -> tuple[str, str]:
+    """Split a blob trigger's 'container/blob' path into the container and blob names"""
+    container_name, _, blob_name = path.partition("/")
+    return container_name, blob_name
+
+
+def get_blob_etag(blob: Any) -> str | None:
+    """Get the ETag the host read a triggering blob at, quoted as the storage service expects
+
+    Args:
+        blob (Any): Blob input stream, whose blob_properties hold the properties the host read
+
+    Returns:
+        str | None: ETag, or None if the host didn't provide one
+    """
+    properties: dict[str, Any] = getattr(blob, "blob_properties", None) or {}
+    etag = next((value for key, value in properties.items() if key.lower() == "etag" and value), None)
+    if etag is None:
+        return None
+    etag = str(etag)
+    return etag if etag.startswith(("\"", "W/")) else f'"{etag}"'
+
+
+def delete_consumed_blob(path: str, etag: str) -> None:
+    """Delete a processed staging blob, unless it was overwritten after the host read it
+
+    Failures are logged and never fail the invocation; the sweep removes the blob later.
+
+    Args:
+        path (str): Blob path, 'container/blob'
+        etag (str): ETag of the blob the host read
+    """
+    from tvbingefriend_show_sync.services.service_container import get_services  # avoid an import cycle
+
+    container_name, blob_name = split_blob_path(path)
+    try:
+        if get_services().storage_service.delete_blob(container_name, blob_name, etag=etag):
+            get_registry().increment("staging_blobs_deleted")
+    except Exception as e:
+        logger.warning("staging_gc: Failed to delete consumed blob %s: %s", path, e)
+
+
+def get_blob_content_hash(blob: Any) -> str | None:
+    """Get the content hash a triggering blob was uploaded with, if it was uploaded with skip_unchanged
+
+    Args:
+        blob (Any): Blob input stream, whose metadata holds the blob's metadata
+
+    Returns:
+        str | None: content_hash of the blob's content, or None if its metadata has none
+    """
+    from tvbingefriend_show_sync.services.storage_service import CONTENT_HASH_METADATA  # avoid an import cycle
+
+    metadata: dict[str, Any] = getattr(blob, "metadata", None) or {}
+    return metadata.get(CONTENT_HASH_METADATA) or None
+
+
+def record_consumed_blob(path: str, digest: str) -> None:
+    """Record a processed blob's content in the applied-blobs ledger, so an unchanged re-upload is skipped
+
+    Failures are logged and never fail the invocation; the unchanged content is only uploaded and applied again.
+
+    Args:
+        path (str): Blob path, 'container/blob'
+        digest (str): content_hash of the blob's content
+    """
+    from tvbingefriend_show_sync.services.service_container import get_services  # avoid an import cycle
+
+    try:
+        get_services().idempotency_ledger.record_applied(path, digest)
+    except Exception as e:
+        logger.warning("staging_gc: Failed to record consumed blob %s in ledger: %s", path, e)
+
+
+def consumes_blob(function: F) -> F:
+    """Decorate a blob-triggered function so its blob is recorded as applied and deleted once it returns
+
+    The function's first argument is its blob. Nothing is recorded or deleted if the function raises, so the host
+    can retry and an upload of the same content isn't skipped. A blob uploaded with skip_unchanged is recorded in
+    the applied-blobs ledger under its content hash. The blob is only deleted if it still has the ETag the host
+    read, so content written over it since keeps its pending trigger; a blob without an ETag in its properties is
+    left to the sweep. Deletion is skipped when STAGING_BLOB_DELETE_ON_SUCCESS is false.
+    """
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        blob = args[0] if args else next(iter(kwargs.values()), None)
+        result = function(*args, **kwargs)
+        if blob is None or not blob.name:
+            return result
+
+        digest = get_blob_content_hash(blob)
+        if digest:
+            record_consumed_blob(blob.name, digest)
+        if STAGING_BLOB_DELETE_ON_SUCCESS:
+            etag = get_blob_etag(blob)
+            if etag:
+                delete_consumed_blob(blob.name, etag)
+            else:
+                logger.debug("staging_gc: No ETag for blob %s, leaving it to the sweep", blob.name)
+        return result
+
+    return wrapper  # type: ignore[return-value]
+
+
+def sweep_staging_blobs(ttl_hours: int = STAGING_BLOB_TTL_HOURS) -> dict[str, int]:
+    """Delete staging blobs older than the TTL from every staging container, in batch requests
+
+    Args:
+        ttl_hours (int): Age in hours past which a staging blob is presumed abandoned
+
+    Returns:
+        dict[str, int]: Blobs deleted per container
+    """
+    from tvbingefriend_show_sync.services.service_container import get_services  # avoid an import cycle
+
+    storage_service = get_services().storage_service
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=ttl_hours)
+    deleted: dict[str, int] = {}
+    for container_name in STAGING_CONTAINERS:
+        try:
+            deleted[container_name] = storage_service.delete_blobs_older_than(container_name, cutoff)
+        except Exception as e:  # one container failing shouldn't stop the sweep of the others
+            logger.error("staging_gc: Failed to sweep container %s: %s", container_name, e, exc_info=True)
+    get_registry().increment("staging_blobs_swept", sum(deleted.values()))
+    return deleted
@@ -0,0 +1,162 @@
+"""Pipeline traces carried from each workflow's origin to its terminal upserts.
+
+A trace is started by the function that begins a workflow (an HTTP start or a timer) and is made current for
+the invocation. StorageService attaches the current trace to everything it sends: queue messages that are
+dicts get a '_trace' key, and blobs get 'trace_id' and 'origin_ts' metadata, so staged payloads are never
+changed. Each downstream function picks the trace up from its trigger, records how long after the origin it
+started, and passes the trace on. Terminal upserts also record the end-to-end lag once committed. A chain that
+re-queues itself, like the show page crawl, starts a new trace for each link (see with_new_trace).
+"""
+import functools
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Callable, TypeVar
+
+from tvbingefriend_show_sync.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TRACE_KEY = "_trace"
+TRACE_ID_METADATA = "trace_id"
+ORIGIN_TS_METADATA = "origin_ts"
+
+_current_trace: ContextVar[dict[str, Any] | None] = ContextVar("current_trace", default=None)
+
+
+def new_trace() -> dict[str, Any]:
+    """Start a trace originating now
+
+    Returns:
+        dict[str, Any]: {'trace_id': str, 'origin_ts': float}
+    """
+    return {"trace_id": uuid.uuid4().hex, "origin_ts": time.time()}
+
+
+def get_current_trace() -> dict[str, Any] | None:
+    """Get the trace of the running invocation, if any"""
+    return _current_trace.get()
+
+
+def get_trace_metadata() -> dict[str, str]:
+    """Get blob metadata carrying the current trace
+
+    Returns:
+        dict[str, str]: Metadata, empty if there is no current trace
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return {}
+    return {TRACE_ID_METADATA: trace["trace_id"], ORIGIN_TS_METADATA: f"{trace['origin_ts']:.3f}"}
+
+
+def attach_trace(message: dict[str, Any]) -> dict[str, Any]:
+    """Add the current trace to a queue message, keeping any trace the message already has
+
+    Args:
+        message (dict[str, Any]): Queue message
+
+    Returns:
+        dict[str, Any]: The message, or a copy of it with a '_trace' key
+    """
+    trace = _current_trace.get()
+    if trace is None or TRACE_KEY in message:
+        return message
+    return {**message, TRACE_KEY: trace}
+
+
+def with_new_trace(message: dict[str, Any]) -> dict[str, Any]:
+    """Get a copy of a queue message carrying a new trace originating now, replacing any trace it has
+
+    Used for messages that continue a long-running chain, so each link is traced from when it was queued
+    rather than from the origin of the whole chain.
+
+    Args:
+        message (dict[str, Any]): Queue message
+
+    Returns:
+        dict[str, Any]: Copy of the message with a new '_trace' key
+    """
+    return {**message, TRACE_KEY: new_trace()}
+
+
+def extract_trace(trigger: Any) -> dict[str, Any] | None:
+    """Get the trace carried by a function trigger
+
+    Args:
+        trigger (Any): Queue message, blob input stream, or other trigger argument
+
+    Returns:
+        dict[str, Any] | None: Trace, or None if the trigger carries none (e.g. HTTP and timer triggers)
+    """
+    try:
+        if hasattr(trigger, "dequeue_count"):  # queue message
+            message = trigger.get_json()
+            trace = message.get(TRACE_KEY) if isinstance(message, dict) else None
+            if isinstance(trace, dict) and "trace_id" in trace and "origin_ts" in trace:
+                return {"trace_id": str(trace["trace_id"]), "origin_ts": float(trace["origin_ts"])}
+        elif hasattr(trigger, "metadata"):  # blob input stream
+            metadata = trigger.metadata or {}
+            if TRACE_ID_METADATA in metadata and ORIGIN_TS_METADATA in metadata:
+                return {"trace_id": metadata[TRACE_ID_METADATA], "origin_ts": float(metadata[ORIGIN_TS_METADATA])}
+    except (TypeError, ValueError) as e:  # a malformed trigger is reported by the function itself
+        logger.debug("extract_trace: Could not read trace from trigger: %s", e)
+    return None
+
+
+def record_lag(stage: str, trace: dict[str, Any]) -> float:
+    """Record the time from a trace's origin to now as the lag of a stage
+
+    Args:
+        stage (str): Stage name
+        trace (dict[str, Any]): Trace
+
+    Returns:
+        float: Lag in milliseconds
+    """
+    lag_ms = max(0.0, (time.time() - trace["origin_ts"]) * 1000)
+    get_registry().observe(f"lag.{stage}", lag_ms)
+    return lag_ms
+
+
+def traced(stage: str, terminal: bool = False) -> Callable[[F], F]:
+    """Decorate a function so it continues the trace of its trigger, or starts one if the trigger has none
+
+    The function's first argument is its trigger. The lag from the trace's origin to the start of the function
+    is recorded as 'lag.<stage>'. For terminal stages whose trigger carried a trace, the lag once the function
+    returns is also recorded as 'lag.end_to_end'; a trace started by the function itself has no upstream lag.
+
+    Args:
+        stage (str): Stage name, usually the function name
+        terminal (bool): Whether the function is the last stage of its workflow
+
+    Returns:
+        Callable[[F], F]: Decorator
+    """
+    def decorator(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            trigger = args[0] if args else next(iter(kwargs.values()), None)
+            trace = extract_trace(trigger)
+            extracted = trace is not None
+            if trace is None:
+                trace = new_trace()
+            else:
+                record_lag(stage, trace)
+
+            token = _current_trace.set(trace)
+            try:
+                result = function(*args, **kwargs)
+                if terminal and extracted:
+                    lag_ms = record_lag("end_to_end", trace)
+                    logger.info("%s: Trace %s completed %.0f ms after its origin", stage, trace['trace_id'], lag_ms)
+                return result
+            finally:
+                _current_trace.reset(token)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -1,25 +1,28 @@
 """Shared utility functions and classes for the application."""
 import logging
 from contextlib import contextmanager
-from typing import Generator
+from typing import Generator, TYPE_CHECKING
 
-from sqlalchemy.orm import Session
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
 
-from tvbingefriend_show_sync.repositories.database import SessionLocal
+logger = logging.getLogger(__name__)
 
 
 @contextmanager
-def db_session_manager() -> Generator[Session, None, None]:
+def db_session_manager() -> Generator["Session", None, None]:
     """
     Provide a transactional scope around a series of operations.
     Handles session creation, commit, rollback, and closing.
     """
-    db = SessionLocal()
+    from tvbingefriend_show_sync.repositories.database import get_session_factory  # deferred for cold start
+
+    db = get_session_factory()()
     try:
         yield db
         db.commit()
     except Exception as e:
-        logging.error(f"Session rollback due to exception: {e}", exc_info=True)
+        logger.error("Session rollback due to exception: %s", e, exc_info=True)
         db.rollback()
         raise
     finally: